@@ -0,0 +1,213 @@
+"""
+GPL-3.0 License
+
+Copyright (C) 2020-2022 Monirul Shawon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Time-history response to nodal loads that change in time, linear truss.
+
+    M a + C v + K u = F(t),   C = mass_damping M + stiffness_damping K
+
+is integrated with the HHT-alpha method, alpha = 0 is Newmark's average
+acceleration (no numerical damping), alpha down to -1/3 damps the highest
+modes, beta = (1 - alpha)^2/4 and gamma = 1/2 - alpha keep it unconditionally
+stable and second order accurate. M comes from the member masses
+(TrussSolver.mass_matrix) and the time step is fixed, so the effective
+stiffness
+
+    K_eff = M/(beta dt^2) + (1 + alpha) gamma/(beta dt) C + (1 + alpha) K
+
+is factorized once and every step is one solve against it.
+
+F(t) = loads.dot(history(t)), loads is (ndofs, patterns) and history gives
+the multiplier of every pattern at any time. Steps are done a chunk at a time
+and every chunk is handed out (run) or written to disk (save) before the next
+one, only a chunk of the history is ever in memory.
+"""
+
+import os
+
+import numpy as np
+
+from solver import Factorization, TrussSolver
+
+# Steps kept in memory at once
+CHUNK = 1000
+
+
+def rayleigh(ratio, first, second):
+    """
+    (mass_damping, stiffness_damping) giving the damping ratio at the two
+    frequencies first and second (Hz), usually the lowest two modes
+    """
+    w1, w2 = 2*np.pi*first, 2*np.pi*second
+    if w1 <= 0 or w2 <= 0 or w1 == w2:
+        raise ValueError('Rayleigh damping needs two different positive frequencies')
+    return 2*ratio*w1*w2/(w1 + w2), 2*ratio/(w1 + w2)
+
+
+class LoadHistory:
+    """
+    multiplier of every load pattern at any time, linear between the given
+    times (times,) and values (times, patterns), the end values outside them
+    """
+
+    def __init__(self, times, values):
+        self.times = np.asarray(times, dtype=float).reshape(-1)
+        self.values = np.asarray(values, dtype=float).reshape(len(self.times), -1)
+        if len(self.times) == 0:
+            raise ValueError('A load history needs at least one time')
+        if (np.diff(self.times) < 0).any():
+            raise ValueError('Load history times must increase')
+
+    @classmethod
+    def constant(cls, patterns=1):
+        """every pattern applied in full from t = 0 on (suddenly applied loads)"""
+        return cls([0.0], np.ones((1, patterns)))
+
+    def __call__(self, times):
+        times = np.asarray(times, dtype=float).reshape(-1)
+        return np.column_stack([np.interp(times, self.times, column)
+                                for column in self.values.T])
+
+
+class TimeHistory:
+    """
+    dt     : time step, seconds when the masses follow units.py
+    alpha  : HHT parameter in [-1/3, 0]
+    lumped : lumped instead of consistent mass
+    """
+
+    def __init__(self, model, dt, alpha=0.0, lumped=False, mass_damping=0.0,
+                 stiffness_damping=0.0, sparse=None):
+        if dt <= 0:
+            raise ValueError('The time step must be positive')
+        if not -1/3 <= alpha <= 0:
+            raise ValueError('alpha must be between -1/3 and 0')
+        self.model = model
+        self.dt = dt
+        self.alpha = alpha
+        self.beta = (1 - alpha)**2/4
+        self.gamma = 1/2 - alpha
+        self.mass_damping = mass_damping
+        self.stiffness_damping = stiffness_damping
+
+        solver = TrussSolver(model, sparse)
+        # mass would make K_eff solvable, a mechanism would just drift away
+        solver.factorize()
+        self.solver = solver
+        self.free_dofs = solver.free_dofs
+        self.K = solver.K_final
+        self.M = solver.mass_matrix(lumped)
+
+        # mass is needed everywhere, the initial accelerations solve M a = F
+        if not (self.M.diagonal() > 0).all():
+            raise ValueError('Every free node needs mass, give the members a density')
+        self.mass_factor = Factorization(self.M)
+
+        beta, gamma = self.beta, self.gamma
+        C = mass_damping*self.M + stiffness_damping*self.K
+        self.effective = Factorization(
+            self.M/(beta*dt**2) + (1 + alpha)*gamma/(beta*dt)*C + (1 + alpha)*self.K)
+
+    def run(self, loads=None, history=None, steps=1000, chunk=CHUNK, dofs=None):
+        """
+        Integrate from rest over steps time steps, yields (times,
+        displacements, bar_forces) a chunk at a time: times (n,),
+        displacements (n, len(dofs)) of the dofs asked for (0-based, every dof
+        if not given) and bar_forces (n, members). The first chunk starts at
+        t = 0.
+        """
+        model, dt = self.model, self.dt
+        alpha, beta, gamma = self.alpha, self.beta, self.gamma
+        free = self.free_dofs
+        loads = np.asarray(model.loads if loads is None else loads,
+                           dtype=float).reshape(model.ndofs, -1)
+        history = LoadHistory.constant(loads.shape[1]) if history is None else history
+        F = loads[free]
+        dofs = np.arange(model.ndofs) if dofs is None else np.asarray(dofs, dtype=int)
+        T = self.solver.force_operator()
+        K, M = self.K, self.M
+        cm, ck = self.mass_damping, self.stiffness_damping
+
+        a2, a3 = 1/(beta*dt), 1/(2*beta) - 1
+        a0 = a2/dt
+        # v + (1 + alpha)(v_new - v) without the part that depends on du
+        wv, wa = 1 - (1 + alpha)*gamma/beta, (1 + alpha)*dt*(1 - gamma/(2*beta))
+
+        u = np.zeros(len(free))
+        v = np.zeros(len(free))
+        previous = F.dot(history(0.0)[0])
+        a = self.mass_factor.solve(previous)
+
+        for start in range(0, steps+1, chunk):
+            steps_here = np.arange(start, min(start+chunk, steps+1))
+            times = steps_here*dt
+            forces = F.dot(history(times).T)
+            U = np.empty((len(times), len(free)))
+            for i, step in enumerate(steps_here):
+                if step:
+                    w = wv*v + wa*a
+                    rhs = (1 + alpha)*forces[:, i] - alpha*previous - \
+                        K.dot(u + ck*w) + M.dot(a2*v + a3*a - cm*w)
+                    du = self.effective.solve(rhs)
+                    a_new = a0*du - a2*v - a3*a
+                    v = v + dt*((1 - gamma)*a + gamma*a_new)
+                    a = a_new
+                    u = u + du
+                previous = forces[:, i]
+                U[i] = u
+
+            displacements = np.zeros((len(times), model.ndofs))
+            displacements[:, free] = U
+            yield times, displacements[:, dofs], T.dot(U.T).T
+
+    def save(self, directory, loads=None, history=None, steps=1000, chunk=CHUNK, dofs=None,
+             displacement_scale=1.0, force_scale=1.0):
+        """
+        run straight to time.npy, displacements.npy and bar_forces.npy in
+        directory, each chunk is written as soon as it is done. The arrays are
+        memory mapped .npy files (np.load(..., mmap_mode='r') reads them back
+        the same way). Returns the largest |displacement| and |bar force|.
+        """
+        os.makedirs(directory, exist_ok=True)
+        count = len(np.arange(self.model.ndofs) if dofs is None else np.asarray(dofs))
+        files = {
+            'time': (steps+1,),
+            'displacements': (steps+1, count),
+            'bar_forces': (steps+1, len(self.model)),
+        }
+        arrays = {name: np.lib.format.open_memmap(os.path.join(directory, f'{name}.npy'),
+                                                  mode='w+', dtype='<f8', shape=shape)
+                  for name, shape in files.items()}
+        peak_displacement = peak_force = 0.0
+        try:
+            row = 0
+            for times, displacements, bar_forces in self.run(loads, history, steps, chunk, dofs):
+                rows = slice(row, row + len(times))
+                arrays['time'][rows] = times
+                arrays['displacements'][rows] = displacements*displacement_scale
+                arrays['bar_forces'][rows] = bar_forces*force_scale
+                peak_displacement = max(peak_displacement,
+                                        np.abs(displacements).max(initial=0)*displacement_scale)
+                peak_force = max(peak_force, np.abs(bar_forces).max(initial=0)*force_scale)
+                row += len(times)
+                for array in arrays.values():
+                    array.flush()
+        finally:
+            del arrays
+        return peak_displacement, peak_force
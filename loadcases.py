@@ -0,0 +1,116 @@
+"""
+GPL-3.0 License
+
+Copyright (C) 2020-2022 Monirul Shawon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Named load cases and factored combinations.
+
+Every case is one column of the load matrix, all of them are solved together
+by TrussSolver.solve_cases. The analysis is linear, so a combination is the
+same weighted sum of the case results and never needs a solve of its own.
+"""
+
+import re
+
+import numpy as np
+
+from solver import TrussResult
+
+DEFAULT_CASE = 'Load'
+
+TERM = re.compile(r'\s*([+-]?)\s*(\d*\.?\d*)\s*\*?\s*([A-Za-z_]\w*)\s*')
+
+
+def parse_combination(text):
+    """
+    '1.2D + 1.6L - 0.5W' -> {'D': 1.2, 'L': 1.6, 'W': -0.5}
+    a case without a factor counts once, a case named twice adds up
+    """
+    factors = {}
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = TERM.match(text, position)
+        if not match or match.end() == position:
+            raise ValueError(f'Cannot read combination {text!r}')
+        if position and not match.group(1):
+            raise ValueError(f'Missing + or - in combination {text!r}')
+        sign, factor, case = match.groups()
+        if factor == '.' or (not factor and '*' in match.group(0)):
+            raise ValueError(f'Missing factor in combination {text!r}')
+        factor = float(factor) if factor else 1.0
+        factors[case] = factors.get(case, 0) + (-factor if sign == '-' else factor)
+        position = match.end()
+    if not factors:
+        raise ValueError('Empty combination')
+    return factors
+
+
+def parse_combinations(text):
+    """'1.2D+1.6L, 0.9D+1.0W' -> {'1.2D+1.6L': {...}, '0.9D+1.0W': {...}}"""
+    combinations = {}
+    for part in text.split(','):
+        if part.strip():
+            name = ''.join(part.split())
+            combinations[name] = parse_combination(part)
+    return combinations
+
+
+def combination_matrix(cases, combinations):
+    """(combinations, cases) factors, a combination may only use known cases"""
+    index = {case: i for i, case in enumerate(cases)}
+    matrix = np.zeros((len(combinations), len(cases)))
+    for row, (name, factors) in enumerate(combinations.items()):
+        for case, factor in factors.items():
+            if case not in index:
+                raise ValueError(f'{name} uses load case {case} which has no loads')
+            matrix[row, index[case]] = factor
+    return matrix
+
+
+def combine(result, matrix):
+    """TrussResult of every combination from one with a column per case"""
+    return TrussResult(result.displacements.dot(matrix.T),
+                       result.bar_forces.dot(matrix.T),
+                       result.stresses.dot(matrix.T),
+                       result.reactions.dot(matrix.T))
+
+
+def column(result, index):
+    """TrussResult of a single case or combination"""
+    return TrussResult(result.displacements[:, index],
+                       result.bar_forces[:, index],
+                       result.stresses[:, index],
+                       result.reactions[:, index])
+
+
+class Envelope:
+    """
+    max and min of every row of values (rows, results) across its columns,
+    max_at / min_at are the column that governs
+    """
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=float)
+        if values.shape[1] == 0:
+            raise ValueError('Nothing to envelope')
+        self.max_at = values.argmax(axis=1)
+        self.min_at = values.argmin(axis=1)
+        rows = np.arange(len(values))
+        self.max = values[rows, self.max_at]
+        self.min = values[rows, self.min_at]
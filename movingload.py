@@ -0,0 +1,188 @@
+"""
+GPL-3.0 License
+
+Copyright (C) 2020-2022 Monirul Shawon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Vehicles moving along a load path.
+
+The load path is the straight line between two nodes, the nodes on it are the
+panel points. A load between two panel points reaches the truss through the
+stringer of that panel, so influence ordinates are linear in between and zero
+off the path. Influence lines are only solved at the panel points
+(TrussSolver.influence_lines), every vehicle position after that is a weighted
+sum of their columns.
+"""
+
+import re
+
+import numpy as np
+
+# Nodes further than this (relative to the path length) from the line are not on it
+PATH_TOLERANCE = 1e-6
+# Positions of the lead axle on the fine grid, on top of the exact breakpoints
+SWEEP_STEPS = 1000
+
+
+def path_nodes(coordinates, start, end, tolerance=PATH_TOLERANCE):
+    """
+    nodes (1 based) on the straight path from node start to node end, in the
+    order a load meets them, and their distance from start along the path
+    """
+    coordinates = np.asarray(coordinates, dtype=float)
+    origin = coordinates[start-1]
+    direction = coordinates[end-1] - origin
+    length = np.hypot(*direction)
+    if length == 0:
+        raise ValueError('Load path starts and ends at the same point')
+    direction = direction/length
+
+    relative = coordinates - origin
+    distance = relative.dot(direction)
+    offset = np.abs(relative[:, 0]*direction[1] - relative[:, 1]*direction[0])
+    on_path = ((offset <= tolerance*length)
+               & (distance >= -tolerance*length)
+               & (distance <= length*(1 + tolerance)))
+
+    nodes = np.flatnonzero(on_path)
+    order = np.argsort(distance[nodes], kind='stable')
+    return nodes[order] + 1, np.clip(distance[nodes[order]], 0, length)
+
+
+def interpolate(positions, ordinates, x):
+    """
+    ordinates (members, panel points) at the distances x along the path,
+    linear between panel points and zero outside of the path
+    """
+    positions = np.asarray(positions, dtype=float)
+    x = np.asarray(x, dtype=float)
+    if len(positions) < 2:
+        raise ValueError('The load path needs at least two nodes')
+
+    panel = np.clip(np.searchsorted(positions, x, side='right') - 1,
+                    0, len(positions) - 2)
+    span = positions[panel+1] - positions[panel]
+    # two nodes at the same place make an empty panel, the load sits on the first
+    fraction = np.divide(x - positions[panel], span,
+                         out=np.zeros_like(x), where=span > 0)
+    inside = (x >= positions[0]) & (x <= positions[-1])
+    fraction = np.clip(fraction, 0, 1)
+
+    return (ordinates[:, panel]*np.where(inside, 1 - fraction, 0)
+            + ordinates[:, panel+1]*np.where(inside, fraction, 0))
+
+
+class Vehicle:
+    """
+    axle loads from the front axle backwards and the spacings between them,
+    in the units of the influence lines and of the path
+    """
+
+    def __init__(self, loads, spacings=()):
+        self.loads = np.asarray(loads, dtype=float).reshape(-1)
+        spacings = np.asarray(spacings, dtype=float).reshape(-1)
+        if len(self.loads) == 0:
+            raise ValueError('A vehicle needs at least one axle')
+        if len(spacings) != len(self.loads) - 1:
+            raise ValueError(
+                f'{len(self.loads)} axles need {len(self.loads)-1} spacings, not {len(spacings)}')
+        if (spacings < 0).any():
+            raise ValueError('Axle spacings cannot be negative')
+        # distance of every axle behind the front one
+        self.offsets = np.concatenate(([0.0], np.cumsum(spacings)))
+
+    @classmethod
+    def parse(cls, text):
+        """'35, 145, 145 ; 4.3, 4.3' -> axle loads ; spacings"""
+        loads, _, spacings = text.partition(';')
+        try:
+            return cls([float(v) for v in re.split(r'[,\s]+', loads.strip()) if v],
+                       [float(v) for v in re.split(r'[,\s]+', spacings.strip()) if v])
+        except ValueError as e:
+            raise ValueError(f'Cannot read vehicle {text!r} : {e}')
+
+    @property
+    def length(self):
+        return self.offsets[-1]
+
+    def reversed(self):
+        """the same vehicle driving the other way"""
+        return Vehicle(self.loads[::-1], np.diff(self.offsets)[::-1])
+
+    def forces(self, positions, ordinates, front):
+        """(members, len(front)) member forces with the front axle at every distance in front"""
+        front = np.asarray(front, dtype=float)
+        forces = np.zeros((len(ordinates), len(front)))
+        for load, offset in zip(self.loads, self.offsets):
+            forces += load*interpolate(positions, ordinates, front - offset)
+        return forces
+
+
+class SweepResult:
+    """
+    max and min force of every member while the vehicle crosses the path,
+    max_at / min_at are the distance of its front axle from the start of the
+    path and max_reversed / min_reversed tell if it was driving from the end
+    towards the start
+    """
+
+    def __init__(self, front, forces, reversed_forces=None, length=0.0):
+        self.front = front
+        self.forces = forces
+
+        both = forces if reversed_forces is None else np.hstack(
+            (forces, reversed_forces))
+        columns = len(front)
+        max_at = both.argmax(axis=1)
+        min_at = both.argmin(axis=1)
+        rows = np.arange(len(both))
+        self.max = both[rows, max_at]
+        self.min = both[rows, min_at]
+        self.max_reversed = max_at >= columns
+        self.min_reversed = min_at >= columns
+        # a reversed sweep is the mirrored vehicle driving forwards, its
+        # front is the rear axle of the real one
+        self.max_at = front[max_at % columns] - length*self.max_reversed
+        self.min_at = front[min_at % columns] - length*self.min_reversed
+
+
+def sweep(positions, ordinates, vehicle, steps=SWEEP_STEPS, both_directions=True):
+    """
+    Drive vehicle over the path, from the front axle entering at the first
+    panel point until the last axle leaves at the last one.
+
+    The forces are piecewise linear in the vehicle position with kinks only
+    where an axle is on a panel point, so those positions are always checked
+    and the max / min are exact. steps extra positions are added on an even
+    grid for a smooth force history (SweepResult.forces).
+    """
+    positions = np.asarray(positions, dtype=float)
+    ordinates = np.atleast_2d(np.asarray(ordinates, dtype=float))
+    start, end = positions[0], positions[-1] + vehicle.length
+
+    breakpoints = (positions[None, :] + vehicle.offsets[:, None]).ravel()
+    if both_directions:
+        # mirrored breakpoints of the reversed vehicle, measured the same way
+        breakpoints = np.concatenate(
+            (breakpoints, (positions[None, :] + vehicle.length - vehicle.offsets[:, None]).ravel()))
+    front = np.union1d(breakpoints, np.linspace(start, end, steps + 1) if steps else [])
+
+    forces = vehicle.forces(positions, ordinates, front)
+    reversed_forces = None
+    if both_directions:
+        reversed_forces = vehicle.reversed().forces(positions, ordinates, front)
+    return SweepResult(front, forces, reversed_forces, vehicle.length)
@@ -0,0 +1,315 @@
+"""
+GPL-3.0 License
+
+Copyright (C) 2020-2022 Monirul Shawon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Geometric nonlinear (large displacement) analysis, corotational bars.
+
+Every member keeps its original length L and EA/L from TrussSolver.assemble
+and follows its ends wherever they go. With l the current length and e the
+current direction
+
+    N      = EA/L (l - L)
+    f_int  = N {-e  e}
+    k_t    = EA/L b.b^T + N/l [[G -G] [-G G]],   b = {-e e},  G = I - e.e^T
+
+which is exactly the linear k_r = EA/L tau.tau^T when nothing has moved yet.
+The tangent is refilled into the same (row, col) pattern as K, only the entries
+of free dofs are kept.
+
+newton       load control, equal load steps up to the full load
+arc_length   Crisfield's cylindrical arc-length, follows the path through
+             limit points and snap-through
+"""
+
+import numpy as np
+from scipy import sparse
+
+from solver import (Factorization, TrussResult, TrussSolver,
+                    UnstableStructureError, geometric_blocks)
+
+# Residual norm relative to the applied load that counts as converged
+TOLERANCE = 1e-8
+# A correction this small relative to the displacements is round-off, also converged
+CORRECTION = 1e-12
+# Newton iterations before a step is cut in half
+MAX_ITERATIONS = 30
+# Iterations the arc-length aims for, the arc grows or shrinks to get them
+DESIRED_ITERATIONS = 5
+
+
+class ConvergenceError(Exception):
+    """Raised when the equilibrium iterations do not converge"""
+
+
+class NonlinearResult:
+    """
+    Converged points of the load path, all in the units of the model.
+
+    load_factors  : (points,) fraction of the loads carried
+    displacements : (ndofs, points)
+    bar_forces    : (members, points), tension positive
+    result        : TrussResult of the last point
+    """
+
+    def __init__(self, load_factors, displacements, bar_forces, result):
+        self.load_factors = load_factors
+        self.displacements = displacements
+        self.bar_forces = bar_forces
+        self.result = result
+
+
+class NonlinearSolver:
+    """
+    modified : keep the tangent factor within a load step (newton) and only
+               refactor when an iteration reduces the residual by less than
+               half, or for a whole increment (arc_length)
+    """
+
+    def __init__(self, model, sparse=None, modified=False):
+        self.model = model
+        self.modified = modified
+        model.check_determinate()
+
+        linear = TrussSolver(model, sparse)
+        linear.assemble()
+        self.linear = linear
+        self.free_dofs = linear.free_dofs
+        self.restrained = linear.remove_indices
+        self.member_dofs = linear.member_dofs
+        self.vectors = model.nodes[model.elements[:, 1]-1] - \
+            model.nodes[model.elements[:, 0]-1]
+        self.factorizations = 0
+
+        # entries of the member blocks that land in K_ff, from the dof partition of assembly
+        self._keep = linear._ff
+        self._rows = linear._ff_rows
+        self._cols = linear._ff_cols
+
+    def state(self, displacements):
+        """current length, b = {-e e} and axial force of every member, and the internal forces"""
+        d = self.model.dimensions
+        ends = displacements[self.member_dofs]
+        stretch = ends[:, d:] - ends[:, :d]
+        current = self.vectors + stretch
+        lengths = np.sqrt(np.einsum('ij,ij->i', current, current))
+        if (lengths == 0).any():
+            raise ConvergenceError('A member has collapsed to zero length')
+        e = current/lengths[:, None]
+        b = np.column_stack((-e, e))
+        # l - L as (l^2 - L^2)/(l + L), a small elongation is not lost to round-off
+        elongation = ((2*self.vectors + stretch)*stretch).sum(axis=1) / \
+            (lengths + self.linear.lengths)
+        N = self.linear.Ck*elongation
+        internal = np.bincount(self.member_dofs.ravel(), (N[:, None]*b).ravel(),
+                               minlength=self.model.ndofs)
+        return lengths, b, N, internal
+
+    def tangent(self, lengths, b, N):
+        """factor of the tangent stiffness of the free dofs"""
+        k = self.linear.Ck[:, None, None]*b[:, :, None]*b[:, None, :] + \
+            geometric_blocks(b[:, self.model.dimensions:], N/lengths)
+        values = k.ravel()[self._keep]
+
+        size = len(self.free_dofs)
+        if self.linear.sparse:
+            K = sparse.coo_matrix((values, (self._rows, self._cols)),
+                                  shape=(size, size)).tocsc()
+        else:
+            K = np.zeros((size, size))
+            np.add.at(K, (self._rows, self._cols), values)
+        self.factorizations += 1
+        return Factorization(K)
+
+    def loads(self, loads):
+        return np.asarray(self.model.loads if loads is None else loads,
+                          dtype=float).reshape(-1)
+
+    def newton(self, loads=None, steps=10, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+               max_cuts=8):
+        """load control in steps equal load increments, a step that does not converge is halved"""
+        F = self.loads(loads)
+        scale = max(np.linalg.norm(F[self.free_dofs]), np.finfo(float).tiny)
+        u = np.zeros(self.model.ndofs)
+        factors, points, forces = [0.0], [u.copy()], [np.zeros(len(self.model))]
+
+        factor, increment, cuts = 0.0, 1.0/steps, 0
+        while factor < 1 - 1e-12:
+            target = min(factor + increment, 1.0)
+            try:
+                u_new, N = self._equilibrium(
+                    u, target*F, tolerance*scale, max_iterations)
+            except (ConvergenceError, UnstableStructureError) as e:
+                cuts += 1
+                if cuts > max_cuts:
+                    raise ConvergenceError(
+                        f'No equilibrium beyond {factor:.4g} of the load ({e}), try arc_length')
+                increment /= 2
+                continue
+            u, factor = u_new, target
+            factors.append(factor)
+            points.append(u.copy())
+            forces.append(N)
+        return self._result(F, factors, points, forces)
+
+    def _equilibrium(self, u, F, tolerance, max_iterations):
+        u = u.copy()
+        free = self.free_dofs
+        lengths, b, N, internal = self.state(u)
+        tangent = None
+        previous = np.inf
+        for _ in range(max_iterations):
+            residual = (F - internal)[free]
+            norm = np.linalg.norm(residual)
+            if norm <= tolerance:
+                return u, N
+            if tangent is None or not self.modified or norm > previous/2:
+                tangent = self.tangent(lengths, b, N)
+            previous = norm
+            correction = tangent.solve(residual)
+            u[free] += correction
+            lengths, b, N, internal = self.state(u)
+            if np.linalg.norm(correction) <= CORRECTION*np.linalg.norm(u[free]):
+                return u, N
+        raise ConvergenceError(f'Residual {norm:.3g} after {max_iterations} iterations')
+
+    def arc_length(self, loads=None, max_factor=1.0, steps=20, arc=None, max_steps=500,
+                   tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+        """
+        Follow the load path until max_factor of the loads is carried (or
+        max_steps points). arc is the first increment, by default the one a
+        linear analysis needs for max_factor/steps of the load.
+        """
+        F = self.loads(loads)
+        free = self.free_dofs
+        F_free = F[free]
+        if not F_free.any():
+            raise ValueError('Arc-length needs a load on a free dof to follow')
+        scale = np.linalg.norm(F_free)
+        u = np.zeros(self.model.ndofs)
+        factor = 0.0
+        factors, points, forces = [0.0], [u.copy()], [np.zeros(len(self.model))]
+
+        lengths, b, N, internal = self.state(u)
+        if arc is None:
+            linear = self.tangent(lengths, b, N).solve(F_free)
+            arc = max_factor/steps*np.linalg.norm(linear)
+        previous = None
+
+        for _ in range(max_steps):
+            try:
+                du, dfactor, iterations = self._arc_step(
+                    u, factor, F, arc, previous, tolerance*scale, max_iterations)
+            except (ConvergenceError, UnstableStructureError):
+                arc /= 2
+                if arc < 1e-12*max(np.abs(u).max(), 1.0):
+                    raise ConvergenceError(
+                        f'Arc-length stalled at {factor:.4g} of the load')
+                continue
+
+            if factor + dfactor > max_factor and factor < max_factor:
+                # land exactly on max_factor by load control from here
+                u = u.copy()
+                u[free] += du*(max_factor - factor)/dfactor
+                u, N = self._equilibrium(u, max_factor*F, tolerance*scale, max_iterations)
+                factors.append(max_factor)
+                points.append(u.copy())
+                forces.append(N)
+                break
+
+            u = u.copy()
+            u[free] += du
+            factor += dfactor
+            previous = du
+            lengths, b, N, internal = self.state(u)
+            factors.append(factor)
+            points.append(u.copy())
+            forces.append(N)
+            arc *= np.clip(np.sqrt(DESIRED_ITERATIONS/max(iterations, 1)), 0.5, 2.0)
+        return self._result(F, factors, points, forces)
+
+    def _arc_step(self, u, factor, F, arc, previous, tolerance, max_iterations):
+        """one converged increment (du of free dofs, load factor increment, iterations)"""
+        free = self.free_dofs
+        F_free = F[free]
+        lengths, b, N, internal = self.state(u)
+        tangent = self.tangent(lengths, b, N)
+        uF = tangent.solve(F_free)
+
+        # forward along the path, the way the previous increment went
+        direction = 1.0 if previous is None or previous.dot(uF) >= 0 else -1.0
+        dfactor = direction*arc/np.linalg.norm(uF)
+        du = dfactor*uF
+
+        trial = u.copy()
+        for iteration in range(1, max_iterations+1):
+            trial[free] = u[free] + du
+            lengths, b, N, internal = self.state(trial)
+            residual = (factor + dfactor)*F_free - internal[free]
+            if np.linalg.norm(residual) <= tolerance:
+                return du, dfactor, iteration
+
+            if iteration > 1 and not self.modified:
+                tangent = self.tangent(lengths, b, N)
+            solved = tangent.solve(np.column_stack((residual, F_free)))
+            uR, uF = solved[:, 0], solved[:, 1]
+
+            # |du + uR + dl*uF| = arc
+            base = du + uR
+            a = uF.dot(uF)
+            b_ = 2*uF.dot(base)
+            c = base.dot(base) - arc**2
+            discriminant = b_**2 - 4*a*c
+            if discriminant < 0:
+                raise ConvergenceError('No point on the arc')
+            roots = (-b_ + np.array([1, -1])*np.sqrt(discriminant))/(2*a)
+            # the root that turns the increment the least
+            dl = roots[np.argmax([(base + r*uF).dot(du) for r in roots])]
+            correction = base + dl*uF - du
+            du = base + dl*uF
+            dfactor += dl
+            if np.linalg.norm(correction) <= CORRECTION*np.linalg.norm(u[free] + du):
+                trial[free] = u[free] + du
+                return du, dfactor, iteration
+        raise ConvergenceError(f'No convergence in {max_iterations} iterations')
+
+    def solve_columns(self, loads, steps=10):
+        """
+        TrussResult with a column for every column of loads (ndofs, columns),
+        each one followed on its own by newton, nothing superposes here
+        """
+        model = self.model
+        loads = np.asarray(loads, dtype=float).reshape(model.ndofs, -1)
+        results = [self.newton(loads[:, i], steps=steps).result
+                   for i in range(loads.shape[1])]
+        if not results:
+            return TrussResult(np.zeros((model.ndofs, 0)), np.zeros((len(model), 0)),
+                               np.zeros((len(model), 0)), np.zeros((len(self.restrained), 0)))
+        return TrussResult(*(np.column_stack([getattr(r, name) for r in results])
+                             for name in ('displacements', 'bar_forces', 'stresses', 'reactions')))
+
+    def _result(self, F, factors, points, forces):
+        displacements = np.column_stack(points)
+        bar_forces = np.column_stack(forces)
+        u = displacements[:, -1]
+        internal = self.state(u)[3]
+        reactions = internal[self.restrained] - factors[-1]*F[self.restrained]
+        result = TrussResult(u, bar_forces[:, -1],
+                             bar_forces[:, -1]/self.model.properties[:, 1], reactions)
+        return NonlinearResult(np.array(factors), displacements, bar_forces, result)
+
@@ -0,0 +1,212 @@
+"""
+GPL-3.0 License
+
+Copyright (C) 2020-2022 Monirul Shawon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Parametric sweeps over one base project.
+
+Every variant has the members, supports and loads of the base project, only
+these parameters change, all in the units of the project tables:
+
+    E, A        E or A of every property row
+    E2, A2      E or A of property row 2 only
+    span        nodes stretched horizontally to this overall width
+    height      nodes stretched vertically to this overall height
+
+Variants are solved in chunks on a process pool. A worker keeps one
+TrussSolver, so the dof maps are built once and variants that only change E
+and A reuse the assembled member geometry (see TrussSolver.set_model).
+Geometry parameters vary slowest for the same reason.
+"""
+
+import itertools
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import loadcases
+from solver import TrussModel, TrussSolver, UnstableStructureError
+
+PARAMETER = re.compile(r'^(?:([EA])(\d*)|span|height)$')
+GEOMETRY = ('span', 'height')
+
+# per variant, values in the units shown by the GUI, volume is sum(A*L) in
+# mm^3 or in^3
+SUMMARY = ['status', 'max_displacement', 'max_tension',
+           'max_compression', 'max_stress', 'volume']
+
+
+def check_parameters(names):
+    for name in names:
+        if not PARAMETER.match(name):
+            raise ValueError(
+                f'Unknown parameter {name!r}, use E, A, E<row>, A<row>, span or height')
+
+
+def grid(values):
+    """{name: [values]} -> (variants, parameters) every combination of them"""
+    names = list(values)
+    samples = np.array(list(itertools.product(
+        *(np.asarray(values[name], dtype=float).reshape(-1) for name in names))))
+    return names, samples.reshape(-1, len(names))
+
+
+def latin_hypercube(bounds, count, seed=None):
+    """
+    {name: (low, high)} -> (count, parameters), every parameter has exactly
+    one sample in each of count equal slices of its range
+    """
+    rng = np.random.default_rng(seed)
+    names = list(bounds)
+    samples = np.empty((count, len(names)))
+    for i, name in enumerate(names):
+        low, high = bounds[name]
+        strata = rng.permutation(count) + rng.random(count)
+        samples[:, i] = low + strata/count*(high - low)
+    return names, samples
+
+
+class Variants:
+    """base project and the parameters that change, solves any rows of samples"""
+
+    def __init__(self, project, names):
+        check_parameters(names)
+        for name in names:
+            row = PARAMETER.match(name).group(2)
+            if row and not 1 <= int(row) <= len(project.properties):
+                raise ValueError(f'{name} : there is no property row {row}')
+        self.names = list(names)
+        self.factors = project.factors()
+        self.base = project.to_model()
+        self.member_property = project.member_property - 1 if len(project.properties) > 1 \
+            else np.zeros(len(self.base), dtype=int)
+        self.properties = project.properties.astype(float)
+        self.case_loads = project.case_loads()
+        matrix = loadcases.combination_matrix(project.cases, project.combinations)
+        # envelope over the combinations, or the cases if there are none
+        self.matrix = matrix if len(matrix) else np.eye(len(project.cases))
+        self.extent = np.ptp(self.base.nodes, axis=0) if len(self.base.nodes) \
+            else np.zeros(2)
+        self.solver = None
+
+    def model(self, values):
+        """TrussModel of one variant, values in the order of names"""
+        properties = self.properties.copy()
+        nodes = self.base.nodes
+        for name, value in zip(self.names, values):
+            if name in GEOMETRY:
+                axis = GEOMETRY.index(name)
+                if self.extent[axis] == 0:
+                    raise ValueError(f'Cannot stretch a truss with no {name}')
+                nodes = nodes.copy() if nodes is self.base.nodes else nodes
+                low = nodes[:, axis].min()
+                nodes[:, axis] = low + (nodes[:, axis] - low) * \
+                    value*self.factors['unit_node']/self.extent[axis]
+            else:
+                column, row = PARAMETER.match(name).groups()
+                column = 'EA'.index(column)
+                if row:
+                    properties[int(row)-1, column] = value
+                else:
+                    properties[:, column] = value
+        return TrussModel(nodes, self.base.elements, properties[self.member_property],
+                          self.base.restrained_dofs, self.base.loads)
+
+    def run(self, samples):
+        """
+        columns of SUMMARY for every row of samples, plus the envelope of
+        every member as (variants, members) max_force / min_force
+        """
+        count, members = len(samples), len(self.base)
+        columns = {name: np.full(count, np.nan) for name in SUMMARY}
+        columns['status'] = np.full(count, 'stable', dtype=object)
+        max_force = np.full((count, members), np.nan)
+        min_force = np.full((count, members), np.nan)
+        force_scale = self.factors['displacement_unit'] * \
+            self.factors['bar_force_unit']
+
+        for i, values in enumerate(samples):
+            try:
+                model = self.model(values)
+                if self.solver is None:
+                    self.solver = TrussSolver(model)
+                else:
+                    self.solver.set_model(model)
+                result = self.solver.solve_cases(self.case_loads)
+            except (UnstableStructureError, ValueError) as e:
+                columns['status'][i] = 'unstable' if isinstance(
+                    e, UnstableStructureError) else 'error'
+                continue
+
+            forces = result.bar_forces.dot(self.matrix.T)*force_scale
+            displacements = result.displacements.dot(self.matrix.T)
+            max_force[i] = forces.max(axis=1)
+            min_force[i] = forces.min(axis=1)
+            columns['max_displacement'][i] = np.abs(
+                displacements).max()*self.factors['displacement_unit']
+            columns['max_tension'][i] = max_force[i].max()
+            columns['max_compression'][i] = min_force[i].min()
+            columns['max_stress'][i] = (np.abs(forces)/model.properties[:, 1:]).max() * \
+                self.factors['stress_unit']
+            columns['volume'][i] = model.properties[:, 1].dot(
+                self.solver.lengths)*self.factors['volume_unit']
+        return columns, max_force, min_force
+
+
+_variants = None
+
+
+def _start_worker(project, names):
+    global _variants
+    _variants = Variants(project, names)
+
+
+def _run_chunk(chunk):
+    indices, samples = chunk
+    return (indices, samples) + _variants.run(samples)
+
+
+def run(project, names, samples, jobs=0, chunksize=None):
+    """
+    Solve every row of samples, yields (variant indices, samples, columns,
+    max_force, min_force) chunk by chunk, in the order of the chunks (geometry
+    slowest, not the order of samples), so a large sweep never has to be held
+    in memory at once.
+    """
+    check_parameters(names)
+    samples = np.asarray(samples, dtype=float).reshape(-1, len(names))
+    # geometry varies slowest so consecutive variants share it
+    geometry = [i for i, name in enumerate(names) if name in GEOMETRY]
+    order = np.lexsort(samples[:, geometry[::-1]].T) if geometry \
+        else np.arange(len(samples))
+
+    jobs = jobs or os.cpu_count() or 1
+    chunksize = chunksize or max(1, -(-len(samples)//(jobs*4)))
+    chunks = [(order[i:i+chunksize], samples[order[i:i+chunksize]])
+              for i in range(0, len(samples), chunksize)]
+
+    if jobs == 1:
+        _start_worker(project, names)
+        yield from map(_run_chunk, chunks)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_start_worker,
+                             initargs=(project, names)) as executor:
+        yield from executor.map(_run_chunk, chunks)
@@ -0,0 +1,245 @@
+"""
+GPL-3.0 License
+
+Copyright (C) 2020-2022 Monirul Shawon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Automatic member sizing, the areas change and everything else stays.
+
+Both methods keep one TrussSolver. New areas only refill K from the member
+geometry it already has (TrussSolver.set_model) and a few changed members
+update the factor instead of refactoring it.
+
+fully_stressed     every member is resized until it reaches its allowable
+                   stress under the worst load column
+minimum_weight     the lightest truss that also keeps the displacements
+                   within a limit, an optimality criteria update driven by
+                   adjoint sensitivities (one extra solve per iteration)
+
+Everything is in the units of the model, loads is (ndofs, columns) and a
+member is sized for the worst of them.
+"""
+
+import numpy as np
+
+from solver import TrussModel, TrussSolver
+
+# Areas may grow or shrink by at most this factor in one minimum_weight iteration
+MOVE_LIMIT = 2.0
+# Sharpness of the weights that spread the displacement limit over the largest ones
+AGGREGATION = 100.0
+
+
+class SizingResult:
+    """
+    areas      : final area of every member
+    weight     : sum of weights*areas
+    iterations : analyses done
+    converged  : False if it stopped at the iteration limit
+    result     : TrussResult of the final areas, a column per load column
+    history    : weight after every iteration
+    """
+
+    def __init__(self, areas, weight, iterations, converged, result, history):
+        self.areas = areas
+        self.weight = weight
+        self.iterations = iterations
+        self.converged = converged
+        self.result = result
+        self.history = history
+
+
+class Sizing:
+    """
+    tension, compression : allowable stress, compression defaults to tension
+    area_min, area_max   : bounds of every area
+    weights              : weight of a unit area of every member, the
+                           lengths (volume) if not given
+    """
+
+    def __init__(self, model, tension, compression=None, loads=None,
+                 area_min=1e-6, area_max=np.inf, weights=None):
+        if tension <= 0 or (compression is not None and compression <= 0):
+            raise ValueError('Allowable stresses must be positive')
+        if area_min <= 0 or area_max < area_min:
+            raise ValueError('Area bounds must be 0 < min <= max')
+        self.model = model
+        self.tension = tension
+        self.compression = tension if compression is None else compression
+        self.loads = np.asarray(model.loads if loads is None else loads,
+                                dtype=float).reshape(model.ndofs, -1)
+        self.area_min = area_min
+        self.area_max = area_max
+        self.solver = TrussSolver(model)
+        self.solver.assemble()
+        self.weights = self.solver.lengths if weights is None else np.asarray(
+            weights, dtype=float)
+
+    def analyse(self, areas):
+        """TrussResult of every load column with these areas"""
+        model = self.model
+        self.solver.set_model(TrussModel(
+            model.nodes, model.elements, np.column_stack(
+                (model.properties[:, 0], areas)),
+            model.restrained_dofs, model.loads))
+        return self.solver.solve_cases(self.loads)
+
+    def stress_areas(self, bar_forces):
+        """smallest areas that keep every member within its allowable stress"""
+        tension = np.maximum(bar_forces.max(axis=1), 0)/self.tension
+        compression = np.maximum(-bar_forces.min(axis=1), 0)/self.compression
+        return np.clip(np.maximum(tension, compression), self.area_min, self.area_max)
+
+    def fully_stressed(self, areas=None, iterations=100, tolerance=1e-6):
+        """
+        resize to the stress areas until no area changes by more than
+        tolerance (relative), one analysis per iteration
+        """
+        areas = self._start(areas)
+        history = []
+        converged = False
+        for iteration in range(1, iterations+1):
+            result = self.analyse(areas)
+            new = self.stress_areas(result.bar_forces)
+            change = np.max(np.abs(new - areas)/areas) if len(areas) else 0
+            areas = new
+            history.append(self.weights.dot(areas))
+            if change <= tolerance:
+                converged = True
+                break
+        return self._finish(areas, iteration, converged, history)
+
+    def minimum_weight(self, displacement_limit, dofs=None, areas=None, iterations=200,
+                       tolerance=1e-6, exponent=0.5):
+        """
+        Lightest areas with every stress allowed and |displacement| <= limit
+        at dofs (0-based, every free dof if not given) for every load column.
+
+        Stress limits are side constraints (the stress areas are the lower
+        bound of every area). The governing displacement is kept on its limit
+        by an optimality criteria update, its gradient comes from an adjoint
+        solve with the factor already there:
+
+            d u_j / d A_e = -(E/L) (g_e.lambda) (g_e.u),   K lambda = e_j
+        """
+        if displacement_limit <= 0:
+            raise ValueError('Displacement limit must be positive')
+        dofs = self.solver.free_dofs if dofs is None else np.asarray(dofs, dtype=int)
+        areas = self._start(areas)
+        history = []
+        converged = False
+        weight = np.inf
+        move = MOVE_LIMIT
+        violation = np.inf
+
+        for iteration in range(1, iterations+1):
+            result = self.analyse(areas)
+            lower = self.stress_areas(result.bar_forces)
+
+            # every displacement weighted by how close it is to governing, a
+            # single governing dof would switch back and forth between iterations
+            ratio = np.abs(result.displacements[dofs])/displacement_limit
+            value = ratio.max()
+            share = np.exp(AGGREGATION*(ratio - value))
+            share /= share.sum()
+            sensitivity = self.displacement_sensitivity(
+                result.displacements, dofs, share, areas)/displacement_limit
+
+            # the approximation overshot, take smaller steps from now on
+            if value - 1 > 0 and value - 1 >= violation:
+                move = 1 + (move - 1)/2
+            violation = value - 1
+
+            new = self._resize(areas, lower, violation,
+                               sensitivity, exponent, move)
+            change = np.max(np.abs(new - areas)/areas) if len(areas) else 0
+            previous, weight = weight, self.weights.dot(new)
+            areas = new
+            history.append(weight)
+            if change <= tolerance or (value <= 1 + tolerance and
+                                       abs(previous - weight) <= tolerance*weight):
+                converged = True
+                break
+        return self._finish(areas, iteration, converged, history)
+
+    def displacement_sensitivity(self, displacements, dofs, share, areas):
+        """
+        d(sum(share*|u[dofs]|))/dA of every member by the adjoint method,
+        displacements (ndofs, columns) and share (dofs, columns). One adjoint
+        load per load column, all of them solved together.
+        """
+        solver = self.solver
+        free = solver.free_dofs
+        position = np.searchsorted(free, dofs)
+        if (position == len(free)).any() or (free[np.minimum(position, len(free)-1)] != dofs).any():
+            raise ValueError('Displacement limits can only be on free dofs')
+
+        adjoint_loads = np.zeros((len(free), displacements.shape[1]))
+        np.add.at(adjoint_loads, position,
+                  share*np.where(displacements[dofs] < 0, -1.0, 1.0))
+        adjoint = solver.solve_free(adjoint_loads)
+
+        T = solver.force_operator()
+        # T.x = Ck*(g.x), so (E/L)(g.lambda)(g.u) = (T.lambda)(T.u)/(Ck*A)
+        return -(T.dot(adjoint)*T.dot(displacements[free])).sum(axis=1)/(solver.Ck*areas)
+
+    def _resize(self, areas, lower, violation, sensitivity, exponent, move=MOVE_LIMIT):
+        """
+        A*(-Lambda*dg/dA / w)**exponent within the move limits and bounds,
+        Lambda found by bisection so that the reciprocal approximation of the
+        constraint is just met
+        """
+        upper = np.minimum(areas*move, self.area_max)
+        low = np.minimum(np.maximum(areas/move, lower), upper)
+        # only members that stiffen the governing displacement are worth growing
+        active = sensitivity < 0
+        scale = np.where(active, -sensitivity/self.weights, 0)
+
+        def resized(multiplier):
+            return np.clip(areas*(multiplier*scale)**exponent, low, upper)
+
+        def predicted(new):
+            # g(A_new) ~ g(A) + sum(-dg/dA*A^2*(1/A_new - 1/A))
+            return violation + np.sum(-sensitivity*areas**2*(1/new - 1/areas))
+
+        if not active.any():
+            return low
+        # predicted falls as the multiplier (and every area) grows
+        small, large = 1e-30, 1e30
+        if predicted(resized(small)) <= 0:
+            return resized(small)
+        if predicted(resized(large)) > 0:
+            return resized(large)
+        for _ in range(200):
+            middle = np.sqrt(small*large)
+            if predicted(resized(middle)) > 0:
+                small = middle
+            else:
+                large = middle
+            if large <= small*(1 + 1e-12):
+                break
+        return resized(large)
+
+    def _start(self, areas):
+        if areas is None:
+            areas = self.model.properties[:, 1]
+        return np.clip(np.asarray(areas, dtype=float), self.area_min, self.area_max)
+
+    def _finish(self, areas, iterations, converged, history):
+        result = self.analyse(areas)
+        return SizingResult(areas, self.weights.dot(areas), iterations, converged,
+                            result, np.array(history))
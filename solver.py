@@ -0,0 +1,820 @@
+"""
+GPL-3.0 License
+
+Copyright (C) 2020-2022 Monirul Shawon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+##############################################################
+#                                                            #
+#          Headless Matrix Displacement Method solver        #
+#       No Qt, no matplotlib. Only numbers in, numbers out   #
+#                                                            #
+##############################################################
+"""
+
+import numpy as np
+from scipy import sparse
+from scipy.linalg import (LinAlgError, cho_factor, cho_solve, eigh, lu_factor,
+                          lu_solve)
+from scipy.sparse.linalg import ArpackNoConvergence, LinearOperator, eigsh, splu
+
+# Above this many degrees of freedom K is assembled and solved as a sparse matrix
+SPARSE_THRESHOLD = 500
+# Pivots smaller than this (relative to the largest one) mean a singular K
+PIVOT_TOLERANCE = 1e-12
+# float32 cannot resolve PIVOT_TOLERANCE, pivots within this many of its eps are zero
+PIVOT_EPS = 100
+# Property edits of up to this many members update the factor instead of refactoring
+LOW_RANK_LIMIT = 16
+# Refinement steps a float32 factor gets before K is refactorized in float64
+REFINEMENTS = 30
+# Mechanisms looked for at first when K is singular, doubled while all of them are found
+MECHANISM_MODES = 6
+# Mechanisms found at most, a truss with more is reported as having at least this many
+MAX_MECHANISMS = 96
+# A dof moves in a mechanism when it moves more than this relative to the dof moving most
+MECHANISM_PARTICIPATION = 1e-6
+# Nodes named in the message of an unstable structure
+MESSAGE_NODES = 10
+
+
+class UnstableStructureError(Exception):
+    """
+    Raised when the stiffness matrix cannot be solved. When the mechanisms
+    were found, dofs are the 0-based dofs that move without resistance and
+    mechanisms their mode shapes (ndofs, mechanisms).
+    """
+
+    def __init__(self, message, dofs=None, mechanisms=None):
+        super(UnstableStructureError, self).__init__(message)
+        self.dofs = dofs
+        self.mechanisms = mechanisms
+
+
+def singular_tolerance(dtype):
+    """pivots or eigenvalues of K at most this relative to the largest are zero"""
+    return max(PIVOT_TOLERANCE, PIVOT_EPS*np.finfo(dtype).eps)
+
+
+def todense(matrix):
+    """dense ndarray of a stiffness matrix, used by report tables"""
+    if sparse.issparse(matrix):
+        return matrix.toarray()
+    return matrix
+
+
+def geometric_blocks(directions, axial):
+    """
+    geometric stiffness of every member (2d x 2d in d dimensions),
+    axial*[[G -G] [-G G]] with G = I - e.e^T for the unit direction e and
+    axial = N/L
+    """
+    dimensions = directions.shape[1]
+    G = np.eye(dimensions) - directions[:, :, None]*directions[:, None, :]
+    signs = np.kron(np.array([[1, -1], [-1, 1]]), np.ones((dimensions, dimensions)))
+    return axial[:, None, None]*signs*np.tile(G, (1, 2, 2))
+
+
+def mass_block(dimensions, lumped=False):
+    """
+    member mass matrix as a fraction of the member mass, (from dofs, to dofs),
+    half of it on each end when lumped
+    """
+    ends = np.eye(2)/2 if lumped else np.array([[2, 1], [1, 2]])/6
+    return np.kron(ends, np.eye(dimensions))
+
+
+class Factorization:
+    """
+    Factor a constrained stiffness matrix once and solve for as many
+    right-hand sides as needed by back-substitution.
+    Cholesky for SPD matrices, LU when the matrix is not SPD.
+
+    definite : K can only be SPD or singular (a linear stiffness matrix), a
+               failed Cholesky is a singular K, LU is not tried. Partial
+               pivoting can leave every pivot of a mechanism well above zero.
+    """
+
+    def __init__(self, K, definite=False):
+        self.dtype = K.dtype
+        self.definite = definite
+        if sparse.issparse(K):
+            self._sparse(sparse.csc_matrix(K))
+        else:
+            self._dense(np.asarray(K))
+
+    def _dense(self, K):
+        try:
+            c = cho_factor(K)
+            self.method = 'cholesky'
+            # the factor holds the square roots of the pivots
+            pivots = np.diag(c[0])**2
+            self._solve = lambda b: cho_solve(c, b)
+        except LinAlgError:
+            if self.definite:
+                raise UnstableStructureError('Stiffness matrix is not positive definite')
+            lu = lu_factor(K, check_finite=False)
+            self.method = 'lu'
+            pivots = np.diag(lu[0])
+            self._solve = lambda b: lu_solve(lu, b)
+        self._check(pivots)
+
+    def _sparse(self, K):
+        try:
+            # no pivoting on a symmetric ordering is a Cholesky-like LDL^T for SPD K
+            lu = splu(K, permc_spec='MMD_AT_PLUS_A', diag_pivot_thresh=0.,
+                      options=dict(SymmetricMode=True))
+            pivots = lu.U.diagonal()
+            if np.any(pivots <= 0):
+                raise RuntimeError('Matrix is not positive definite')
+            self.method = 'cholesky'
+        except RuntimeError as e:
+            if self.definite:
+                raise UnstableStructureError(str(e))
+            try:
+                lu = splu(K)
+            except RuntimeError as e:
+                raise UnstableStructureError(str(e))
+            pivots = lu.U.diagonal()
+            self.method = 'lu'
+        self._solve = lu.solve
+        self._check(pivots)
+
+    def _check(self, pivots):
+        pivots = np.abs(pivots)
+        if len(pivots) and pivots.min() <= singular_tolerance(pivots.dtype)*pivots.max():
+            raise UnstableStructureError(
+                'Stiffness matrix is singular (zero pivot)')
+
+    def solve(self, F):
+        """F can be one load vector or a (dofs, cases) matrix of them"""
+        return self._solve(np.asarray(F, dtype=self.dtype))
+
+
+class LowRankUpdate:
+    """
+    Factor of K + U.C.U^T built from the factor of K (Sherman-Morrison-Woodbury).
+    Used when E or A of a few members changed, U holds their {-c -s c s}
+    columns and C their change in EA/L.
+    """
+
+    def __init__(self, factor, U, C):
+        self.factor = factor
+        self.dtype = factor.dtype
+        self.method = f'{factor.method}+woodbury'
+        self.U = U
+        self.C = C
+        self.Z = factor.solve(U.toarray())
+
+        M = np.eye(len(C)) + C[:, None]*U.T.dot(self.Z)
+        self.lu = lu_factor(M, check_finite=False)
+        # M is I when nothing changes, a pivot near 0 next to 1 is a member that
+        # held a mechanism and has lost its stiffness
+        Factorization._check(self, np.append(np.diag(self.lu[0]), 1.0))
+
+    def solve(self, F):
+        x = self.factor.solve(F)
+        CUx = (self.C*self.U.T.dot(x).T).T
+        return x - self.Z.dot(lu_solve(self.lu, CUx))
+
+
+class TrussModel:
+    """
+    Geometry, properties, supports and loads of a plane or a space truss.
+
+    nodes      : (x, y) of every node, node 1 is nodes[0], or (x, y, z) for
+                 a space truss with 3 dofs per node
+    elements   : (from node, to node) of every member, 1-based node numbers
+    properties : (E, A) of every member
+    supports   : restrained degrees of freedom, 1-based (2*node-1, 2*node),
+                 (3*node-2, 3*node-1, 3*node) in space
+    loads      : (Fx, Fy) or (Fx, Fy, Fz) of every node, zeros if not given
+    masses     : mass per unit length of every member (density*A), only
+                 needed for vibrations, zeros if not given
+    """
+
+    def __init__(self, nodes, elements, properties, supports, loads=None, masses=None):
+        # arrays are used as they are (memory mapped ones included) when the dtype fits
+        nodes = np.asarray(nodes, dtype=float)
+        self.dimensions = nodes.shape[1] if nodes.ndim == 2 and nodes.shape[1] == 3 else 2
+        self.nodes = nodes.reshape(-1, self.dimensions)
+        self.elements = np.asarray(elements)
+        if not np.issubdtype(self.elements.dtype, np.integer):
+            self.elements = self.elements.astype(int)
+        self.elements = self.elements.reshape(-1, 2)
+        self.properties = np.array(properties, dtype=float).reshape(-1, 2)
+        self.restrained_dofs = sorted(int(i) for i in supports)
+        self.ndofs = self.dimensions*len(self.nodes)
+
+        if loads is None:
+            self.loads = np.zeros(self.ndofs)
+        else:
+            self.loads = np.array(loads, dtype=float).reshape(-1)
+
+        if masses is None:
+            self.masses = np.zeros(len(self.elements))
+        else:
+            self.masses = np.array(masses, dtype=float).reshape(-1)
+
+        if len(self.properties) != len(self.elements):
+            raise ValueError('Every member needs its own (E, A)')
+        if len(self.loads) != self.ndofs:
+            raise ValueError('Loads must be given for every node')
+        if len(self.masses) != len(self.elements):
+            raise ValueError('Every member needs its own mass')
+        # node 0 or a negative node would index from the end, not fail
+        if len(self.elements) and (self.elements.min() < 1 or self.elements.max() > len(self.nodes)):
+            raise ValueError(f'Members must join nodes 1 to {len(self.nodes)}')
+        if self.restrained_dofs and (self.restrained_dofs[0] < 1 or self.restrained_dofs[-1] > self.ndofs):
+            raise ValueError(f'Supports must restrain dofs 1 to {self.ndofs}')
+
+    def __len__(self):
+        return len(self.elements)
+
+    def topology_key(self):
+        """what the dof maps and the sparsity pattern of K depend on"""
+        return (self.dimensions, len(self.nodes), self.elements.tobytes(),
+                tuple(self.restrained_dofs))
+
+    def geometry_key(self):
+        """everything K depends on except member properties"""
+        return (self.dimensions, self.nodes.tobytes(), self.elements.tobytes(),
+                tuple(self.restrained_dofs))
+
+    def stiffness_key(self):
+        """everything K depends on, loads are not part of it"""
+        return self.geometry_key() + (self.properties.tobytes(),)
+
+    def dofs(self, member):
+        """global degrees of freedom (1-based) of a member, 1-based member number"""
+        d = self.dimensions
+        fromNode, toNode = self.elements[member-1]
+        return np.concatenate((d*(fromNode-1) + np.arange(1, d+1),
+                               d*(toNode-1) + np.arange(1, d+1)))
+
+    @property
+    def free_dofs(self):
+        """unrestrained degrees of freedom, 0-based for indexing purposes"""
+        free = np.ones(self.ndofs, dtype=bool)
+        free[np.array(self.restrained_dofs, dtype=int)-1] = False
+        return np.flatnonzero(free)
+
+    def is_determinate_enough(self):
+        """bar + reaction must not be less than 2*no of joints (3* in space)"""
+        return len(self.elements)+len(self.restrained_dofs) >= self.ndofs
+
+    def check_determinate(self):
+        """raise UnstableStructureError when is_determinate_enough is not"""
+        if not self.is_determinate_enough():
+            raise UnstableStructureError(
+                f'bar : {len(self.elements)} + reaction : {len(self.restrained_dofs)} less than '
+                f'{self.dimensions}*no of joints : {self.ndofs}')
+
+
+class TrussResult:
+    """
+    Output of a linear analysis, all in the units of the model.
+
+    displacements : (ndofs,) every degree of freedom, zero at supports
+    bar_forces    : (members,) tension positive
+    stresses      : (members,) bar_forces / A
+    reactions     : (restrained dofs,) same order as model.restrained_dofs
+
+    Results of several load cases have one more axis, a column per case.
+    Values are never rounded, only what is displayed is.
+    """
+
+    def __init__(self, displacements, bar_forces, stresses, reactions):
+        self.displacements = displacements
+        self.bar_forces = bar_forces
+        self.stresses = stresses
+        self.reactions = reactions
+
+
+class TrussSolver:
+    """
+    sparse : True, False or None to decide from SPARSE_THRESHOLD
+    dtype  : float64, or float32 for very large exploratory models, K_ff
+             and its factor take half the memory (and memory bandwidth).
+             Every float32 solve is refined against the float64 residual
+             (solve_free), results are float64 either way. A K float32
+             cannot factor or refine is refactorized in float64.
+    """
+
+    def __init__(self, model, sparse=None, dtype=np.float64):
+        self.model = model
+        self.dtype = np.dtype(dtype)
+        self.K = None
+        self.factor = None
+        self.auto_sparse = sparse is None
+        if sparse is None:
+            sparse = model.ndofs > SPARSE_THRESHOLD
+        self.sparse = sparse
+
+    def set_model(self, model):
+        """
+        Swap in an edited model and redo only what the edit invalidated.
+        Loads       : K and its factor are kept, only solve again
+        Properties  : K is refilled, a few members update the factor (Woodbury)
+        Coordinates : dof maps are kept, member geometry and K are redone
+        Members or supports : full reassembly and factorization
+        """
+        previous = self.model
+        self.model = model
+        if self.auto_sparse:
+            sparse = model.ndofs > SPARSE_THRESHOLD
+            if sparse != self.sparse:
+                self.sparse = sparse
+                self.K = None
+
+        if self.K is None or previous.topology_key() != model.topology_key():
+            self.K = None
+            self.factor = None
+        elif previous.geometry_key() != model.geometry_key():
+            self.update_geometry()
+        elif not np.array_equal(previous.properties, model.properties):
+            self.update_properties()
+
+    def update_properties(self):
+        """refill K with new E and A, the factor follows by a low-rank update"""
+        model = self.model
+        self.Ck = model.properties[:, 0]*model.properties[:, 1]/self.lengths
+        self._stiffness_matrix()
+
+        changed = np.flatnonzero(self.Ck != self.base_Ck)
+        if self.base_factor is None or len(changed) > LOW_RANK_LIMIT:
+            self.factor = None
+        elif len(changed) == 0:
+            self.factor = self.base_factor
+        else:
+            # columns {-c -s c s} of changed members, only their free dofs
+            U = sparse.csc_matrix(
+                (self.tau[changed].ravel(),
+                 (self.member_dofs[changed].ravel(),
+                  np.repeat(np.arange(len(changed)), self.tau.shape[1]))),
+                shape=(model.ndofs, len(changed)))[self.free_dofs]
+            try:
+                self.factor = LowRankUpdate(
+                    self.base_factor, U, self.Ck[changed]-self.base_Ck[changed])
+            except UnstableStructureError:
+                # refactored by factorize, which also finds the mechanism
+                self.factor = None
+
+    def update_geometry(self):
+        """new node coordinates on the same members and supports, dof maps are kept"""
+        self._member_geometry()
+        self.factor = None
+        self.base_factor = None
+        self.base_Ck = self.Ck
+        return self._stiffness_matrix()
+
+    def assemble(self):
+        """global stiffness matrix K, all members at once"""
+        model = self.model
+        d = model.dimensions
+
+        # (members, 2d) global dofs, 0-based for indexing purposes
+        self.member_dofs = ((model.elements-1)[:, :, None]*d +
+                            np.arange(d)).reshape(len(model), 2*d)
+
+        # 2d x 2d blocks go straight into their rows and columns of K
+        self._rows = np.repeat(self.member_dofs, 2*d, axis=1).ravel()
+        self._cols = np.tile(self.member_dofs, (1, 2*d)).ravel()
+
+        self.free_dofs = model.free_dofs
+        self.remove_indices = np.array(model.restrained_dofs, dtype=int)-1
+
+        # dofs split once into free and restrained, every entry of a member
+        # block knows where it goes in K_ff (solve) and K_rf (reactions)
+        free = np.zeros(model.ndofs, dtype=bool)
+        free[self.free_dofs] = True
+        position = np.zeros(model.ndofs, dtype=int)
+        position[self.free_dofs] = np.arange(len(self.free_dofs))
+        position[self.remove_indices] = np.arange(len(self.remove_indices))
+        free_cols = free[self._cols]
+        self._ff = np.flatnonzero(free[self._rows] & free_cols)
+        self._rf = np.flatnonzero(~free[self._rows] & free_cols)
+        self._ff_rows, self._ff_cols = position[self._rows[self._ff]], position[self._cols[self._ff]]
+        self._rf_rows, self._rf_cols = position[self._rows[self._rf]], position[self._cols[self._rf]]
+
+        return self.update_geometry()
+
+    def _member_geometry(self):
+        """length, direction cosines, EA/L and k_r of every member"""
+        model = self.model
+        elementVector = model.nodes[model.elements[:, 1]-1] - \
+            model.nodes[model.elements[:, 0]-1]
+        self.lengths = np.sqrt(np.einsum('ij,ij->i', elementVector, elementVector))
+        self.directions = elementVector/self.lengths[:, None]
+        self.cosines = self.directions[:, 0]
+        self.sines = self.directions[:, 1]
+        self.Ck = model.properties[:, 0]*model.properties[:, 1]/self.lengths
+
+        # k_r = tau.T.dot([[1, -1], [-1, 1]]).dot(tau) = g.g^T with g = {-c -s c s}
+        # ({-e e} with all three direction cosines in space)
+        self.tau = np.hstack((-self.directions, self.directions))
+        self.k_r = self.tau[:, :, None]*self.tau[:, None, :]
+
+    def _stiffness_matrix(self):
+        """
+        K, constrained K_final (K_ff) and K_rf from the current Ck, the
+        partitions are filled straight from the member blocks, never cut out
+        of K
+        """
+        model = self.model
+        exact = (self.Ck[:, None, None]*self.k_r).ravel()
+        values = exact.astype(self.dtype, copy=False)
+        self._details = None
+        self._report_k = None
+        self._force_operator = None
+        self._K_double = None
+
+        if self.sparse:
+            # duplicate (row, col) entries are summed while converting COO to CSR
+            self.K = sparse.coo_matrix(
+                (values, (self._rows, self._cols)), shape=(model.ndofs, model.ndofs)).tocsr()
+        else:
+            self.K = np.zeros([model.ndofs, model.ndofs], dtype=self.dtype)
+            np.add.at(self.K, (self._rows, self._cols), values)
+        self.K_final = self._free_matrix(values)
+        # only support rows, small and sparse whatever the size of the truss
+        self.K_rf = sparse.coo_matrix(
+            (exact[self._rf], (self._rf_rows, self._rf_cols)),
+            shape=(len(self.remove_indices), len(self.free_dofs))).tocsr()
+
+        return self.K
+
+    @property
+    def details(self):
+        """member table for report, only built when a report is requested"""
+        if self._details is None:
+            model = self.model
+            rows = [['Member', 'From\nNode', 'To\nNode', 'From\nPoint\n(x)', 'From\nPoint\n(y)',
+                     'To\nPoint\n(x)', 'To\nPoint\n(y)', 'Sine', 'Cosine', 'Length', 'E (ksi)', 'Area']]
+            for key, (fromNode, toNode) in enumerate(model.elements.tolist(), start=1):
+                fromPoint = model.nodes[fromNode-1]
+                toPoint = model.nodes[toNode-1]
+                E, A = model.properties[key-1]
+                rows.append([key, fromNode, toNode, f'{fromPoint[0]:.2f}', f'{fromPoint[1]:.2f}', f'{toPoint[0]:.2f}',
+                             f'{toPoint[1]:.2f}', f'{self.sines[key-1]:.2f}', f'{self.cosines[key-1]:.2f}',
+                             f'{self.lengths[key-1]:.2f}', E, A])
+            self._details = np.array(rows, dtype=object)
+        return self._details
+
+    @property
+    def report_k(self):
+        """member stiffness matrices with their dofs for report, at full precision"""
+        if self._report_k is None:
+            self._report_k = {}
+            k_r = (self.Ck[:, None, None]*self.k_r).tolist()
+            for key, dofs in enumerate((self.member_dofs+1).tolist(), start=1):
+                serial = [dofs]
+                for i, j in enumerate(k_r[key-1]):
+                    j.append(dofs[i])
+                    serial.append(j)
+                self._report_k[key] = serial
+        return self._report_k
+
+    def factorize(self):
+        """
+        factor of the constrained K, computed once per stiffness state.
+        A singular K raises UnstableStructureError naming the dofs that move
+        without resistance (see mechanisms).
+        """
+        if self.K is None:
+            self.assemble()
+        if self.factor is None:
+            try:
+                self.model.check_determinate()
+                try:
+                    self.factor = Factorization(self.K_final, definite=True)
+                except UnstableStructureError:
+                    if self.K_final.dtype == np.float64:
+                        raise
+                    # too badly conditioned for float32, float64 may still hold it
+                    self.factor = Factorization(self.double_stiffness(), definite=True)
+            except UnstableStructureError as e:
+                unstable = self._unstable(e)
+                if unstable.mechanisms is not None or not self.model.is_determinate_enough():
+                    raise unstable from None
+                # no mechanism, round-off alone stopped Cholesky
+                self.factor = Factorization(self.double_stiffness())
+            self.base_factor = self.factor
+            self.base_Ck = self.Ck
+        return self.factor
+
+    def double_stiffness(self):
+        """K_ff in float64, K_final itself unless that is float32"""
+        if self.K is None:
+            self.assemble()
+        if self.K_final.dtype == np.float64:
+            return self.K_final
+        if self._K_double is None:
+            self._K_double = self._free_matrix(self.Ck[:, None, None]*self.k_r)
+        return self._K_double
+
+    def solve_free(self, F):
+        """
+        K_ff.x = F for the free dofs, F (free dofs,) or (free dofs, cases).
+
+        A float32 factor is refined against the float64 residual until it is
+        as small as a float64 solve leaves it (|r| <= sqrt(n) eps |K| |x|,
+        the test of LAPACK dsgesv), each step gains about
+        -log10(cond(K)*eps32) digits. When the residual grows instead the
+        factor cannot get there on this K, K is refactorized in float64 and
+        solved again.
+        """
+        factor = self.factorize()
+        x = factor.solve(F).astype(float)
+        if factor.dtype == np.float64 or x.size == 0:
+            return x
+
+        K = self.double_stiffness()
+        limit = np.sqrt(len(x))*np.finfo(float).eps*abs(K).sum(axis=1).max()
+        previous = np.inf
+        for _ in range(REFINEMENTS):
+            residual = F - K.dot(x)
+            size = np.abs(residual).max(axis=0)
+            if (size <= limit*np.abs(x).max(axis=0)).all():
+                return x
+            if not (size < previous).all():
+                break
+            previous = size
+            x += factor.solve(residual).astype(float)
+
+        try:
+            self.factor = Factorization(K, definite=True)
+        except UnstableStructureError as e:
+            raise self._unstable(e) from None
+        self.base_factor = self.factor
+        self.base_Ck = self.Ck
+        return self.factor.solve(F)
+
+    def mechanisms(self):
+        """
+        Ways the supported truss can move without resistance, the null space
+        of the constrained K. Returns the dofs (0-based) that move in any of
+        them and the mode shapes (ndofs, mechanisms) scaled to a largest
+        component of 1, nothing when the truss is stable.
+
+        Dense K is split by eigh into the eigenvalues below the singular
+        tolerance only. Sparse K is shift-inverted around zero: eigsh with a
+        single factorization of K + shift I (always positive definite) finds
+        the eigenvalues nearest zero, a few at a time until one is not zero.
+        """
+        if self.K is None:
+            self.assemble()
+        free = self.free_dofs
+        size = len(free)
+        K = self.K_final.astype(float)
+        scale = np.abs(K.diagonal()).max(initial=0)
+        zero = singular_tolerance(self.dtype)*scale if scale else 1.0
+
+        if size == 0:
+            values, vectors = np.zeros(0), np.zeros((0, 0))
+        elif not sparse.issparse(K) or size <= 2*MECHANISM_MODES:
+            values, vectors = eigh(todense(K), subset_by_value=(-np.inf, zero))
+        else:
+            # the same symmetric ordering Factorization uses, K + shift I needs no pivoting
+            shifted = splu((K + zero*sparse.identity(size)).tocsc(), permc_spec='MMD_AT_PLUS_A',
+                           diag_pivot_thresh=0., options=dict(SymmetricMode=True))
+            inverse = LinearOperator((size, size), matvec=shifted.solve, dtype=float)
+            modes = MECHANISM_MODES
+            while True:
+                try:
+                    values, vectors = eigsh(K, k=modes, sigma=-zero, which='LM', OPinv=inverse)
+                except ArpackNoConvergence as e:
+                    values, vectors = e.eigenvalues, e.eigenvectors
+                if (values > zero).any() or modes >= min(MAX_MECHANISMS, size-2):
+                    break
+                modes = min(2*modes, MAX_MECHANISMS, size-2)
+        vectors = vectors[:, values <= zero][:, :MAX_MECHANISMS]
+
+        # the rows of an orthonormal basis, which dofs move does not depend on the basis
+        movement = np.sqrt((vectors**2).sum(axis=1))
+        dofs = free[movement > MECHANISM_PARTICIPATION*movement.max(initial=0)]
+        largest = vectors[np.abs(vectors).argmax(axis=0), np.arange(vectors.shape[1])]
+        mode_shapes = np.zeros((self.model.ndofs, vectors.shape[1]))
+        mode_shapes[free] = vectors/largest
+        return dofs, mode_shapes
+
+    def _unstable(self, error):
+        """error with the mechanisms of the truss added, as it is if none are found"""
+        dofs, mode_shapes = self.mechanisms()
+        count = mode_shapes.shape[1]
+        if count == 0:
+            return error
+
+        d = self.model.dimensions
+        moving = {}
+        for dof in dofs.tolist():
+            moving.setdefault(dof//d + 1, []).append('xyz'[dof % d])
+        places = ', '.join(f'node {node} ({", ".join(directions)})'
+                           for node, directions in list(moving.items())[:MESSAGE_NODES])
+        if len(moving) > MESSAGE_NODES:
+            places += f' and {len(moving) - MESSAGE_NODES} more nodes'
+        at_least = 'at least ' if count == MAX_MECHANISMS else ''
+        return UnstableStructureError(
+            f'{error}, {at_least}{count} mechanism{"s" if count > 1 else ""} moving {places}',
+            dofs, mode_shapes)
+
+    def solve(self, loads=None):
+        """
+        solve K.D = F, loads is a full (ndofs,) force vector
+        and defaults to the loads of the model
+        """
+        model = self.model
+        self.factorize()
+
+        F = model.loads if loads is None else np.asarray(loads, dtype=float)
+        self.F = F
+        self.F_final = F[self.free_dofs]
+
+        displacements = np.zeros(model.ndofs)
+        displacements[self.free_dofs] = self.solve_free(self.F_final)
+
+        reactions = self.reactions(displacements, F)
+        bar_forces = self.bar_forces(displacements)
+        stresses = bar_forces/model.properties[:, 1]
+
+        return TrussResult(displacements, bar_forces, stresses, reactions)
+
+    def solve_cases(self, loads):
+        """
+        every column of loads (ndofs, cases) is a load case, all of them are
+        solved at once against the one factor. The result has a column per case.
+        """
+        model = self.model
+        self.factorize()
+
+        F = np.asarray(loads, dtype=float).reshape(model.ndofs, -1)
+        displacements = np.zeros(F.shape)
+        if F.shape[1]:
+            displacements[self.free_dofs] = self.solve_free(F[self.free_dofs])
+
+        reactions = self.reactions(displacements, F)
+        bar_forces = self.force_operator().dot(displacements[self.free_dofs])
+        stresses = bar_forces/model.properties[:, 1:]
+
+        return TrussResult(displacements, bar_forces, stresses, reactions)
+
+    def force_operator(self):
+        """
+        sparse (members, free dofs) matrix T, bar_forces = T.dot(D_global)
+        Ck*{-c -s c s} of every member scattered into its own row
+        """
+        if self.K is None:
+            self.assemble()
+        if self._force_operator is None:
+            members = len(self.model)
+            T = sparse.csr_matrix(
+                ((self.Ck[:, None]*self.tau).ravel(),
+                 (np.repeat(np.arange(members), self.tau.shape[1]), self.member_dofs.ravel())),
+                shape=(members, self.model.ndofs))
+            self._force_operator = T[:, self.free_dofs]
+        return self._force_operator
+
+    def influence_lines(self, nodes, load=-1.0, direction=1):
+        """
+        bar forces of every member for a load at every node in nodes,
+        one column per load position, shape (members, len(nodes)).
+        direction 0 is x, 1 is y (and 2 is z), load -1 is a downward unit load.
+        All positions are solved together as one right-hand side matrix.
+        """
+        nodes = np.asarray(nodes, dtype=int).reshape(-1)
+        if len(nodes) == 0:
+            return np.zeros((len(self.model), 0))
+
+        self.factorize()
+
+        F = np.zeros((self.model.ndofs, len(nodes)))
+        d = self.model.dimensions
+        F[d*(nodes-1)+direction, np.arange(len(nodes))] = load
+        D_global = self.solve_free(F[self.free_dofs])
+
+        return self.force_operator().dot(D_global)
+
+    def _free_matrix(self, values):
+        """(members, 2d, 2d) blocks assembled like K, only the free dofs (K_ff)"""
+        size = len(self.free_dofs)
+        values = values.ravel()[self._ff]
+        if self.sparse:
+            return sparse.coo_matrix(
+                (values, (self._ff_rows, self._ff_cols)), shape=(size, size)).tocsc()
+        matrix = np.zeros([size, size], dtype=values.dtype)
+        np.add.at(matrix, (self._ff_rows, self._ff_cols), values)
+        return matrix
+
+    def geometric_stiffness(self, bar_forces):
+        """constrained geometric stiffness K_g of the free dofs for these axial forces"""
+        if self.K is None:
+            self.assemble()
+        return self._free_matrix(geometric_blocks(
+            self.directions, np.asarray(bar_forces, dtype=float)/self.lengths))
+
+    def mass_matrix(self, lumped=False):
+        """
+        constrained mass matrix M of the free dofs from model.masses, half
+        of every member mass on each end node when lumped
+        """
+        if self.K is None:
+            self.assemble()
+        block = mass_block(self.model.dimensions, lumped)
+        return self._free_matrix((self.model.masses*self.lengths)[:, None, None]*block)
+
+    def _largest_modes(self, B, modes):
+        """
+        The largest eigenvalues mu of B phi = mu K phi and their shapes
+        (ndofs, modes) scaled to a largest component of 1, largest first.
+
+        Large models use Lanczos (eigsh) for only those modes with the factor
+        of K as K^-1, nothing else is factorized. Modes with mu <= 0 are
+        dropped, so fewer may come back.
+        """
+        self.factorize()
+        size = len(self.free_dofs)
+        if size == 0 or modes <= 0:
+            return np.zeros(0), np.zeros((self.model.ndofs, 0))
+
+        if self.sparse and modes < size - 1:
+            K_inverse = LinearOperator((size, size), matvec=self.solve_free, dtype=float)
+            try:
+                values, shapes = eigsh(B, k=modes, M=self.double_stiffness(), Minv=K_inverse,
+                                       which='LA')
+            except ArpackNoConvergence as e:
+                # the modes that did converge are still good
+                values, shapes = e.eigenvalues, e.eigenvectors
+        else:
+            values, shapes = eigh(todense(B), todense(self.double_stiffness()))
+            values, shapes = values[::-1][:modes], shapes[:, ::-1][:, :modes]
+
+        keep = values > PIVOT_TOLERANCE*max(np.abs(values).max(initial=0), np.finfo(float).tiny)
+        order = np.argsort(-values[keep])
+        values = values[keep][order]
+
+        shapes = shapes[:, keep][:, order]
+        largest = shapes[np.abs(shapes).argmax(axis=0), np.arange(shapes.shape[1])]
+        mode_shapes = np.zeros((self.model.ndofs, len(values)))
+        mode_shapes[self.free_dofs] = shapes/largest
+        return values, mode_shapes
+
+    def buckling(self, bar_forces, modes=3):
+        """
+        Critical load factors, smallest first, and their mode shapes
+        (ndofs, modes) scaled to a largest component of 1. The loads that
+        gave bar_forces buckle when multiplied by a critical factor.
+
+        (K + factor K_g) phi = 0 is solved as -K_g phi = (1/factor) K phi,
+        the largest 1/factor are the lowest critical loads. Fewer modes come
+        back if the structure has fewer compressed ones.
+        """
+        if self.K is None:
+            self.assemble()
+        inverse, mode_shapes = self._largest_modes(
+            -self.geometric_stiffness(bar_forces), modes)
+        return 1/inverse, mode_shapes
+
+    def natural_frequencies(self, modes=6, lumped=False):
+        """
+        Lowest natural frequencies (cycles per unit time, Hz when the model
+        mass goes with K as in units.py) and their mode shapes (ndofs, modes)
+        scaled to a largest component of 1.
+
+        K phi = omega^2 M phi is solved as M phi = (1/omega^2) K phi with the
+        factor K already has, the largest 1/omega^2 are the lowest modes.
+        Dofs without mass have no mode, fewer may come back.
+        """
+        if self.K is None:
+            self.assemble()
+        inverse, mode_shapes = self._largest_modes(self.mass_matrix(lumped), modes)
+        return 1/np.sqrt(inverse)/(2*np.pi), mode_shapes
+
+    def reactions(self, displacements, F):
+        """K_rf.D_f - F_r, supports do not move"""
+        return self.K_rf.dot(displacements[self.free_dofs]) - F[self.remove_indices]
+
+    def bar_forces(self, displacements):
+        """
+        axial force of every member, tension positive, displacements (ndofs,)
+        or (ndofs, cases). One gather of the end displacements and one batched
+        dot product with {-e e}, all geometry is the one assembly computed.
+        """
+        if self.K is None:
+            self.assemble()
+        ends = np.asarray(displacements, dtype=float)[self.member_dofs]
+        elongations = np.einsum('ij,ij...->i...', self.tau, ends)
+        return (self.Ck*elongations.T).T
@@ -0,0 +1,91 @@
+"""
+GPL-3.0 License
+
+Copyright (C) 2020-2022 Monirul Shawon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+3D view of a space truss with matplotlib, no Qt needed.
+
+Members are drawn as one Line3DCollection however many there are, coloured
+the way the stress graph of the GUI does it: compression crimson, tension
+dodgerblue, stronger for larger forces, unloaded members black.
+"""
+
+import numpy as np
+from matplotlib.colors import to_rgba
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
+
+# Largest displacement drawn as this fraction of the size of the truss
+DEFORMED_FRACTION = 0.05
+
+
+def member_colours(bar_forces):
+    """rgba of every member from its force"""
+    colours = np.tile(to_rgba('k', 0.5), (len(bar_forces), 1))
+    largest = np.abs(bar_forces).max(initial=0)
+    if largest == 0:
+        return colours
+    strength = 0.15 + 0.85*np.abs(bar_forces)/largest
+    for sign, name in ((-1, 'crimson'), (1, 'dodgerblue')):
+        members = np.sign(bar_forces) == sign
+        colours[members] = to_rgba(name)
+        colours[members, 3] = strength[members]
+    return colours
+
+
+def draw(ax, model, result=None, scale=None, supports=True):
+    """
+    Draw model on a 3d axes (projection='3d'). With a result the deformed
+    truss is drawn over the original in grey, displacements magnified by
+    scale (by default the largest one is DEFORMED_FRACTION of the truss).
+    """
+    nodes = np.zeros((len(model.nodes), 3))
+    nodes[:, :model.dimensions] = model.nodes
+    ends = model.elements - 1
+
+    if result is None:
+        ax.add_collection3d(Line3DCollection(nodes[ends], colors='k', linewidths=1))
+        shown = nodes
+    else:
+        displacements = np.zeros((len(model.nodes), 3))
+        displacements[:, :model.dimensions] = np.asarray(
+            result.displacements).reshape(len(model.nodes), model.dimensions)
+        if scale is None:
+            largest = np.abs(displacements).max(initial=0)
+            size = np.ptp(nodes, axis=0).max(initial=0)
+            scale = DEFORMED_FRACTION*size/largest if largest else 1.0
+        shown = nodes + scale*displacements
+        ax.add_collection3d(Line3DCollection(
+            nodes[ends], colors='gray', linewidths=0.5, alpha=0.5))
+        ax.add_collection3d(Line3DCollection(
+            shown[ends], colors=member_colours(np.asarray(result.bar_forces)), linewidths=2))
+
+    if supports and len(model.restrained_dofs):
+        supported = np.unique((np.array(model.restrained_dofs)-1)//model.dimensions)
+        ax.scatter(*shown[supported].T, marker='^', s=60, c='lightsteelblue',
+                   edgecolors='k', depthshade=False)
+
+    # equal scale on every axis, a tower should not look like a cube
+    low, high = shown.min(axis=0), shown.max(axis=0)
+    centre, half = (low + high)/2, max((high - low).max()/2, np.finfo(float).tiny)
+    ax.set_xlim(centre[0] - half, centre[0] + half)
+    ax.set_ylim(centre[1] - half, centre[1] + half)
+    ax.set_zlim(centre[2] - half, centre[2] + half)
+    ax.set_xlabel('x')
+    ax.set_ylabel('y')
+    ax.set_zlabel('z')
+    return scale
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the modules live at the top of the repository, not in a package
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def demo():
+    """path of one of the example projects shipped in Demo"""
+    return lambda name: os.path.join(ROOT, 'Demo', name)
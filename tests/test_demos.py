@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from solver import TrussSolver
+from trsfile import read_project
+
+# force in member 1 and the largest one of every demo, as the GUI shows them
+BASELINE = {
+    'Example 1.trs': (2.890173410404623, 5.775214484520037),
+    'Example 2.trs': (15.000000000000016, 42.18996183961909),
+    'Example 3.trs': (0.07555555555555563, 0.08888888888888896),
+    'Example 4.trs': (147.00000000000017, 162.8158468945824),
+    'Example 5.trs': (0.6249999999999931, 1.2298220897153194),
+    'Example 6.trs': (-3175.519630484986, 3175.519630484986),
+}
+
+
+def reference(model):
+    """one member at a time into a dense K, the way MainPage.calculation first did it"""
+    d = model.dimensions
+    K = np.zeros((model.ndofs, model.ndofs))
+    for (start, end), (E, A) in zip(model.elements, model.properties):
+        delta = model.nodes[end-1] - model.nodes[start-1]
+        length = np.linalg.norm(delta)
+        e = delta/length
+        k = E*A/length*np.outer(e, e)
+        dofs = np.r_[d*(start-1):d*start, d*(end-1):d*end]
+        K[np.ix_(dofs, dofs)] += np.block([[k, -k], [-k, k]])
+    restrained = np.array(model.restrained_dofs) - 1
+    free = np.setdiff1d(np.arange(model.ndofs), restrained)
+    D = np.zeros(model.ndofs)
+    D[free] = np.linalg.solve(K[np.ix_(free, free)], model.loads[free])
+    forces = []
+    for (start, end), (E, A) in zip(model.elements, model.properties):
+        delta = model.nodes[end-1] - model.nodes[start-1]
+        length = np.linalg.norm(delta)
+        stretch = (D.reshape(-1, d)[end-1] - D.reshape(-1, d)[start-1]).dot(delta/length)
+        forces.append(E*A/length*stretch)
+    return D, np.array(forces), K[restrained].dot(D) - model.loads[restrained]
+
+
+@pytest.mark.parametrize('name', sorted(BASELINE))
+@pytest.mark.parametrize('sparse', [False, True])
+def test_demo_matches_baseline(demo, name, sparse):
+    model = read_project(demo(name)).to_model()
+    result = TrussSolver(model, sparse=sparse).solve()
+    first, largest = BASELINE[name]
+    assert result.bar_forces[0] == pytest.approx(first, rel=1e-9)
+    assert np.abs(result.bar_forces).max() == pytest.approx(largest, rel=1e-9)
+
+    D, forces, reactions = reference(model)
+    scale = np.abs(forces).max()
+    assert np.allclose(result.displacements, D, rtol=1e-9, atol=1e-12*np.abs(D).max())
+    assert np.allclose(result.bar_forces, forces, rtol=1e-9, atol=1e-12*scale)
+    assert np.allclose(result.reactions, reactions, rtol=1e-9, atol=1e-12*scale)
+
+
+@pytest.mark.parametrize('name', sorted(BASELINE))
+def test_demo_is_in_equilibrium(demo, name):
+    model = read_project(demo(name)).to_model()
+    result = TrussSolver(model).solve()
+    forces = model.loads.copy()
+    forces[np.array(model.restrained_dofs) - 1] += result.reactions
+    totals = forces.reshape(-1, model.dimensions).sum(axis=0)
+    assert np.allclose(totals, 0, atol=1e-9*np.abs(model.loads).max())
+
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+import dynamics
+from solver import TrussModel, TrussSolver
+
+# length, E, A and mass per length of the single bar
+LENGTH, E, A, MASS = 2.0, 200.0, 100.0, 4.0
+
+
+def bar(load=10.0):
+    """one bar along x, its far end only moves along it, a single degree of freedom"""
+    loads = np.zeros(4)
+    loads[2] = load
+    return TrussModel([(0, 0), (LENGTH, 0)], [(1, 2)], [(E, A)], [1, 2, 4], loads, [MASS])
+
+
+def frequency(lumped):
+    mass = MASS*LENGTH/(2 if lumped else 3)
+    return np.sqrt(E*A/LENGTH/mass)
+
+
+@pytest.mark.parametrize('lumped', [False, True])
+@pytest.mark.parametrize('alpha', [0.0, -0.05])
+def test_step_load_on_one_degree_of_freedom(lumped, alpha):
+    """u = P/k (1 - cos(w t)) for a load applied suddenly at t = 0"""
+    load = 10.0
+    w = frequency(lumped)
+    dt = 2*np.pi/w/2000
+    integrator = dynamics.TimeHistory(bar(load), dt, alpha=alpha, lumped=lumped)
+    (times, displacements, bar_forces), = integrator.run(steps=4000, chunk=5000)
+    static = load*LENGTH/(E*A)
+    exact = static*(1 - np.cos(w*times))
+    assert displacements[:, 2] == pytest.approx(exact, abs=1e-4*static)
+    assert bar_forces[:, 0] == pytest.approx(E*A/LENGTH*exact, abs=1e-4*load)
+
+
+def test_damped_step_load_on_one_degree_of_freedom():
+    """mass proportional damping c = 2 ratio w m, the closed-form damped response"""
+    load, ratio = 10.0, 0.05
+    w = frequency(lumped=True)
+    dt = 2*np.pi/w/2000
+    integrator = dynamics.TimeHistory(bar(load), dt, lumped=True, mass_damping=2*ratio*w)
+    (times, displacements, _), = integrator.run(steps=20000, chunk=50000)
+    static = load*LENGTH/(E*A)
+    wd = w*np.sqrt(1 - ratio**2)
+    exact = static*(1 - np.exp(-ratio*w*times)*(
+        np.cos(wd*times) + ratio/np.sqrt(1 - ratio**2)*np.sin(wd*times)))
+    assert displacements[:, 2] == pytest.approx(exact, abs=1e-4*static)
+
+
+def warren(panels=4, length=4.0, height=3.0):
+    count = panels + 1
+    nodes = [(i*length, 0.0) for i in range(count)] + \
+        [((i + 0.5)*length, height) for i in range(panels)]
+    members = [(i+1, i+2) for i in range(panels)] + \
+        [(count+i+1, count+i+2) for i in range(panels-1)]
+    for i in range(panels):
+        members += [(i+1, count+i+1), (count+i+1, i+2)]
+    loads = np.zeros(2*len(nodes))
+    loads[1:2*count:2] = -10
+    return TrussModel(nodes, members, [(200.0, 5000.0)]*len(members), [1, 2, 2*count],
+                      loads, [0.04]*len(members))
+
+
+def test_damped_response_settles_to_the_static_solution():
+    model = warren()
+    first, second = TrussSolver(model).natural_frequencies(2)[0]
+    mass_damping, stiffness_damping = dynamics.rayleigh(0.05, first, second)
+    dt = 1/first/50
+    integrator = dynamics.TimeHistory(model, dt, alpha=-0.1, mass_damping=mass_damping,
+                                      stiffness_damping=stiffness_damping)
+    *_, (times, displacements, bar_forces) = integrator.run(steps=5000, chunk=1000)
+    static = TrussSolver(model).solve()
+    scale = np.abs(static.displacements).max()
+    assert displacements[-1] == pytest.approx(static.displacements, abs=1e-6*scale)
+    assert bar_forces[-1] == pytest.approx(static.bar_forces, abs=1e-6*np.abs(static.bar_forces).max())
+
+
+def test_rayleigh_damping_ratio():
+    mass_damping, stiffness_damping = dynamics.rayleigh(0.02, 1.5, 6.0)
+    for f in (1.5, 6.0):
+        w = 2*np.pi*f
+        assert mass_damping/(2*w) + stiffness_damping*w/2 == pytest.approx(0.02)
+    with pytest.raises(ValueError):
+        dynamics.rayleigh(0.02, 3.0, 3.0)
+
+
+def test_saved_history_is_the_run(tmp_path):
+    model = warren()
+    history = dynamics.LoadHistory([0, 0.05, 0.1], [[0], [1], [0]])
+    integrator = dynamics.TimeHistory(model, 0.002)
+    times, displacements, bar_forces = (np.concatenate(parts) for parts in zip(
+        *integrator.run(history=history, steps=120, chunk=7, dofs=[3, 5])))
+    peak = integrator.save(tmp_path, history=history, steps=120, chunk=50, dofs=[3, 5],
+                           displacement_scale=1000, force_scale=2)
+    saved = {name: np.load(tmp_path / f'{name}.npy', mmap_mode='r')
+             for name in ('time', 'displacements', 'bar_forces')}
+    assert np.allclose(saved['time'], times)
+    assert np.allclose(saved['displacements'], displacements*1000)
+    assert np.allclose(saved['bar_forces'], bar_forces*2)
+    assert peak == pytest.approx((np.abs(displacements).max()*1000, np.abs(bar_forces).max()*2))
+
+
+def test_every_free_node_needs_mass():
+    model = bar()
+    massless = TrussModel(model.nodes, model.elements, model.properties, model.restrained_dofs,
+                          model.loads)
+    with pytest.raises(ValueError):
+        dynamics.TimeHistory(massless, 0.01)
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+import loadcases
+from solver import TrussModel, TrussSolver
+
+
+@pytest.mark.parametrize('text, factors', [
+    ('1.2D + 1.6L - 0.5W', {'D': 1.2, 'L': 1.6, 'W': -0.5}),
+    ('D+L', {'D': 1.0, 'L': 1.0}),
+    ('-W', {'W': -1.0}),
+    ('0.9*D + 1.0 * W', {'D': 0.9, 'W': 1.0}),
+    ('.5D + 1.5D', {'D': 2.0}),
+    ('1.4 Dead_2', {'Dead_2': 1.4}),
+])
+def test_parse_combination(text, factors):
+    assert loadcases.parse_combination(text) == pytest.approx(factors)
+
+
+@pytest.mark.parametrize('text', ['', '   ', '1.2D 1.6L', '1.2D + ', '1.2', 'D + 2', '1.2D + *L',
+                                  '.D', '1.2D,'])
+def test_malformed_combination_is_refused(text):
+    with pytest.raises(ValueError):
+        loadcases.parse_combination(text)
+
+
+def test_parse_combinations():
+    combinations = loadcases.parse_combinations('1.2D + 1.6L, 0.9D+1.0W,')
+    assert combinations == {'1.2D+1.6L': {'D': 1.2, 'L': 1.6}, '0.9D+1.0W': {'D': 0.9, 'W': 1.0}}
+
+
+def test_combination_of_unknown_case_is_refused():
+    with pytest.raises(ValueError, match='W'):
+        loadcases.combination_matrix(['D', 'L'], {'0.9D+1.0W': {'D': 0.9, 'W': 1.0}})
+
+
+def frame():
+    """a three panel Pratt truss with a dead, a live and a wind case"""
+    nodes = [(0, 0), (4, 0), (8, 0), (12, 0), (4, 3), (8, 3)]
+    members = [(1, 2), (2, 3), (3, 4), (5, 6), (1, 5), (2, 5), (3, 6), (4, 6), (2, 6)]
+    model = TrussModel(nodes, members, [(200.0, 1000.0)]*len(members), [1, 2, 8])
+    loads = np.zeros((model.ndofs, 3))
+    loads[[3, 5], 0] = -10      # dead on the bottom chord
+    loads[9, 1] = -25           # live at the top
+    loads[[8, 10], 2] = 6       # wind from the left
+    return model, loads
+
+
+def test_combinations_match_combined_solves():
+    model, loads = frame()
+    cases = ['D', 'L', 'W']
+    combinations = loadcases.parse_combinations('1.2D+1.6L, 0.9D-1.0W, 1.2D+0.5L+1.0W')
+    matrix = loadcases.combination_matrix(cases, combinations)
+    solver = TrussSolver(model)
+    combined = loadcases.combine(solver.solve_cases(loads), matrix)
+    for column, factors in enumerate(combinations.values()):
+        total = sum(factor*loads[:, cases.index(case)] for case, factor in factors.items())
+        single = TrussSolver(model).solve(total)
+        result = loadcases.column(combined, column)
+        assert np.allclose(result.displacements, single.displacements)
+        assert np.allclose(result.bar_forces, single.bar_forces)
+        assert np.allclose(result.stresses, single.stresses)
+        assert np.allclose(result.reactions, single.reactions)
+
+
+def test_envelope_governing_combination():
+    model, loads = frame()
+    cases = ['D', 'L', 'W']
+    combinations = loadcases.parse_combinations('1.2D+1.6L, 0.9D-1.0W, 1.2D+0.5L+1.0W')
+    matrix = loadcases.combination_matrix(cases, combinations)
+    solves = np.column_stack([TrussSolver(model).solve(loads.dot(factors)).bar_forces
+                              for factors in matrix])
+    combined = loadcases.combine(TrussSolver(model).solve_cases(loads), matrix)
+    envelope = loadcases.Envelope(combined.bar_forces)
+    assert np.allclose(envelope.max, solves.max(axis=1))
+    assert np.allclose(envelope.min, solves.min(axis=1))
+    members = np.arange(len(model))
+    assert np.allclose(solves[members, envelope.max_at], solves.max(axis=1))
+    assert np.allclose(solves[members, envelope.min_at], solves.min(axis=1))
+    # every combination governs some member of this truss
+    assert set(envelope.max_at) | set(envelope.min_at) == {0, 1, 2}
+
+
+def test_envelope_needs_a_column():
+    with pytest.raises(ValueError):
+        loadcases.Envelope(np.zeros((3, 0)))
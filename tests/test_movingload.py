@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from movingload import Vehicle, interpolate, path_nodes, sweep
+from solver import TrussSolver
+from trsfile import read_project
+
+# every axle spacing and panel length of the tests is a multiple of STEP
+STEP = 0.05
+
+
+def bridge(demo):
+    """Example 1 is a 4 panel bridge, its bottom chord (nodes 1 to 5) is the deck"""
+    model = read_project(demo('Example 1.trs')).to_model()
+    nodes, positions = path_nodes(model.nodes, 1, 5)
+    return model, nodes, positions
+
+
+def brute_force(model, nodes, positions, vehicle, axles):
+    """member forces (members, len(axles)) with the axles at every row of axles, one solve each"""
+    solver = TrussSolver(model)
+    forces = []
+    for row in axles:
+        F = np.zeros(model.ndofs)
+        for load, x in zip(vehicle.loads, row):
+            if not positions[0] <= x <= positions[-1]:
+                continue
+            # through the stringer of the panel to its two panel points
+            panel = min(np.searchsorted(positions, x, side='right') - 1, len(positions) - 2)
+            t = (x - positions[panel])/(positions[panel+1] - positions[panel])
+            F[2*(nodes[panel]-1)+1] -= load*(1 - t)
+            F[2*(nodes[panel+1]-1)+1] -= load*t
+        forces.append(solver.solve(F).bar_forces)
+    return np.array(forces).T
+
+
+def test_path_nodes(demo):
+    model, nodes, positions = bridge(demo)
+    assert nodes.tolist() == [1, 2, 3, 4, 5]
+    assert positions == pytest.approx([0, 2, 4, 6, 8])
+    # the top chord is not on the deck
+    nodes, _ = path_nodes(model.nodes, 5, 1)
+    assert nodes.tolist() == [5, 4, 3, 2, 1]
+
+
+def test_interpolate_is_zero_off_the_path():
+    ordinates = np.array([[1.0, 3.0, -1.0]])
+    values = interpolate([0, 2, 4], ordinates, [-0.5, 0, 1, 2, 3, 4, 4.5])
+    assert values[0] == pytest.approx([0, 1, 2, 3, 1, -1, 0])
+
+
+@pytest.mark.parametrize('both_directions', [False, True])
+def test_sweep_matches_brute_force(demo, both_directions):
+    model, nodes, positions = bridge(demo)
+    vehicle = Vehicle([30.0, 60.0, 45.0], [1.0, 1.5])
+    ordinates = TrussSolver(model).influence_lines(nodes)
+    result = sweep(positions, ordinates, vehicle, steps=7, both_directions=both_directions)
+
+    # front axle on every multiple of STEP from entering to leaving the deck
+    length = int(round(vehicle.length/STEP))
+    front = np.arange(-length, int(round(positions[-1]/STEP)) + length + 1)*STEP
+    forward = brute_force(model, nodes, positions, vehicle, front[:, None] - vehicle.offsets)
+    forces = forward
+    if both_directions:
+        # driving from the end to the start the other axles are ahead of the front one
+        backward = brute_force(model, nodes, positions, vehicle, front[:, None] + vehicle.offsets)
+        forces = np.hstack((forward, backward))
+        assert not np.allclose(backward.max(axis=1), forward.max(axis=1))
+
+    scale = np.abs(forces).max()
+    assert np.allclose(result.max, forces.max(axis=1), atol=1e-9*scale)
+    assert np.allclose(result.min, forces.min(axis=1), atol=1e-9*scale)
+    if not both_directions:
+        assert not result.max_reversed.any() and not result.min_reversed.any()
+
+    # the reported position and direction give the reported force
+    for member in range(len(model)):
+        for at, is_reversed, value in ((result.max_at, result.max_reversed, result.max),
+                                       (result.min_at, result.min_reversed, result.min)):
+            sign = 1 if is_reversed[member] else -1
+            force = brute_force(model, nodes, positions, vehicle,
+                                [at[member] + sign*vehicle.offsets])[member, 0]
+            assert force == pytest.approx(value[member], abs=1e-9*scale)
+
+
+def test_vehicle_parse():
+    vehicle = Vehicle.parse('35, 145, 145 ; 4.3, 4.3')
+    assert vehicle.loads.tolist() == [35, 145, 145]
+    assert vehicle.offsets.tolist() == pytest.approx([0, 4.3, 8.6])
+    assert vehicle.reversed().loads.tolist() == [145, 145, 35]
+    with pytest.raises(ValueError):
+        Vehicle.parse('35, 145 ; 4.3, 4.3')
+    with pytest.raises(ValueError):
+        Vehicle([10, 10], [-1])
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+import nonlinear
+from solver import TrussModel, TrussSolver
+
+# half span, rise, E and A of the von Mises truss
+HALF, RISE, E, A = 2.0, 0.5, 200.0, 100.0
+
+
+def von_mises(load):
+    """two bars meeting at an apex, the apex only moves vertically"""
+    loads = np.zeros(6)
+    loads[5] = -load
+    return TrussModel([(-HALF, 0), (HALF, 0), (0, RISE)], [(1, 3), (2, 3)], [(E, A)]*2,
+                      [1, 2, 3, 4, 5], loads)
+
+
+def exact(drop):
+    """load on the apex and bar force when it has dropped by drop"""
+    original, current = np.hypot(HALF, RISE), np.hypot(HALF, RISE - drop)
+    force = E*A/original*(current - original)
+    return -2*force*(RISE - drop)/current, force
+
+
+@pytest.mark.parametrize('modified', [False, True])
+def test_arc_length_follows_the_snap_through(modified):
+    load = 150.0
+    drops = np.linspace(0, 2*RISE, 100001)
+    limit = exact(drops)[0].max()
+    assert limit < load
+
+    path = nonlinear.NonlinearSolver(von_mises(load), modified=modified).arc_length(
+        steps=40, tolerance=1e-12)
+    drop = -path.displacements[5]
+    loads, forces = exact(drop)
+    assert path.load_factors*load == pytest.approx(loads, abs=1e-10*load)
+    assert path.bar_forces == pytest.approx(np.vstack((forces, forces)), abs=1e-10*load)
+
+    # up to the limit point, down past zero and up again on the inverted side
+    before = path.load_factors[:-1]
+    assert before.max()*load <= limit*(1 + 1e-9)
+    assert (np.diff(before[before.argmax():]) < 0).all()
+    assert before.min() < 0
+    assert path.load_factors[-1] == 1.0
+    assert drop[-1] > 2*RISE
+    assert (np.diff(drop) > 0).all()
+
+
+def test_small_loads_follow_the_linear_analysis():
+    model = von_mises(1e-3)
+    linear = TrussSolver(model).solve()
+    large = nonlinear.NonlinearSolver(model).newton().result
+    assert np.allclose(large.displacements, linear.displacements, rtol=1e-4,
+                       atol=1e-8*np.abs(linear.displacements).max())
+    assert np.allclose(large.bar_forces, linear.bar_forces, rtol=1e-4)
+    assert np.allclose(large.reactions, linear.reactions, rtol=1e-4,
+                       atol=1e-8*np.abs(linear.reactions).max())
+
+
+def test_arc_length_needs_a_load():
+    model = von_mises(0.0)
+    with pytest.raises(ValueError):
+        nonlinear.NonlinearSolver(model).arc_length()
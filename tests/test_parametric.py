@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+import parametric
+from solver import TrussSolver
+from trsfile import Project, read_project
+
+
+def test_grid_is_every_combination():
+    names, samples = parametric.grid({'E': [190, 200, 210], 'height': [3, 6]})
+    assert names == ['E', 'height']
+    assert samples.tolist() == [[190, 3], [190, 6], [200, 3], [200, 6], [210, 3], [210, 6]]
+
+
+def test_latin_hypercube_has_one_sample_per_slice():
+    names, samples = parametric.latin_hypercube({'A': (1000, 5000), 'span': (20, 40)}, 50, seed=1)
+    assert names == ['A', 'span']
+    for column, (low, high) in enumerate([(1000, 5000), (20, 40)]):
+        slices = np.floor((samples[:, column] - low)/(high - low)*50)
+        assert sorted(slices) == list(range(50))
+
+
+@pytest.mark.parametrize('names', [['B'], ['E0x'], ['A9']])
+def test_unknown_parameters_are_refused(demo, names):
+    with pytest.raises(ValueError):
+        parametric.Variants(read_project(demo('Example 1.trs')), names)
+
+
+def test_variant_model(demo):
+    project = read_project(demo('Example 1.trs'))
+    variants = parametric.Variants(project, ['A', 'span', 'height'])
+    model = variants.model([2500.0, 12.0, 5.0])
+    assert np.ptp(model.nodes, axis=0) == pytest.approx([12.0, 5.0])
+    assert model.properties[:, 1] == pytest.approx(2500.0)
+    assert model.properties[:, 0] == pytest.approx(project.properties[0, 0])
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_run_matches_single_solves(demo, jobs):
+    project = read_project(demo('Example 1.trs'))
+    names, samples = parametric.grid({'A': [500, 1000], 'height': [2, 3.46, 5]})
+    variants = parametric.Variants(project, names)
+    seen = []
+    for indices, values, columns, max_force, min_force in parametric.run(
+            project, names, samples, jobs=jobs, chunksize=2):
+        assert np.array_equal(values, samples[indices])
+        for row, i in enumerate(indices):
+            model = variants.model(samples[i])
+            result = TrussSolver(model).solve()
+            # Example 1 is metric in m and kN, displacements are shown in mm
+            assert columns['status'][row] == 'stable'
+            assert max_force[row] == pytest.approx(result.bar_forces, abs=1e-9)
+            assert columns['max_displacement'][row] == pytest.approx(
+                np.abs(result.displacements).max()*1000)
+            assert columns['max_tension'][row] == pytest.approx(result.bar_forces.max())
+            assert columns['max_compression'][row] == pytest.approx(result.bar_forces.min())
+            # A in mm^2 and L in m, the volume is in mm^3
+            lengths = np.linalg.norm(np.diff(model.nodes[model.elements-1], axis=1)[:, 0], axis=1)
+            assert columns['volume'][row] == pytest.approx(samples[i, 0]*lengths.sum()*1000)
+        seen.extend(indices.tolist())
+    assert sorted(seen) == list(range(len(samples)))
+
+
+def flat_project():
+    return Project(nodes=[(0, 0), (2, 0), (4, 0)], members=[(1, 2), (2, 3)],
+                   properties=[(200.0, 1000.0)], support_nodes=[1, 3], support_types=[0, 0],
+                   load_nodes=[2], loads=[(10.0, 0.0)])
+
+
+def test_flat_truss_cannot_get_a_height():
+    variants = parametric.Variants(flat_project(), ['height'])
+    columns, max_force, _ = variants.run(np.array([[3.0]]))
+    assert columns['status'].tolist() == ['error']
+    assert np.isnan(max_force).all()
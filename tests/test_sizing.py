@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from sizing import Sizing
+from solver import TrussModel
+from trsfile import read_project
+
+TENSION, COMPRESSION = 0.25, 0.2
+
+
+def braced_panels():
+    """two x-braced panels, indeterminate, with a vertical and a horizontal load column"""
+    nodes = [(0, 0), (4, 0), (8, 0), (0, 3), (4, 3), (8, 3)]
+    members = [(1, 2), (2, 3), (4, 5), (5, 6), (1, 4), (2, 5), (3, 6),
+               (1, 5), (2, 4), (2, 6), (3, 5)]
+    areas = np.linspace(800, 1800, len(members))
+    model = TrussModel(nodes, members, np.column_stack((np.full(len(members), 200.0), areas)),
+                       [1, 2, 6])
+    loads = np.zeros((model.ndofs, 2))
+    loads[[9, 11], 0] = -40
+    loads[8, 1] = 25
+    return model, loads
+
+
+def test_fully_stressed_reaches_the_allowable_stress(demo):
+    """Example 1 is determinate, its forces do not depend on the areas"""
+    model = read_project(demo('Example 1.trs')).to_model()
+    sized = Sizing(model, TENSION, COMPRESSION, area_min=1e-3).fully_stressed()
+    assert sized.converged
+    stresses = sized.result.stresses[:, 0]
+    loaded = sized.areas > 1e-3
+    assert loaded.any()
+    allowable = np.where(stresses[loaded] > 0, TENSION, -COMPRESSION)
+    assert stresses[loaded] == pytest.approx(allowable, rel=1e-10)
+
+
+def test_fully_stressed_indeterminate():
+    model, loads = braced_panels()
+    sized = Sizing(model, TENSION, COMPRESSION, loads, area_min=1.0).fully_stressed(iterations=500)
+    assert sized.converged
+    stresses = sized.result.stresses
+    governing = np.maximum(stresses.max(axis=1)/TENSION, -stresses.min(axis=1)/COMPRESSION)
+    assert governing[sized.areas > 1.0] == pytest.approx(1, rel=1e-4)
+    assert (governing <= 1 + 1e-4).all()
+
+
+def test_minimum_weight_keeps_the_displacement_limit():
+    model, loads = braced_panels()
+    sizer = Sizing(model, TENSION, COMPRESSION, loads, area_min=1.0)
+    stressed = sizer.fully_stressed(iterations=500)
+    free = sizer.solver.free_dofs
+    limit = 0.5*np.abs(stressed.result.displacements[free]).max()
+
+    sized = sizer.minimum_weight(limit)
+    assert sized.converged
+    displacements = np.abs(sized.result.displacements[free])
+    assert displacements.max() <= limit*(1 + 1e-6)
+    # the limit governs, a stiffer truss than needed would not be the lightest
+    assert displacements.max() == pytest.approx(limit, rel=1e-3)
+    stresses = sized.result.stresses
+    assert (stresses.max(axis=1) <= TENSION*(1 + 1e-6)).all()
+    assert (stresses.min(axis=1) >= -COMPRESSION*(1 + 1e-6)).all()
+    assert sized.weight > stressed.weight
+
+
+def test_displacement_sensitivity_matches_finite_differences():
+    model, loads = braced_panels()
+    sizer = Sizing(model, TENSION, COMPRESSION, loads)
+    areas = model.properties[:, 1]
+    dofs = np.array([8, 9, 11])
+    share = np.array([[0.2, 0.5], [0.5, 0.1], [0.3, 0.4]])
+
+    def measure(areas):
+        return (share*np.abs(sizer.analyse(areas).displacements[dofs])).sum()
+
+    sensitivity = sizer.displacement_sensitivity(
+        sizer.analyse(areas).displacements, dofs, share, areas)
+    step = 1e-4*areas
+    differences = np.array([
+        (measure(areas + step*e) - measure(areas - step*e))/(2*step[i])
+        for i, e in enumerate(np.eye(len(areas)))])
+    assert sensitivity == pytest.approx(differences, rel=1e-6, abs=1e-9*np.abs(differences).max())
+
+
+def test_sensitivity_of_a_support_is_refused():
+    model, loads = braced_panels()
+    sizer = Sizing(model, TENSION, loads=loads)
+    displacements = sizer.analyse(model.properties[:, 1]).displacements
+    with pytest.raises(ValueError):
+        sizer.displacement_sensitivity(displacements, [0], np.ones((1, 2)), model.properties[:, 1])
@@ -0,0 +1,283 @@
+import numpy as np
+import pytest
+
+from solver import TrussModel, TrussSolver, UnstableStructureError
+
+
+def two_panels():
+    """count-sufficient (9 bars + 3 reactions = 12) but a mechanism"""
+    nodes = [(0, 0), (1, 0), (2, 0), (0, 1), (1, 1), (2, 1)]
+    members = [(1, 2), (2, 3), (4, 5), (5, 6), (1, 4), (2, 5), (3, 6), (1, 5), (2, 4)]
+    loads = np.zeros(12)
+    loads[9] = -10
+    return TrussModel(nodes, members, [(200.0, 1000.0)]*len(members), [1, 2, 6], loads)
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_count_sufficient_mechanism_is_unstable(sparse):
+    model = two_panels()
+    assert model.is_determinate_enough()
+    with pytest.raises(UnstableStructureError):
+        TrussSolver(model, sparse=sparse).solve()
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_mechanism_names_moving_dofs(sparse, dtype):
+    with pytest.raises(UnstableStructureError) as error:
+        TrussSolver(two_panels(), sparse=sparse, dtype=dtype).solve()
+    assert 'node 2 (y), node 4 (x), node 5 (x, y), node 6 (x)' in str(error.value)
+    # 0-based dofs of node 2 y, node 4 x, node 5 x and y, node 6 x
+    assert error.value.dofs.tolist() == [3, 6, 8, 9, 10]
+    assert error.value.mechanisms.shape == (12, 1)
+
+
+def braced_panels(panels, open_panel):
+    """x-braced panels of a simply supported truss, one of them without bracing"""
+    nodes = [(i, j) for i in range(panels+1) for j in (0, 1)]
+    members = []
+    for i in range(panels+1):
+        members.append((2*i+1, 2*i+2))
+    for i in range(panels):
+        members += [(2*i+1, 2*i+3), (2*i+2, 2*i+4)]
+        if i != open_panel:
+            members += [(2*i+1, 2*i+4), (2*i+2, 2*i+3)]
+    supports = [1, 2, 4*panels+2]
+    return TrussModel(nodes, members, [(200.0, 1000.0)]*len(members), supports)
+
+
+def test_mechanism_dense_and_sparse_agree():
+    """the sparse path shift-inverts, the dense one takes eigh below the tolerance"""
+    model = braced_panels(12, 5)
+    assert model.is_determinate_enough()
+    found = []
+    for sparse in (False, True):
+        with pytest.raises(UnstableStructureError) as error:
+            TrussSolver(model, sparse=sparse).solve()
+        found.append(error.value)
+    assert found[0].dofs.tolist() == found[1].dofs.tolist()
+    assert found[0].mechanisms.shape == found[1].mechanisms.shape == (model.ndofs, 1)
+    shapes = [e.mechanisms[:, 0]*np.sign(e.mechanisms[e.dofs[0], 0]) for e in found]
+    assert np.allclose(shapes[0], shapes[1], atol=1e-8)
+
+
+def warren(panels, length=4000.0, height=3000.0):
+    """simply supported Warren truss, every bottom node loaded"""
+    bottom = [(i*length, 0.0) for i in range(panels+1)]
+    top = [((i + 0.5)*length, height) for i in range(panels)]
+    count = panels + 1
+    members = [(i+1, i+2) for i in range(panels)] + \
+        [(count+i+1, count+i+2) for i in range(panels-1)]
+    for i in range(panels):
+        members += [(i+1, count+i+1), (count+i+1, i+2)]
+    loads = np.zeros(2*(len(bottom) + len(top)))
+    loads[1:2*count:2] = -10
+    return TrussModel(bottom + top, members, [(200.0, 5000.0)]*len(members),
+                      [1, 2, 2*count], loads)
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+@pytest.mark.parametrize('panels', [50, 400])
+def test_float32_is_refined_to_float64(sparse, panels):
+    """400 panels (cond ~ 5e9) is beyond float32, it must fall back, never return noise"""
+    model = warren(panels)
+    exact = TrussSolver(model, sparse=sparse).solve()
+    single = TrussSolver(model, sparse=sparse, dtype=np.float32).solve()
+    assert single.displacements.dtype == np.float64
+    assert np.allclose(single.bar_forces, exact.bar_forces, rtol=1e-8, atol=1e-8*np.abs(exact.bar_forces).max())
+    assert np.allclose(single.reactions, exact.reactions, atol=1e-8*np.abs(exact.reactions).max())
+
+
+@pytest.mark.parametrize('member', [(1, 0), (1, 4), (-1, 2)])
+def test_members_must_join_existing_nodes(member):
+    with pytest.raises(ValueError):
+        TrussModel([(0, 0), (1, 0), (1, 1)], [(1, 2), member], [(1, 1)]*2, [1, 2, 4])
+
+
+@pytest.mark.parametrize('supports', [[0, 1, 2], [1, 2, 7]])
+def test_supports_must_be_existing_dofs(supports):
+    with pytest.raises(ValueError):
+        TrussModel([(0, 0), (1, 0), (1, 1)], [(1, 2), (2, 3)], [(1, 1)]*2, supports)
+
+
+def test_set_model_from_plane_to_space_truss():
+    """same node count, members and supports, 2 then 3 dofs per node, nothing may be reused"""
+    members = [(1, 4), (2, 4), (3, 4), (1, 5), (2, 5), (3, 5)]
+    properties = [(200.0, 1000.0)]*len(members)
+    supports = list(range(1, 10))
+    plane_loads, space_loads = np.zeros(10), np.zeros(15)
+    plane_loads[9] = space_loads[14] = -10
+    plane = TrussModel([(0, 0), (4, 0), (0, 4), (1, 1), (3, 1)], members, properties,
+                       supports, plane_loads)
+    space = TrussModel([(0, 0, 0), (4, 0, 0), (0, 4, 0), (1, 1, 3), (3, 1, 2)], members,
+                       properties, supports, space_loads)
+    assert plane.topology_key() != space.topology_key()
+    solver = TrussSolver(plane)
+    solver.solve()
+    solver.set_model(space)
+    reused = solver.solve()
+    fresh = TrussSolver(space).solve()
+    assert np.allclose(reused.displacements, fresh.displacements)
+    assert np.allclose(reused.bar_forces, fresh.bar_forces)
+
+
+@pytest.mark.parametrize('panels', [3, 60])
+def test_dense_and_sparse_agree(panels):
+    model = warren(panels)
+    dense = TrussSolver(model, sparse=False).solve()
+    sparse = TrussSolver(model, sparse=True).solve()
+    scale = np.abs(dense.bar_forces).max()
+    assert np.allclose(dense.displacements, sparse.displacements, rtol=1e-8,
+                       atol=1e-8*np.abs(dense.displacements).max())
+    assert np.allclose(dense.bar_forces, sparse.bar_forces, rtol=1e-8, atol=1e-8*scale)
+    assert np.allclose(dense.reactions, sparse.reactions, rtol=1e-8, atol=1e-8*scale)
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+@pytest.mark.parametrize('direction', [0, 1])
+def test_influence_lines_match_single_solves(sparse, direction):
+    """a support node included, its load goes straight into the support"""
+    model = warren(8)
+    solver = TrussSolver(model, sparse=sparse)
+    nodes = np.arange(1, 10)
+    lines = solver.influence_lines(nodes, load=-1.0, direction=direction)
+    assert lines.shape == (len(model), len(nodes))
+    for column, node in enumerate(nodes):
+        loads = np.zeros(model.ndofs)
+        loads[2*(node-1)+direction] = -1.0
+        single = TrussSolver(model, sparse=sparse).solve(loads)
+        assert np.allclose(lines[:, column], single.bar_forces, rtol=1e-10, atol=1e-12)
+    assert solver.influence_lines([]).shape == (len(model), 0)
+
+
+def with_areas(model, members, factor):
+    properties = model.properties.copy()
+    properties[members, 1] *= factor
+    return TrussModel(model.nodes, model.elements, properties, model.restrained_dofs,
+                      model.loads)
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_woodbury_update_matches_refactorization(sparse):
+    model = warren(30)
+    solver = TrussSolver(model, sparse=sparse)
+    solver.solve()
+    edited = with_areas(model, [0, 7, 40, 88], 3.0)
+    solver.set_model(edited)
+    assert solver.factor.method.endswith('+woodbury')
+    updated = solver.solve()
+    fresh = TrussSolver(edited, sparse=sparse).solve()
+    assert np.allclose(updated.displacements, fresh.displacements, rtol=1e-10,
+                       atol=1e-12*np.abs(fresh.displacements).max())
+    assert np.allclose(updated.bar_forces, fresh.bar_forces, rtol=1e-10,
+                       atol=1e-12*np.abs(fresh.bar_forces).max())
+
+
+def test_woodbury_gives_way_to_refactorization_for_many_members():
+    model = warren(30)
+    solver = TrussSolver(model)
+    solver.solve()
+    edited = with_areas(model, np.arange(40), 2.0)
+    solver.set_model(edited)
+    assert solver.factor is None
+    assert np.allclose(solver.solve().bar_forces, TrussSolver(edited).solve().bar_forces)
+
+
+def test_new_loads_keep_the_factor():
+    model = warren(10)
+    solver = TrussSolver(model)
+    solver.solve()
+    factor = solver.factor
+    loads = model.loads*2
+    loads[3] = 5.0
+    edited = TrussModel(model.nodes, model.elements, model.properties, model.restrained_dofs,
+                        loads)
+    solver.set_model(edited)
+    assert solver.solve().bar_forces == pytest.approx(TrussSolver(edited).solve().bar_forces)
+    assert solver.factor is factor
+
+
+def propped_column(height=3000.0, span=2000.0, E=200.0, A=1000.0, load=10.0):
+    """pinned column, its top held sideways by a horizontal bar"""
+    nodes = [(0, 0), (0, height), (span, height)]
+    loads = np.zeros(6)
+    loads[3] = -load
+    return TrussModel(nodes, [(1, 2), (2, 3)], [(E, A)]*2, [1, 2, 5, 6], loads)
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_buckling_of_a_propped_column(sparse):
+    """the bar buckles once P/height, its negative sway stiffness, uses up E*A/span"""
+    height, span, E, A, load = 3000.0, 2000.0, 200.0, 1000.0, 10.0
+    solver = TrussSolver(propped_column(height, span, E, A, load), sparse=sparse)
+    result = solver.solve()
+    factors, shapes = solver.buckling(result.bar_forces)
+    assert len(factors) == 1
+    assert factors[0] == pytest.approx(E*A/span*height/load, rel=1e-10)
+    assert shapes[:, 0] == pytest.approx([0, 0, 1, 0, 0, 0], abs=1e-10)
+
+
+def braced_column(segments, height=6000.0, span=1000.0, E=200.0, A=1000.0, load=10.0):
+    """column of segments, every inner node held sideways by a bar to a pin, top held sideways"""
+    h = height/segments
+    nodes = [(0, i*h) for i in range(segments+1)] + [(span, i*h) for i in range(1, segments)]
+    members = [(i+1, i+2) for i in range(segments)] + \
+        [(i+1, segments+1+i) for i in range(1, segments)]
+    anchors = [segments+1+i for i in range(1, segments)]
+    supports = [1, 2, 2*segments+1] + [dof for node in anchors for dof in (2*node-1, 2*node)]
+    loads = np.zeros(2*len(nodes))
+    loads[2*segments+1] = -load
+    return TrussModel(nodes, members, [(E, A)]*len(members), supports, loads)
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_buckling_of_a_braced_column(sparse):
+    """
+    k x = factor (P/h) T x for the inner nodes, T = tridiag(-1, 2, -1),
+    factor = k h/(P (2 - 2 cos(j pi/segments)))
+    """
+    segments, height, span, E, A, load = 30, 6000.0, 1000.0, 200.0, 1000.0, 10.0
+    solver = TrussSolver(braced_column(segments, height, span, E, A, load), sparse=sparse)
+    assert solver.sparse == sparse
+    factors, shapes = solver.buckling(solver.solve().bar_forces, modes=3)
+    j = np.arange(segments-1, segments-4, -1)
+    exact = E*A/span*height/segments/(load*(2 - 2*np.cos(j*np.pi/segments)))
+    assert factors == pytest.approx(exact, rel=1e-8)
+    assert shapes.shape == (solver.model.ndofs, 3)
+
+
+def chain(count, length=1000.0, E=200.0, A=100.0, mass=0.5):
+    """bar fixed at both ends in count members, only the axial dofs are free"""
+    nodes = [(i*length/count, 0) for i in range(count+1)]
+    members = [(i+1, i+2) for i in range(count)]
+    supports = [1, 2*count+1] + [2*i for i in range(1, count+2)]
+    return TrussModel(nodes, members, [(E, A)]*count, supports, masses=[mass]*count)
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+@pytest.mark.parametrize('lumped', [False, True])
+def test_frequencies_of_a_fixed_bar(sparse, lumped):
+    """
+    The count-1 free nodes of a spring chain vibrate with
+    omega^2 = k/m (2 - 2 cos t)/c, t = j pi/count, k = E*A/h and m = mass*h,
+    c = 1 lumped or (4 + 2 cos t)/6 consistent
+    """
+    count, length, E, A, mass = 40, 1000.0, 200.0, 100.0, 0.5
+    solver = TrussSolver(chain(count, length, E, A, mass), sparse=sparse)
+    frequencies, shapes = solver.natural_frequencies(modes=5, lumped=lumped)
+
+    h = length/count
+    t = np.arange(1, 6)*np.pi/count
+    c = 1 if lumped else (4 + 2*np.cos(t))/6
+    exact = np.sqrt(E*A/h/(mass*h)*(2 - 2*np.cos(t))/c)/(2*np.pi)
+    assert frequencies == pytest.approx(exact, rel=1e-8)
+    assert shapes.shape == (2*(count+1), 5)
+    # the first mode is half a sine along the bar
+    first = shapes[0::2, 0]
+    assert first == pytest.approx(np.sin(np.arange(count+1)*np.pi/count), abs=1e-8)
+
+
+def test_massless_truss_has_no_modes():
+    frequencies, shapes = TrussSolver(warren(4)).natural_frequencies()
+    assert len(frequencies) == 0
+    assert shapes.shape == (warren(4).ndofs, 0)
@@ -0,0 +1,138 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+import trsfile
+from solver import TrussSolver
+from trsfile import Project, ProjectFileError, read_project, save_project
+
+
+def plane_project():
+    return Project(
+        'imperial', (1, 1, 0), cases=['D', 'L'], combinations={'1.2D+1.6L': {'D': 1.2, 'L': 1.6}},
+        nodes=[(0, 0), (4, 0), (8, 0), (4, 3)],
+        members=[(1, 2), (2, 3), (1, 4), (2, 4), (3, 4)],
+        member_property=[1, 1, 2, 2, 2],
+        properties=[(29000.0, 2.5), (29000.0, 1.5)],
+        support_nodes=[1, 3], support_types=[0, 1],
+        load_nodes=[4, 2, 2], loads=[(10.0, 270.0), (5.0, 270.0), (2.0, 0.0)],
+        load_case=[0, 1, 1], densities=[7.85e-9, 2.7e-9])
+
+
+def space_project():
+    return Project(
+        'metric', (0, 1, 0), cases=['Load'], dimensions=3,
+        nodes=[(0, 0, 0), (4, 0, 0), (0, 4, 0), (1, 1, 3)],
+        members=[(1, 4), (2, 4), (3, 4)], member_property=[1, 1, 1],
+        properties=[(200.0, 1000.0)], support_nodes=[1, 2, 3], support_types=[7, 7, 7],
+        load_nodes=[4], loads=[(1.0, 2.0, -10.0)])
+
+
+def assert_same_project(read, written):
+    assert read.unit_type == written.unit_type
+    assert read.unit_index == written.unit_index
+    assert read.cases == written.cases
+    assert read.combinations == written.combinations
+    assert read.dimensions == written.dimensions
+    for name in trsfile.ARRAYS:
+        assert np.array_equal(getattr(read, name), getattr(written, name)), name
+        assert getattr(read, name).dtype == getattr(written, name).dtype, name
+
+
+@pytest.mark.parametrize('project', [plane_project, space_project])
+@pytest.mark.parametrize('mapped', [True, False])
+def test_round_trip(tmp_path, project, mapped):
+    written = project()
+    path = tmp_path / 'project.trs'
+    save_project(path, written)
+    read = read_project(path, mapped=mapped)
+    assert_same_project(read, written)
+    assert np.array_equal(read.case_loads(), written.case_loads())
+    model = read.to_model()
+    assert np.array_equal(model.masses, written.to_model().masses)
+    assert np.allclose(TrussSolver(model).solve().bar_forces,
+                       TrussSolver(written.to_model()).solve().bar_forces)
+
+
+def test_plane_trusses_stay_version_1(tmp_path):
+    path = tmp_path / 'plane.trs'
+    save_project(path, plane_project())
+    size = int.from_bytes(path.read_bytes()[8:12], 'little')
+    assert b'"version": 1' in path.read_bytes()[12:12+size]
+
+
+def test_legacy_demo_is_saved_as_a_binary_file(demo, tmp_path):
+    legacy = read_project(demo('Example 4.trs'))
+    path = tmp_path / 'Example 4.trs'
+    save_project(path, legacy)
+    assert path.read_bytes().startswith(trsfile.MAGIC)
+    read = read_project(path)
+    assert_same_project(read, legacy)
+    assert np.array_equal(TrussSolver(read.to_model()).solve().bar_forces,
+                          TrussSolver(legacy.to_model()).solve().bar_forces)
+
+
+class Payload:
+    """pickles to a call of os.mkdir, loading it is enough to run it"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return os.mkdir, (self.path,)
+
+
+def test_malicious_legacy_pickle_is_refused(tmp_path):
+    marker = tmp_path / 'created'
+    path = tmp_path / 'evil.trs'
+    path.write_bytes(pickle.dumps([[0, 0, 0]]) + pickle.dumps(Payload(str(marker))))
+    with pytest.raises(pickle.UnpicklingError, match='posix.mkdir|os.mkdir|nt.mkdir'):
+        read_project(path)
+    assert not marker.exists()
+
+
+def test_newer_version_is_refused(tmp_path):
+    path = tmp_path / 'newer.trs'
+    save_project(path, space_project())
+    data = path.read_bytes().replace(b'"version": 2', b'"version": 9')
+    path.write_bytes(data)
+    with pytest.raises(ProjectFileError, match='newer'):
+        read_project(path)
+
+
+def test_file_cut_short_is_refused(tmp_path):
+    path = tmp_path / 'short.trs'
+    save_project(path, plane_project())
+    path.write_bytes(path.read_bytes()[:-8])
+    with pytest.raises(ProjectFileError, match='cut short'):
+        read_project(path)
+
+
+@pytest.mark.parametrize('name, values', [
+    ('load_nodes', [0, 2, 2]),
+    ('load_nodes', [4, 2, 5]),
+    ('load_case', [0, 2, 1]),
+    ('load_case', [-1, 1, 1]),
+    ('support_types', [0, 3]),
+    ('support_nodes', [0, 3]),
+    ('members', [(1, 2), (2, 3), (1, 4), (2, 4), (3, 5)]),
+    ('member_property', [1, 1, 2, 2, 3]),
+])
+def test_references_out_of_range_are_refused(tmp_path, name, values):
+    project = plane_project()
+    setattr(project, name, np.array(values, dtype=trsfile.ARRAYS[name][0]))
+    path = tmp_path / 'project.trs'
+    save_project(path, project)
+    with pytest.raises(ProjectFileError, match=name):
+        read_project(path)
+
+
+def test_space_support_types_are_masks(tmp_path):
+    project = space_project()
+    project.support_types = np.array([7, 7, 8], dtype='<i1')
+    path = tmp_path / 'space.trs'
+    save_project(path, project)
+    with pytest.raises(ProjectFileError, match='support_types'):
+        read_project(path)
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+import trsfile
+import truss101
+
+
+def test_bad_file_does_not_stop_a_batch(demo, tmp_path):
+    bad = tmp_path / 'bad.trs'
+    bad.write_bytes(b'not a truss')
+    rows = [truss101.analyze_file(str(path)) for path in (demo('Example 1.trs'), bad)]
+    assert [r['summary'][0][1] for r in rows] == ['stable', 'error']
+    assert rows[0]['members'][0][4] == pytest.approx(2.890173410404623, rel=1e-9)
+    assert all(rows[1][table] == [] for table in truss101.TABLES if table != 'summary')
+
+
+def test_analyze_exit_code(demo, tmp_path):
+    bad = tmp_path / 'bad.trs'
+    bad.write_bytes(b'not a truss')
+    output = str(tmp_path / 'results')
+    assert truss101.main(['analyze', demo('Example 1.trs'), '-o', output, '-j', '1']) == 0
+    assert truss101.main(['analyze', demo('Example 1.trs'), str(bad), '-o', output,
+                          '-j', '1']) == 1
+
+
+def test_json_has_every_table(demo, tmp_path):
+    output = tmp_path / 'results'
+    assert truss101.main(['analyze', demo('Example 1.trs'), '-o', str(output), '-j', '1',
+                          '-f', 'json', '--buckling', '2']) == 0
+    record, = [json.loads(line) for line in (output / 'results.jsonl').read_text().splitlines()]
+    assert record['status'] == 'stable'
+    rows = truss101.analyze_file(demo('Example 1.trs'), buckling=2)
+    for table in truss101.TABLES:
+        if table != 'summary':
+            assert len(record[table]) == len(rows[table]), table
+    assert len(record['cases']) == 19
+    assert record['envelopes'][0]['max_result'] == 'Load'
+    assert record['buckling'][0]['load_factor'] == pytest.approx(rows['buckling'][0][2])
+
+
+@pytest.mark.parametrize('name, units', [
+    ('Example 1.trs', ['m', 'mm', 'kN', 'kN', 'MPa']),
+    ('Example 4.trs', ['ft', 'in', 'k', 'k', 'psi']),
+])
+def test_summary_names_the_unit_of_every_quantity(demo, name, units):
+    rows = truss101.analyze_file(demo(name))
+    summary = dict(zip(truss101.TABLES['summary'], rows['summary'][0]))
+    assert [summary[column] for column in truss101.TABLES['summary'][5:]] == units
+
+
+def test_sweep_exit_code(demo, tmp_path):
+    output = str(tmp_path / 'sweep')
+    assert truss101.main(['sweep', demo('Example 1.trs'), '--grid', 'A=500,1000', '-o', output,
+                          '-j', '1']) == 0
+    flat = tmp_path / 'flat.trs'
+    trsfile.save_project(flat, trsfile.Project(
+        nodes=[(0, 0), (2, 0), (4, 0)], members=[(1, 2), (2, 3)], properties=[(200.0, 1000.0)],
+        support_nodes=[1, 3], support_types=[0, 0], load_nodes=[2], loads=[(10.0, 0.0)]))
+    # a truss without height cannot be stretched to one, every variant is an error
+    assert truss101.main(['sweep', str(flat), '--grid', 'height=1,2', '-o', output,
+                          '-j', '1']) == 1
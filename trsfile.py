@@ -0,0 +1,310 @@
+"""
+GPL-3.0 License
+
+Copyright (C) 2020-2022 Monirul Shawon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Reading and writing .trs project files without Qt
+
+Only what the user typed in the tables is stored, everything else (plot data,
+support and load graphs, dofs) is rebuilt on load.
+
+    0       magic  b'TRS101\\0\\0'
+    8       header length, uint32 little endian
+    12      header, utf-8 json
+                {"version": 1, "unit": {"type": "metric", "index": [0, 1, 0]},
+                 "cases": ["D", "L"], "combinations": {"1.2D+1.6L": {"D": 1.2, "L": 1.6}},
+                 "arrays": {name: {"dtype": "<f8", "shape": [n, 2], "offset": 64}}}
+    ...     arrays, C order, each one starting on a 64 byte boundary
+
+Space trusses are version 2 with "dimensions": 3 in the header, nodes are
+x, y, z, loads are Fx, Fy, Fz and a support type is a mask of the restrained
+directions (1 x, 2 y, 4 z). Plane trusses are still written as version 1 so
+older Truss 101 can open them.
+
+Files written by v1.1.4 and older are a sequence of pickles, they are still
+read but only through an unpickler that refuses anything except plain
+containers and numpy scalars.
+"""
+
+import json
+import mmap
+import pickle
+import re
+import struct
+
+import numpy as np
+
+from loadcases import DEFAULT_CASE
+from solver import TrussModel
+from units import unit_factors
+
+MAGIC = b'TRS101\0\0'
+VERSION = 2
+ALIGNMENT = 64
+
+SUPPORT_TYPES = ['pinned', 'horizontal roller', 'vertical roller']
+
+# name : dtype, columns (None for a flat array, 'dimensions' for 2 or 3)
+ARRAYS = {
+    'nodes': ('<f8', 'dimensions'),  # x, y (, z) as typed in the table
+    'members': ('<i4', 2),          # from node, to node (1 based)
+    'member_property': ('<i4', None),  # row of properties (1 based)
+    'properties': ('<f8', 2),       # E, A
+    'support_nodes': ('<i4', None),
+    'support_types': ('<i1', None),  # index in SUPPORT_TYPES
+    'load_nodes': ('<i4', None),
+    'loads': ('<f8', 'dimensions'),  # magnitude, angle in degree (Fx, Fy, Fz in space)
+    'load_case': ('<i4', None),     # index in cases of every load
+    'densities': ('<f8', None),     # density of every property row
+}
+
+# order in which MainPage.save_to_file used to pickle its attributes
+LEGACY_FIELDS = ['current_metric_index', 'current_imperial_index', 'ndofs', 'X', 'Y',
+                 'X_withoutunit', 'Y_withoutunit', 'node_values', 'degrees_of_freedom',
+                 'member_values', 'elements', 'plot_final', 'plot_displacement_final',
+                 'restrained_dofs', 'support_node', 'support_graph',
+                 'support_displacement_graph', 'support_force', 'forces', 'force_graph',
+                 'properties', 'properties_list']
+
+
+class ProjectFileError(Exception):
+    pass
+
+
+class Project:
+    """
+    canonical content of a .trs file, the tables of a MainPage
+
+    unit_type is 'metric' or 'imperial' and unit_index [length, load, force]
+    cases are the load case names, combinations {name: {case: factor}}
+    dimensions is 2 for a plane truss, 3 for a space truss
+    """
+
+    def __init__(self, unit_type='metric', unit_index=(0, 0, 0), cases=None, combinations=None,
+                 dimensions=2, **arrays):
+        self.unit_type = unit_type
+        self.unit_index = [int(i) for i in unit_index]
+        self.cases = list(cases or [DEFAULT_CASE])
+        self.combinations = dict(combinations or {})
+        if dimensions not in (2, 3):
+            raise ProjectFileError(f'A truss has 2 or 3 dimensions, not {dimensions}')
+        self.dimensions = dimensions
+        for name, (dtype, columns) in ARRAYS.items():
+            if columns == 'dimensions':
+                columns = dimensions
+            shape = (-1, columns) if columns else (-1,)
+            array = arrays.get(name)
+            if array is None:
+                array = np.empty(0, dtype=dtype)
+            self.__dict__[name] = np.asarray(array, dtype=dtype).reshape(shape)
+        # files without load cases put every load in the first one
+        if len(self.load_case) != len(self.load_nodes):
+            self.load_case = np.zeros(len(self.load_nodes), dtype='<i4')
+        # files without densities have massless members
+        if len(self.densities) != len(self.properties):
+            self.densities = np.zeros(len(self.properties))
+
+    def check(self):
+        """
+        every node, property row, load case and support type a file refers to
+        exists, a node 0 would silently wrap to the last node
+        """
+        last_type = 7 if self.dimensions == 3 else len(SUPPORT_TYPES)-1
+        ranges = [('members', self.members, 1, len(self.nodes)),
+                  ('support_nodes', self.support_nodes, 1, len(self.nodes)),
+                  ('support_types', self.support_types, 0, last_type),
+                  ('load_nodes', self.load_nodes, 1, len(self.nodes)),
+                  ('load_case', self.load_case, 0, len(self.cases)-1)]
+        # a single property row is used by every member whatever they say
+        if len(self.properties) > 1:
+            ranges.append(('member_property', self.member_property, 1, len(self.properties)))
+        for name, values, low, high in ranges:
+            if values.size and (values.min() < low or values.max() > high):
+                raise ProjectFileError(f'{name} must be between {low} and {high}')
+        return self
+
+    def factors(self):
+        return unit_factors(self.unit_type, self.unit_index)
+
+    def to_model(self):
+        """TrussModel in the model units, the same way MainPage.node ... assign_property build it"""
+        factors = self.factors()
+        # mapped coordinates go to the solver as they are when no scaling is needed
+        nodes = self.nodes
+        if factors['unit_node'] != 1:
+            nodes = nodes*factors['unit_node']
+
+        if len(self.properties) == 1:
+            rows = np.zeros(len(self.members), dtype=int)
+        else:
+            rows = self.member_property-1
+        properties = self.properties[rows]
+        masses = self.densities[rows]*properties[:, 1]*factors['mass_unit']
+
+        supports = []
+        for node, support_type in zip(self.support_nodes.tolist(), self.support_types.tolist()):
+            if self.dimensions == 3:
+                supports += [3*node-2+axis for axis in range(3) if support_type & (1 << axis)]
+                continue
+            if support_type in (0, 2):
+                supports.append(2*node-1)
+            if support_type in (0, 1):
+                supports.append(2*node)
+
+        loads = self.case_loads().sum(axis=1)
+        return TrussModel(nodes, self.members, properties, sorted(supports), loads, masses)
+
+    def case_loads(self):
+        """(ndofs, cases) load matrix in the model units, a column per load case"""
+        if self.dimensions == 3:
+            components = self.loads*self.factors()['force_unit']
+        else:
+            angle = np.radians(self.loads[:, 1])
+            magnitude = self.loads[:, 0]*self.factors()['force_unit']
+            components = np.column_stack(
+                (np.around(np.cos(angle)*magnitude, decimals=10),
+                 np.around(np.sin(angle)*magnitude, decimals=10)))
+        loads = np.zeros((len(self.nodes), self.dimensions, len(self.cases)))
+        np.add.at(loads, (self.load_nodes-1, slice(None), self.load_case), components)
+        return loads.reshape(-1, len(self.cases))
+
+
+def save_project(path, project):
+    header = {'version': VERSION if project.dimensions == 3 else 1,
+              'unit': {'type': project.unit_type, 'index': project.unit_index},
+              'cases': project.cases,
+              'combinations': project.combinations,
+              'dimensions': project.dimensions,
+              'arrays': {}}
+    arrays = [(name, np.ascontiguousarray(getattr(project, name)))
+              for name in ARRAYS]
+
+    # offsets depend on the header length, which depends on the offsets
+    size = 0
+    while True:
+        offset = ALIGNMENT*(-(-(len(MAGIC) + 4 + size)//ALIGNMENT))
+        for name, array in arrays:
+            header['arrays'][name] = {'dtype': array.dtype.str,
+                                      'shape': list(array.shape), 'offset': offset}
+            offset = ALIGNMENT*(-(-(offset + array.nbytes)//ALIGNMENT))
+        encoded = json.dumps(header).encode('utf-8')
+        if len(encoded) <= size:
+            break
+        size = len(encoded)
+    encoded = encoded.ljust(size)
+
+    with open(path, 'wb') as outfile:
+        outfile.write(MAGIC)
+        outfile.write(struct.pack('<I', size))
+        outfile.write(encoded)
+        for name, array in arrays:
+            outfile.seek(header['arrays'][name]['offset'])
+            outfile.write(array.tobytes())
+
+
+def read_project(path, mapped=True):
+    """
+    Project from a .trs file of any version
+
+    With mapped the arrays of a binary file are views into a read only memory
+    map of it, pages are only read from disk once something touches them and
+    the map is closed when the last array goes away.
+    """
+    with open(path, 'rb') as infile:
+        if infile.read(len(MAGIC)) != MAGIC:
+            return project_from_legacy(read_legacy(path))
+        infile.seek(0)
+        if mapped:
+            buffer = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = infile.read()
+    return project_from_buffer(buffer)
+
+
+def project_from_buffer(buffer):
+    """arrays are numpy views into buffer, nothing is copied"""
+    try:
+        size, = struct.unpack_from('<I', buffer, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(buffer[start:start+size]).decode('utf-8'))
+    except (struct.error, ValueError) as e:
+        raise ProjectFileError(f'Damaged header : {e}')
+    if header.get('version', 0) > VERSION:
+        raise ProjectFileError(
+            f'File version {header["version"]} needs a newer Truss 101')
+
+    arrays = {}
+    for name, info in header['arrays'].items():
+        if name not in ARRAYS:
+            continue
+        dtype = np.dtype(info['dtype'])
+        count = int(np.prod(info['shape']))
+        if info['offset'] + count*dtype.itemsize > len(buffer):
+            raise ProjectFileError(f'{name} is cut short')
+        arrays[name] = np.frombuffer(
+            buffer, dtype=dtype, count=count, offset=info['offset']).reshape(info['shape'])
+    return Project(header['unit']['type'], header['unit']['index'], header.get('cases'),
+                   header.get('combinations'), header.get('dimensions', 2), **arrays).check()
+
+
+class LegacyUnpickler(pickle.Unpickler):
+    """old files only hold dicts, lists, tuples, str, int, float and numpy scalars"""
+    allowed = {('numpy.core.multiarray', 'scalar'), ('numpy._core.multiarray', 'scalar'),
+               ('numpy', 'dtype')}
+
+    def find_class(self, module, name):
+        if (module, name) in self.allowed:
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f'{module}.{name} is not allowed in a .trs file')
+
+
+def read_legacy(path):
+    """attributes of a pickled .trs file, a file cut short keeps what it has"""
+    data = {}
+    with open(path, 'rb') as infile:
+        for field in LEGACY_FIELDS:
+            try:
+                # one unpickler per dump, a memo left over from the previous one breaks the next
+                data[field] = LegacyUnpickler(infile).load()
+            except EOFError:
+                break
+    return data
+
+
+def project_from_legacy(data):
+    if data.get('current_imperial_index'):
+        unit_type, index = 'imperial', data['current_imperial_index']
+    else:
+        unit_type, index = 'metric', data.get('current_metric_index') or [[0, 0, 0]]
+
+    elements = data.get('elements', {})
+    properties = data.get('properties', {})
+    supports = [re.match(r'(\D+)(\d+)', key).groups()
+                for key in data.get('support_graph', {})]
+    loads = list(data.get('force_graph', {}).values())
+
+    return Project(
+        unit_type, index[0],
+        nodes=list(zip(data.get('X_withoutunit', []), data.get('Y_withoutunit', []))),
+        members=list(elements.values()),
+        member_property=[properties[k][1] if k in properties else 1 for k in elements],
+        properties=list(data.get('properties_list', {}).values()),
+        support_nodes=[int(node) for _, node in supports],
+        support_types=[SUPPORT_TYPES.index(name) for name, _ in supports],
+        load_nodes=[v[-2] for v in loads],
+        loads=[(v[3], v[2]) for v in loads]).check()
@@ -19,7 +19,6 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import datetime
 import os
-import pickle
 import re
 import subprocess
 import sys
@@ -33,7 +32,7 @@ from matplotlib.backends.backend_qt5agg import \
     FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5agg import \
     NavigationToolbar2QT as NavigationToolbar
-from numpy.linalg import norm
+from matplotlib.collections import LineCollection
 from PySide2.QtCore import *
 from PySide2.QtGui import *
 from PySide2.QtWidgets import *
@@ -45,7 +44,15 @@ from reportlab.pdfgen import canvas
 from reportlab.platypus import (Image, PageBreak, Paragraph, SimpleDocTemplate,
                                 Spacer, Table, TableStyle)
 
+from loadcases import (DEFAULT_CASE, Envelope, column, combination_matrix,
+                       combine, parse_combinations)
+from movingload import Vehicle, path_nodes, sweep
+from nonlinear import NonlinearSolver
+from solver import (TrussModel, TrussResult, TrussSolver,
+                    UnstableStructureError, todense)
 from supports import *
+import trsfile
+from units import unit_factors
 from ui_truss import Ui_WizardPage
 
 plt.style.use('seaborn-bright')
@@ -168,6 +175,57 @@ class AlignDelegate(QStyledItemDelegate):
         option.displayAlignment = Qt.AlignCenter
 
 
+class AnalysisSignals(QObject):
+    """(kind, job id, output or exception) delivered on the GUI thread"""
+    finished = Signal(str, int, object)
+    failed = Signal(str, int, object)
+
+
+class AnalysisJob(QRunnable):
+    """
+    Run fn on a worker thread and send its output back through signals.
+    A job whose id is no longer the latest of its kind has been superseded
+    by a newer edit and is skipped. fn must not touch widgets or the logger.
+    """
+
+    def __init__(self, signals, kind, job_id, latest, fn):
+        super(AnalysisJob, self).__init__()
+        self.signals = signals
+        self.kind = kind
+        self.job_id = job_id
+        self.latest = latest
+        self.fn = fn
+
+    def run(self):
+        if self.latest(self.kind) != self.job_id:
+            return
+        try:
+            output = self.fn()
+        except Exception as e:
+            self.signals.failed.emit(self.kind, self.job_id, e)
+        else:
+            self.signals.finished.emit(self.kind, self.job_id, output)
+
+
+# node -> member -> support -> force -> assign_property, each stage runs the ones after it
+RECOMPUTE_STAGES = ['node', 'member', 'support', 'force', 'assign_property']
+# milliseconds to wait after the last table edit before recomputing
+RECOMPUTE_DELAY = 150
+# first entry of the result selectors, every load of every case together
+ALL_LOADS = 'All loads'
+# buckling modes computed when they are asked for
+BUCKLING_MODES = 3
+# natural frequencies computed when they are asked for
+VIBRATION_MODES = 6
+# results are kept at full precision, tables and graphs round to this many decimals
+DISPLAY_DIGITS = 4
+
+
+def shown(value, digits=DISPLAY_DIGITS):
+    'a result as it is displayed, rounding never goes back into a calculation'
+    return float(np.round(value, digits))
+
+
 class MainPage(QWizardPage):
     def __init__(self, open=None, filename=None, demo=None, logger=None):
         super(MainPage, self).__init__()
@@ -180,6 +238,27 @@ class MainPage(QWizardPage):
         self.save = 0
         self.change = 0
         self.savedemo = None
+        self.solver = None
+        self.results = []
+        self.load_cases = [DEFAULT_CASE]
+        self.combinations = {}
+
+        'Analysis runs on a worker thread, one at a time since jobs share the solver'
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(1)
+        self.jobs = {}
+        self.job_counter = 0
+        self.requested = []
+        self.analysis_signals = AnalysisSignals()
+        self.analysis_signals.finished.connect(self.job_finished)
+        self.analysis_signals.failed.connect(self.job_failed)
+
+        'Table edits are coalesced and recomputed once typing pauses'
+        self.pending_stage = None
+        self.recompute_timer = QTimer(self)
+        self.recompute_timer.setSingleShot(True)
+        self.recompute_timer.setInterval(RECOMPUTE_DELAY)
+        self.recompute_timer.timeout.connect(self.recompute)
 
         if self.demo:
             self.savedemo = True
@@ -196,6 +275,7 @@ class MainPage(QWizardPage):
         self.force_unit = 1
         self.bar_force_unit = 1
         self.stress_unit = 1000
+        self.mass_unit = 1/(144*1000*32.174049)
         self.force_unit_name = 'k'
         self.unit_report = [
             'ft', 'kip (k)', 'kip (k)', 'ksi', 'in<super size=6>2</super>', 'in']
@@ -320,9 +400,6 @@ class MainPage(QWizardPage):
             self.ui.tableWidget_supports.setCellWidget(i, 1, supports_cb)
             supports_cb.currentIndexChanged.connect(self.support)
 
-        if self.open:
-            self.open_from_file()
-
         '''table update'''
         self.ui.update_loads.clicked.connect(
             lambda: self.ui.tableWidget_loads.setRowCount(self.ui.spinBox_loads.value()))
@@ -334,24 +411,29 @@ class MainPage(QWizardPage):
         self.ui.update_property.clicked.connect(self.property_table)
 
         self.ui.update_nodes.clicked.connect(self.node)
-        self.ui.tableWidget_nodes.cellChanged.connect(self.node)
+        self.ui.tableWidget_nodes.cellChanged.connect(
+            lambda: self.schedule('node'))
         self.ui.tableWidget_nodes.cellChanged.connect(self.update_change)
 
         self.ui.update_members.clicked.connect(self.member)
-        self.ui.tableWidget_members.cellChanged.connect(self.member)
+        self.ui.tableWidget_members.cellChanged.connect(
+            lambda: self.schedule('member'))
         self.ui.tableWidget_members.cellChanged.connect(self.update_change)
 
         self.ui.update_supports.clicked.connect(self.support)
-        self.ui.tableWidget_supports.cellChanged.connect(self.support)
+        self.ui.tableWidget_supports.cellChanged.connect(
+            lambda: self.schedule('support'))
         self.ui.tableWidget_supports.cellChanged.connect(
             self.update_change)
 
         self.ui.update_loads.clicked.connect(self.force)
-        self.ui.tableWidget_loads.cellChanged.connect(self.force)
+        self.ui.tableWidget_loads.cellChanged.connect(
+            lambda: self.schedule('force'))
         self.ui.tableWidget_loads.cellChanged.connect(self.update_change)
 
         self.ui.update_property.clicked.connect(self.assign_property)
-        self.ui.tableWidget_property.cellChanged.connect(self.assign_property)
+        self.ui.tableWidget_property.cellChanged.connect(
+            lambda: self.schedule('assign_property'))
         self.ui.pushbutton_properties.clicked.connect(self.assign_property)
         self.ui.tableWidget_property.cellChanged.connect(
             self.update_change)
@@ -380,6 +462,52 @@ class MainPage(QWizardPage):
         self.ui.projectName.setPlaceholderText('Project Truss')
         self.ui.userName.setPlaceholderText('Anonymous')
 
+        'Load cases and combinations'
+        self.ui.tableWidget_loads.setColumnCount(4)
+        self.ui.tableWidget_loads.setHorizontalHeaderItem(
+            3, QTableWidgetItem('Case'))
+        self.combinations_edit = QLineEdit(self.ui.page_loads)
+        self.combinations_edit.setPlaceholderText(
+            'Load combinations e.g. 1.2D+1.6L, 0.9D+1.0W')
+        self.combinations_edit.setToolTip(
+            'Cases are named in the Case column, an empty case is ' + DEFAULT_CASE)
+        self.ui.gridLayout_3.addWidget(self.combinations_edit, 5, 0, 1, 3)
+        self.combinations_edit.editingFinished.connect(
+            lambda: self.schedule('force'))
+        self.combinations_edit.textEdited.connect(self.update_change)
+        self.nonlinear_check = QCheckBox(
+            'Large displacements (geometric nonlinear)', self.ui.page_loads)
+        self.nonlinear_check.setToolTip(
+            'Every load case and combination is followed step by step on the deformed truss')
+        self.ui.gridLayout_3.addWidget(self.nonlinear_check, 6, 0, 1, 3)
+        self.nonlinear_check.toggled.connect(lambda: self.schedule('force'))
+        self.buckling_check = QCheckBox(
+            'Buckling modes of all loads', self.ui.page_loads)
+        self.buckling_check.setToolTip(
+            'Lowest critical load factors, their mode shapes are shown with the displacements')
+        self.ui.gridLayout_3.addWidget(self.buckling_check, 7, 0, 1, 3)
+        self.buckling_check.toggled.connect(lambda: self.schedule('force'))
+        self.frequency_check = QCheckBox(
+            'Natural frequencies', self.ui.page_loads)
+        self.frequency_check.setToolTip(
+            'Lowest vibration modes from the member densities, their shapes are shown with the displacements')
+        self.ui.gridLayout_3.addWidget(self.frequency_check, 8, 0, 1, 3)
+        self.frequency_check.toggled.connect(lambda: self.schedule('force'))
+
+        'Member density for natural frequencies, an empty cell is no mass'
+        self.ui.tableWidget_property.setColumnCount(3)
+        self.ui.tableWidget_property.setHorizontalHeaderItem(
+            2, QTableWidgetItem('Density'))
+
+        'All loads, a single load case or a combination on the result pages'
+        self.result_selectors = []
+        for layout, row in ((self.ui.gridLayout_9, 5), (self.ui.gridLayout_10, 6)):
+            selector = QComboBox()
+            selector.addItem(ALL_LOADS)
+            selector.currentIndexChanged.connect(self.show_result)
+            layout.addWidget(selector, row, 0, 1, 1)
+            self.result_selectors.append(selector)
+
         'Table no edit triggers and setColumnWidth'
         self.ui.tableWidget_loads.setColumnWidth(1, 100)
 
@@ -424,6 +552,22 @@ class MainPage(QWizardPage):
         self.ui.comboBox_influence.currentIndexChanged.connect(
             self.influence_table)
 
+        'Vehicle driven over the load path'
+        self.vehicle_edit = QLineEdit(self.ui.page_influenceLine)
+        self.vehicle_edit.setPlaceholderText(
+            'Vehicle axle loads ; spacings e.g. 35, 145, 145 ; 4.3, 4.3')
+        self.vehicle_edit.setToolTip(
+            'Axle loads from the front axle in the unit of load, spacings in the unit of length')
+        self.ui.gridLayout_11.addWidget(self.vehicle_edit, 8, 0, 1, 1)
+        self.vehicle_label = QLabel(self.ui.page_influenceLine)
+        self.ui.gridLayout_11.addWidget(self.vehicle_label, 8, 1, 1, 4)
+        self.vehicle_edit.editingFinished.connect(self.vehicle_sweep)
+        self.vehicle_result = None
+
+        # last, every column and widget a project fills has to exist by now
+        if self.open:
+            self.open_from_file()
+
     '''
     opening from a file
     '''
@@ -433,139 +577,154 @@ class MainPage(QWizardPage):
         if not self.filename:
             self.filename = QFileDialog.getOpenFileName(
                 self, 'Open file', currentdirectory, "Truss101 files (*.trs)")
-        with open(self.filename[0], 'rb') as outfile:
-            try:
-                self.current_metric_index = pickle.load(outfile)
-                self.current_imperial_index = pickle.load(outfile)
-                self.ndofs = pickle.load(outfile)
-                self.X = pickle.load(outfile)
-                self.Y = pickle.load(outfile)
-                self.X_withoutunit = pickle.load(outfile)
-                self.Y_withoutunit = pickle.load(outfile)
-                self.node_values = pickle.load(outfile)
-                self.degrees_of_freedom = pickle.load(outfile)
-                self.member_values = pickle.load(outfile)
-                self.elements = pickle.load(outfile)
-                self.plot_final = pickle.load(outfile)
-                self.plot_displacement_final = pickle.load(outfile)
-                self.restrained_dofs = pickle.load(outfile)
-                self.support_node = pickle.load(outfile)
-                self.support_graph = pickle.load(outfile)
-                self.support_displacement_graph = pickle.load(outfile)
-                self.support_force = pickle.load(outfile)
-                self.forces = pickle.load(outfile)
-                self.force_graph = pickle.load(outfile)
-                self.properties = pickle.load(outfile)
-                self.properties_list = pickle.load(outfile)
-
-                self.max_X = max(self.X)
-                self.max_Y = max(self.Y)
-                self.min_X = min(self.X)
-                self.min_Y = min(self.Y)
-                self.max_XY = max(self.max_X, self.max_Y)
-                self.min_XY = min(self.max_X, self.max_Y)
+        try:
+            project = trsfile.read_project(self.filename[0])
+        except Exception as e:
+            self.logger.error('Could not open %s : %s', self.filename[0], e)
+            return
+        if project.dimensions != 2:
+            self.logger.error('%s is a space truss, use truss101.py analyze or view',
+                              self.filename[0])
+            return
+
+        if project.unit_type == 'imperial':
+            self.current_metric_index = []
+            self.current_imperial_index = [project.unit_index]
+        else:
+            self.current_metric_index = [project.unit_index]
+            self.current_imperial_index = []
+        self.preview(project)
 
-            except:
-                self.max_X = max(self.X)
-                self.max_Y = max(self.Y)
-                self.min_X = min(self.X)
-                self.min_Y = min(self.Y)
-                self.max_XY = max(self.max_X, self.max_Y)
-                self.min_XY = min(self.max_X, self.max_Y)
+        # node
+        self.block_table_signals(True)
+        self.ui.tableWidget_nodes.setRowCount(len(project.nodes))
+        self.ui.spinBox_nodes.setValue(len(project.nodes))
+        for i, (x, y) in enumerate(project.nodes.tolist()):
+            self.ui.tableWidget_nodes.setItem(i, 0, QTableWidgetItem(str(x)))
+            self.ui.tableWidget_nodes.setItem(i, 1, QTableWidgetItem(str(y)))
+
+        # member
+        self.ui.tableWidget_members.setRowCount(len(project.members))
+        self.ui.spinBox_members.setValue(len(project.members))
+        if len(project.properties) > 1:
+            self.ui.spinBox_property.setValue(len(project.properties))
+            self.ui.tableWidget_members.setColumnCount(3)
+            self.ui.tableWidget_members.setHorizontalHeaderLabels(
+                ['From\nNode', 'To\nNode', 'property'])
+            self.ui.tableWidget_members.setColumnWidth(0, 80)
+            self.ui.tableWidget_members.setColumnWidth(1, 80)
+            item = [str(i) for i in range(1, len(project.properties)+1)]
+            for row, number in enumerate(project.member_property.tolist()):
+                property_cb = QComboBox()
+                property_cb.addItems(item)
+                property_cb.setCurrentText(str(number))
+                self.ui.tableWidget_members.setCellWidget(row, 2, property_cb)
+                property_cb.currentIndexChanged.connect(self.assign_property)
+        for row, (node1, node2) in enumerate(project.members.tolist()):
+            self.ui.tableWidget_members.setItem(
+                row, 0, QTableWidgetItem(str(node1)))
+            self.ui.tableWidget_members.setItem(
+                row, 1, QTableWidgetItem(str(node2)))
+
+        # supports
+        self.ui.tableWidget_supports.setRowCount(len(project.support_nodes))
+        self.ui.spinBox_supports.setValue(len(project.support_nodes))
+        for row, (node, support_type) in enumerate(zip(project.support_nodes.tolist(),
+                                                        project.support_types.tolist())):
+            supports_cb = QComboBox()
+            supports_cb.addItems(trsfile.SUPPORT_TYPES)
+            supports_cb.setCurrentIndex(support_type)
+            self.ui.tableWidget_supports.setItem(
+                row, 0, QTableWidgetItem(str(node)))
+            self.ui.tableWidget_supports.setCellWidget(row, 1, supports_cb)
+            supports_cb.currentIndexChanged.connect(self.support)
 
-                self.graph()
-                pass
+        # loads
+        self.ui.tableWidget_loads.setRowCount(len(project.load_nodes))
+        self.ui.spinBox_loads.setValue(len(project.load_nodes))
+        for row, (node, (magnitude, angle), case) in enumerate(zip(project.load_nodes.tolist(),
+                                                                    project.loads.tolist(),
+                                                                    project.load_case.tolist())):
+            self.ui.tableWidget_loads.setItem(
+                row, 0, QTableWidgetItem(str(node)))
+            self.ui.tableWidget_loads.setItem(
+                row, 1, QTableWidgetItem(str(magnitude)))
+            self.ui.tableWidget_loads.setItem(
+                row, 2, QTableWidgetItem(str(angle)))
+            self.ui.tableWidget_loads.setItem(
+                row, 3, QTableWidgetItem(project.cases[case]))
+        self.combinations_edit.setText(', '.join(project.combinations))
+
+        # property
+        self.ui.tableWidget_property.setRowCount(len(project.properties))
+        self.ui.spinBox_property.setValue(len(project.properties))
+        for row, (stiffness, area) in enumerate(project.properties.tolist()):
+            self.ui.tableWidget_property.setItem(
+                row, 0, QTableWidgetItem(str(stiffness)))
+            self.ui.tableWidget_property.setItem(
+                row, 1, QTableWidgetItem(str(area)))
+            density = project.densities[row]
+            self.ui.tableWidget_property.setItem(
+                row, 2, QTableWidgetItem(str(density) if density else ''))
+        self.block_table_signals(False)
+
+        # a bulk load is one recompute of every stage, nothing typed before it is left to run
+        self.recompute_timer.stop()
+        self.pending_stage = None
+
+        'plot data, supports and load graphs are rebuilt from the tables'
+        self.change_unit_label(unit=[project.unit_index], type=project.unit_type)
+        # unit_convert runs node(), the one full recompute
+        self.unit_convert(type=project.unit_type)
+        self.change = 0
+        self.save += 1
 
-            # node
+    def preview(self, project):
+        '''
+        members drawn straight from the (memory mapped) file while the tables
+        are still being filled, graph() replaces it once node() has run
+        '''
         try:
-            self.ui.tableWidget_nodes.setRowCount(len(self.X_withoutunit))
-            self.ui.spinBox_nodes.setValue(len(self.X_withoutunit))
-
-            for i, (j, k) in enumerate(zip(self.X_withoutunit, self.Y_withoutunit)):
-                self.ui.tableWidget_nodes.setItem(
-                    i, 0, QTableWidgetItem(str(j)))
-                self.ui.tableWidget_nodes.setItem(
-                    i, 1, QTableWidgetItem(str(k)))
-            # member
-            self.ui.tableWidget_members.setRowCount(len(self.elements))
-            self.ui.spinBox_members.setValue(len(self.elements))
-            if len(self.properties_list) > 1:
-                self.ui.spinBox_property.setValue(len(self.properties_list))
-                self.ui.tableWidget_members.setColumnCount(3)
-                self.ui.tableWidget_members.setHorizontalHeaderLabels(
-                    ['From\nNode', 'To\nNode', 'property'])
-                self.ui.tableWidget_members.setColumnWidth(0, 80)
-                self.ui.tableWidget_members.setColumnWidth(1, 80)
-                for k, v in self.elements.items():
-                    property_cb = QComboBox()
-                    item = [str(i) for i in range(
-                        1, self.ui.spinBox_property.value()+1)]
-                    property_cb.addItems(item)
-                    property_cb.setCurrentText(str(self.properties[k][1]))
-                    self.ui.tableWidget_members.setCellWidget(
-                        k-1, 2, property_cb)
-                    self.ui.tableWidget_members.setItem(
-                        k-1, 0, QTableWidgetItem(str(v[0])))
-                    self.ui.tableWidget_members.setItem(
-                        k-1, 1, QTableWidgetItem(str(v[1])))
-            else:
-                for k, v in self.elements.items():
-                    self.ui.tableWidget_members.setItem(
-                        k-1, 0, QTableWidgetItem(str(v[0])))
-                    self.ui.tableWidget_members.setItem(
-                        k-1, 1, QTableWidgetItem(str(v[1])))
-
-            # supports
-            self.ui.tableWidget_supports.setRowCount(len(self.support_node))
-            self.ui.spinBox_supports.setValue(len(self.support_node))
-            for i, j in enumerate(self.support_graph.keys()):
-                supports_cb = QComboBox()
-                supports_cb.addItems(
-                    ['pinned', 'horizontal roller', 'vertical roller'])
-                node = re.findall(r'\d+', j)
-                string = j.replace(node[0], '')
-                supports_cb.setCurrentText(string)
-                self.ui.tableWidget_supports.setItem(
-                    i, 0, QTableWidgetItem(node[0]))
-                self.ui.tableWidget_supports.setCellWidget(i, 1, supports_cb)
-                supports_cb.currentIndexChanged.connect(self.support)
-
-            # loads
-            self.ui.tableWidget_loads.setRowCount(len(self.force_graph))
-            self.ui.spinBox_loads.setValue(len(self.force_graph))
-            for k, v in self.force_graph.items():
-                self.ui.tableWidget_loads.setItem(
-                    k, 0, QTableWidgetItem(str(v[-2])))
-                self.ui.tableWidget_loads.setItem(
-                    k, 1, QTableWidgetItem(str(v[3])))
-                self.ui.tableWidget_loads.setItem(
-                    k, 2, QTableWidgetItem(str(v[2])))
-            # property
-            self.ui.tableWidget_property.setRowCount(len(self.properties_list))
-            self.ui.spinBox_property.setValue(len(self.properties_list))
-            for k, v in self.properties_list.items():
-                self.ui.tableWidget_property.setItem(
-                    k-1, 0, QTableWidgetItem(str(v[0])))
-                self.ui.tableWidget_property.setItem(
-                    k-1, 1, QTableWidgetItem(str(v[1])))
-
-        except:
+            self.graph_widget.figure1.clear()
+            ax = self.graph_widget.figure1.add_subplot(111)
+            ax.add_collection(LineCollection(
+                project.nodes[project.members-1], linewidths=1, colors='k'))
+            ax.autoscale()
+            ax.set_aspect('equal', adjustable='datalim')
+            ax.axis('off')
+            self.graph_widget.canvas1.draw()
+            QApplication.processEvents()
+        except IndexError:
             pass
-        if self.current_imperial_index:
-            self.change_unit_label(
-                unit=self.current_imperial_index, type='imperial')
-            self.unit_convert(type='imperial')
-        elif self.current_metric_index:
-            self.change_unit_label(
-                unit=self.current_metric_index, type='metric')
-            self.unit_convert(type='metric')
-        self.change = 0
-        self.save += 1
 
     '''
     save into a file
     '''
 
+    def project(self):
+        'the tables as they are stored in a .trs file'
+        if self.current_imperial_index:
+            unit_type, index = 'imperial', self.current_imperial_index[0]
+        else:
+            unit_type, index = 'metric', self.current_metric_index[0]
+
+        supports = [re.match(r'(\D+)(\d+)', key).groups()
+                    for key in self.support_graph]
+        loads = list(self.force_graph.values())
+        return trsfile.Project(
+            unit_type, index, self.load_cases, self.combinations,
+            nodes=self.table_nodes,
+            members=self.elements,
+            member_property=self.member_property,
+            properties=self.property_rows,
+            densities=self.property_density,
+            support_nodes=[int(node) for _, node in supports],
+            support_types=[trsfile.SUPPORT_TYPES.index(name)
+                           for name, _ in supports],
+            load_nodes=[v[4] for v in loads],
+            loads=[(v[3], v[2]) for v in loads],
+            load_case=[self.load_cases.index(self.force_case[k]) for k in self.force_graph])
+
     def save_to_file(self, saveas=None):
         self.saveas = saveas
         currentdirectory = os.path.expanduser('~/Documents')
@@ -580,34 +739,13 @@ class MainPage(QWizardPage):
             self.filename = QFileDialog.getSaveFileName(
                 self, 'Save file', currentdirectory, "Truss101 files (*.trs)")
 
-        with open(self.filename[0], 'wb') as outfile:
-            self.change = 0
-            self.save += 1
-            try:
-                pickle.dump(self.current_metric_index, outfile)
-                pickle.dump(self.current_imperial_index, outfile)
-                pickle.dump(self.ndofs, outfile)
-                pickle.dump(self.X, outfile)
-                pickle.dump(self.Y, outfile)
-                pickle.dump(self.X_withoutunit, outfile)
-                pickle.dump(self.Y_withoutunit, outfile)
-                pickle.dump(self.node_values, outfile)
-                pickle.dump(self.degrees_of_freedom, outfile)
-                pickle.dump(self.member_values, outfile)
-                pickle.dump(self.elements, outfile)
-                pickle.dump(self.plot_final, outfile)
-                pickle.dump(self.plot_displacement_final, outfile)
-                pickle.dump(self.restrained_dofs, outfile)
-                pickle.dump(self.support_node, outfile)
-                pickle.dump(self.support_graph, outfile)
-                pickle.dump(self.support_displacement_graph, outfile)
-                pickle.dump(self.support_force, outfile)
-                pickle.dump(self.forces, outfile)
-                pickle.dump(self.force_graph, outfile)
-                pickle.dump(self.properties, outfile)
-                pickle.dump(self.properties_list, outfile)
-            except:
-                pass
+        try:
+            trsfile.save_project(self.filename[0], self.project())
+        except Exception as e:
+            self.logger.error('Could not save %s : %s', self.filename[0], e)
+            return
+        self.change = 0
+        self.save += 1
 
     '''
     add comboBox in table
@@ -681,29 +819,31 @@ class MainPage(QWizardPage):
     '''
 
     def node(self):
+        'node runs every stage, nothing is left pending'
+        self.recompute_timer.stop()
+        self.pending_stage = None
+
         self.ui.tableWidget_nodes.setRowCount(self.ui.spinBox_nodes.value())
-        self.X = []
-        self.Y = []
-        self.X_withoutunit = []
-        self.Y_withoutunit = []
-        self.node_values = {}
-        self.degrees_of_freedom = {}
-        for row in range(1, self.ui.spinBox_nodes.value()+1):
+        table = []
+        for row in range(self.ui.spinBox_nodes.value()):
             try:
-                x = float(self.ui.tableWidget_nodes.item(row-1, 0).text())
-                y = float(self.ui.tableWidget_nodes.item(row-1, 1).text())
-                self.X.append(x*self.unit_node)
-                self.Y.append(y*self.unit_node)
-                self.X_withoutunit.append(x)
-                self.Y_withoutunit.append(y)
-                self.node_values[row] = x*self.unit_node, y*self.unit_node
-                self.degrees_of_freedom[row] = 2*row-1, 2*row
+                x = float(self.ui.tableWidget_nodes.item(row, 0).text())
+                y = float(self.ui.tableWidget_nodes.item(row, 1).text())
+                table.append((x, y))
             except:
                 continue
-        self.ndofs = 2*len(self.node_values)
+
+        # node k is row k-1 of every (n, ...) array
+        self.table_nodes = np.array(table, dtype=float).reshape(-1, 2)
+        self.coordinates = self.table_nodes*self.unit_node
+        self.X, self.Y = self.coordinates.T
+        self.X_withoutunit, self.Y_withoutunit = self.table_nodes.T
+        self.ndofs = 2*len(self.coordinates)
+        self.degrees_of_freedom = np.arange(
+            1, self.ndofs+1).reshape(-1, 2)
         self.logger.debug('Number of degrees of freedom : %s', self.ndofs)
         self.logger.debug('Degrees of freedom : %s', self.degrees_of_freedom)
-        self.logger.debug('Node values : %s', self.node_values)
+        self.logger.debug('Node coordinates : %s', self.coordinates)
 
         try:
             self.max_X = max(self.X)
@@ -718,44 +858,32 @@ class MainPage(QWizardPage):
 
         self.member()
 
+    def node_position(self, node):
+        'coordinates of a 1-based node number, IndexError if the node is not in the table'
+        if node < 1:
+            raise IndexError(f'node {node}')
+        return self.coordinates[node-1]
+
     def member(self):
         self.ui.tableWidget_members.setRowCount(
             self.ui.spinBox_members.value())
-        self.member_values = {}
-        self.elements = {}
-        From_node = []
-        To_node = []
-
-        plot_x1 = []
-        plot_x2 = []
-        plot_y1 = []
-        plot_y2 = []
-        self.plot_final = {}
-        self.plot_displacement_final = {}
+        table = []
         for row in range(self.ui.spinBox_members.value()):
             try:
                 node1 = int(self.ui.tableWidget_members.item(row, 0).text())
                 node2 = int(self.ui.tableWidget_members.item(row, 1).text())
-
-                for k, v in self.node_values.items():
-                    if node1 == k:
-                        From_node = v
-                        plot_x1 = v[0]
-                        plot_y1 = v[1]
-                    elif node2 == k:
-                        To_node = v
-                        plot_x2 = v[0]
-                        plot_y2 = v[1]
-                    self.plot_final[row+1] = (plot_x1,
-                                              plot_x2), (plot_y1, plot_y2)
-                    self.plot_displacement_final[row+1] = (plot_x1*self.reverse_unit, plot_x2 *
-                                                           self.reverse_unit), (plot_y1*self.reverse_unit, plot_y2*self.reverse_unit)
-                    self.member_values[row+1] = From_node, To_node
-                self.elements[row+1] = node1, node2
+                table.append((node1, node2))
             except:
                 continue
+        self.elements = np.array(table, dtype=int).reshape(-1, 2)
+
+        # ((x1, x2), (y1, y2)) of every member, nan for a member with a missing node
+        valid = ((self.elements >= 1) & (self.elements <= len(self.coordinates))).all(axis=1)
+        ends = np.full((len(self.elements), 2, 2), np.nan)
+        ends[valid] = self.coordinates[self.elements[valid]-1]
+        self.plot_final = ends.transpose(0, 2, 1)
+        self.plot_displacement_final = self.plot_final*self.reverse_unit
 
-        self.logger.debug('Member values : %s', self.member_values)
         self.logger.debug('Elements : %s', self.elements)
         self.logger.debug('Member plot data : %s', self.plot_final)
         self.logger.debug('Member displacement data : %s',
@@ -779,8 +907,7 @@ class MainPage(QWizardPage):
                     row, 1).currentIndex()
 
                 self.support_node.append(node)
-                p = self.node_values[node][0]
-                q = self.node_values[node][1]
+                p, q = self.node_position(node).tolist()
                 # Pinned Support
                 if support_type == 0:
                     self.restrained_dofs.append(2*node-1)
@@ -855,10 +982,11 @@ class MainPage(QWizardPage):
         self.force()
 
     def force(self):
-        self.forces = {}
+        self.forces = np.zeros((len(self.coordinates), 2))
         self.force_graph = {}
-        for i in range(1, self.ui.spinBox_nodes.value()+1):
-            self.forces[i] = 0, 0
+        self.force_case = {}
+        self.load_cases = []
+        case_loads = []
 
         for row in range(self.ui.spinBox_loads.value()):
             try:
@@ -866,19 +994,27 @@ class MainPage(QWizardPage):
                 magnitude = float(
                     self.ui.tableWidget_loads.item(row, 1).text())
                 angle = float(self.ui.tableWidget_loads.item(row, 2).text())
-
-                force_x = np.around((np.cos(np.radians(
-                    angle)))*magnitude*self.force_unit, decimals=10) + self.forces[node][0]
-                force_y = np.around((np.sin(np.radians(
-                    angle)))*magnitude*self.force_unit, decimals=10) + self.forces[node][1]
-                self.forces[node] = force_x, force_y
+                p, q = self.node_position(node).tolist()
+                case = self.ui.tableWidget_loads.item(row, 3)
+                case = case.text().strip() if case and case.text().strip() else DEFAULT_CASE
+
+                load_x = np.around((np.cos(np.radians(
+                    angle)))*magnitude*self.force_unit, decimals=10)
+                load_y = np.around((np.sin(np.radians(
+                    angle)))*magnitude*self.force_unit, decimals=10)
+                force_x = load_x + self.forces[node-1, 0]
+                force_y = load_y + self.forces[node-1, 1]
+                self.forces[node-1] = force_x, force_y
+
+                if case not in self.load_cases:
+                    self.load_cases.append(case)
+                case_loads.append((node-1, self.load_cases.index(case), load_x, load_y))
+                self.force_case[row] = case
 
                 if node in self.support_node:
                     self.support_force[node*2-1] = force_x
                     self.support_force[node*2] = force_y
 
-                p = self.node_values[node][0]
-                q = self.node_values[node][1]
                 positive_angle = angle % 360
                 if positive_angle >= 0 and positive_angle < 60:
                     self.force_graph[row] = p, q, angle, magnitude, node, f'right'
@@ -893,44 +1029,64 @@ class MainPage(QWizardPage):
             except:
                 continue
 
+        # (n, 2, cases), the loads of every case on their own
+        self.load_cases = self.load_cases or [DEFAULT_CASE]
+        self.case_forces = np.zeros(
+            (len(self.coordinates), 2, len(self.load_cases)))
+        for node, case, load_x, load_y in case_loads:
+            self.case_forces[node, :, case] += load_x, load_y
+
+        try:
+            self.combinations = parse_combinations(
+                self.combinations_edit.text())
+        except ValueError as e:
+            self.logger.error('Load combinations : %s', e)
+            self.combinations = {}
+
         self.logger.debug('Forces : %s', self.forces)
         self.logger.debug('Force graph : %s', self.force_graph)
+        self.logger.debug('Load cases : %s', self.load_cases)
+        self.logger.debug('Load combinations : %s', self.combinations)
 
         self.assign_property()
 
     def assign_property(self):
-        self.properties_list = {}
-        self.properties = {}
+        'property_rows holds (E, A) of every property row, nan if it is not filled in'
         properties_number = int(self.ui.spinBox_property.value())
-        member = int(self.ui.spinBox_members.value())
+        self.member_property = np.ones(len(self.elements), dtype=int)
+        self.property_density = np.zeros(properties_number)
+        for row in range(properties_number):
+            try:
+                self.property_density[row] = float(
+                    self.ui.tableWidget_property.item(row, 2).text())
+            except (AttributeError, ValueError):
+                continue
         if properties_number == 1:
             stiffness = float(self.ui.tableWidget_property.item(0, 0).text())
             area = float(self.ui.tableWidget_property.item(0, 1).text())
-            self.properties_list[1] = stiffness, area
-            for i in range(1, member+1):
-                self.properties[i] = (stiffness, area), 1
+            self.property_rows = np.array([[stiffness, area]])
         else:
-            for i in range(1, properties_number+1):
+            self.property_rows = np.full((properties_number, 2), np.nan)
+            for row in range(properties_number):
                 try:
                     stiffness = float(
-                        self.ui.tableWidget_property.item(i-1, 0).text())
+                        self.ui.tableWidget_property.item(row, 0).text())
                     area = float(
-                        self.ui.tableWidget_property.item(i-1, 1).text())
-                    self.properties_list[i] = stiffness, area
+                        self.ui.tableWidget_property.item(row, 1).text())
+                    self.property_rows[row] = stiffness, area
                 except:
                     continue
 
-            for row in range(member):
+            for row in range(len(self.elements)):
                 try:
-                    number = int(self.ui.tableWidget_members.cellWidget(
+                    self.member_property[row] = int(self.ui.tableWidget_members.cellWidget(
                         row, 2).currentText())
-                    self.properties[row +
-                                    1] = self.properties_list[number], number
                 except:
                     continue
 
-        self.logger.debug('Unique properties : %s', self.properties_list)
-        self.logger.debug('Member assigned properties : %s', self.properties)
+        self.logger.debug('Unique properties : %s', self.property_rows)
+        self.logger.debug('Member assigned properties : %s',
+                          self.member_property)
 
         self.calculation()
         self.graph()
@@ -1035,221 +1191,215 @@ class MainPage(QWizardPage):
         self.type = type
         if self.type == 'metric':
             self.logger.debug('Metric unit : %s', self.current_metric_index)
-
-            # Length
-            if self.current_metric_index[0][0] == 0:
-                self.unit_node = 1
-                self.displacement_unit = 1000
-                self.reverse_unit = 1
-                self.displacement_factor = 0.01
-                # Load
-                if self.current_metric_index[0][1] == 0:
-                    self.force_unit = 1
-                    self.force_unit_name = 'kN'
-                elif self.current_metric_index[0][1] == 1:
-                    self.force_unit = 0.001
-                    self.force_unit_name = 'N'
-                elif self.current_metric_index[0][1] == 2:
-                    self.force_unit = 0.00980665
-                    self.force_unit_name = 'kg'
-
-                # Force
-                if self.current_metric_index[0][2] == 0:
-                    self.bar_force_unit = 1/1000  # (1/1000)/1
-                    self.stress_unit = 1000
-                elif self.current_metric_index[0][2] == 1:
-                    self.bar_force_unit = 1  # (1/1000)/0.001
-                    self.stress_unit = 1
-                elif self.current_metric_index[0][2] == 2:
-                    self.bar_force_unit = (1/1000)/0.00980665
-                    self.stress_unit = 9.80665
-
-                self.node()
-                self.displacement()
-                self.influence_line()
-
-            elif self.current_metric_index[0][0] == 1:
-                self.unit_node = 0.001
-                self.displacement_unit = 1
-                self.reverse_unit = 1000
-                self.displacement_factor = 0.01
-                # Load
-                if self.current_metric_index[0][1] == 0:
-                    self.force_unit = 1000
-                    self.force_unit_name = 'kN'
-                elif self.current_metric_index[0][1] == 1:
-                    self.force_unit = 1
-                    self.force_unit_name = 'N'
-                elif self.current_metric_index[0][1] == 2:
-                    self.force_unit = 9.80665
-                    self.force_unit_name = 'kg'
-
-                # Force
-                if self.current_metric_index[0][2] == 0:
-                    self.bar_force_unit = 1/1000  # (1/1000)/1
-                    self.stress_unit = 1000
-                elif self.current_metric_index[0][2] == 1:
-                    self.bar_force_unit = 1  # (1/1000)/0.001
-                    self.stress_unit = 1
-                elif self.current_metric_index[0][2] == 2:
-                    self.bar_force_unit = (1/1000)/0.00980665
-                    self.stress_unit = 9.80665
-
-                self.node()
-                self.displacement()
-                self.influence_line()
-
+            index = self.current_metric_index
         else:
             self.logger.debug('Imperial unit : %s',
                               self.current_imperial_index)
-
-            # Length
-            if self.current_imperial_index[0][0] == 0:
-                self.unit_node = 1
-                self.displacement_unit = 12
-                self.reverse_unit = 1
-                self.displacement_factor = 0.1
-                # Load
-                if self.current_imperial_index[0][1] == 0:
-                    self.force_unit = 1
-                    self.force_unit_name = 'k'
-                elif self.current_imperial_index[0][1] == 1:
-                    self.force_unit = 0.001
-                    self.force_unit_name = 'lb'
-
-                # Force
-                if self.current_imperial_index[0][2] == 0:
-                    self.bar_force_unit = 1/12
-                    self.stress_unit = 1000
-                elif self.current_imperial_index[0][2] == 1:
-                    self.bar_force_unit = (1/12)*1000
-                    self.stress_unit = 1
-
-                self.node()
-                self.displacement()
-                self.influence_line()
-
-            elif self.current_imperial_index[0][0] == 1:
-                self.unit_node = 1/12
-                self.displacement_unit = 1
-                self.reverse_unit = 12
-                self.displacement_factor = 0.1
-                # Load
-                if self.current_imperial_index[0][1] == 0:
-                    self.force_unit = 12
-                    self.force_unit_name = 'k'
-                elif self.current_imperial_index[0][1] == 1:
-                    self.force_unit = 0.012
-                    self.force_unit_name = 'lb'
-
-                # Force
-                if self.current_imperial_index[0][2] == 0:
-                    self.bar_force_unit = 1/12
-                    self.stress_unit = 1000
-                elif self.current_imperial_index[0][2] == 1:
-                    self.bar_force_unit = (1/12)*1000
-                    self.stress_unit = 1
-
-                self.node()
-                self.displacement()
-                self.influence_line()
+            index = self.current_imperial_index
+
+        factors = unit_factors(self.type, index)
+        self.unit_node = factors['unit_node']
+        self.displacement_unit = factors['displacement_unit']
+        self.reverse_unit = factors['reverse_unit']
+        self.displacement_factor = factors['displacement_factor']
+        self.force_unit = factors['force_unit']
+        self.force_unit_name = factors['force_unit_name']
+        self.bar_force_unit = factors['bar_force_unit']
+        self.stress_unit = factors['stress_unit']
+        self.mass_unit = factors['mass_unit']
+        self.ui.tableWidget_property.setHorizontalHeaderItem(
+            2, QTableWidgetItem(f"Density\n({factors['density_unit_name']})"))
+
+        self.node()
+        self.displacement()
+        self.influence_line()
 
         self.force_or_stress()
 
     def calculation(self):
-        if len(self.elements)+len(self.restrained_dofs) < self.ndofs:
-            self.logger.debug("Unstable structure : [bar : %s + reaction : %s less than 2*no of joints : %s]", len(
-                self.elements), len(self.restrained_dofs), self.ndofs)
+        try:
+            properties = self.property_rows[self.member_property-1]
+            if not np.isfinite(properties).all():
+                raise ValueError('A member has no property')
+            model = TrussModel(
+                nodes=self.coordinates,
+                elements=self.elements,
+                properties=properties,
+                supports=self.restrained_dofs,
+                loads=self.forces.ravel(),
+                masses=self.property_density[self.member_property-1]*properties[:, 1]*self.mass_unit)
+            case_loads = self.case_forces.reshape(-1, len(self.load_cases))
+        except (ValueError, IndexError) as e:
+            # tables that do not make a truss yet
+            self.logger.debug("Unstable structure : [%s]", e)
             self.ui.label_stabality.setText('Unstable')
+            self.ui.label_stabality.setToolTip(str(e))
             self.ui.label_stabality.setStyleSheet("color: rgb(255,0,0);")
+            # whatever is still solving belongs to the previous tables
+            self.jobs.pop('analysis', None)
+            self.run_requested()
+            return
+
+        try:
+            matrix = combination_matrix(self.load_cases, self.combinations)
+        except ValueError as e:
+            self.logger.error('Load combinations : %s', e)
+            self.combinations = {}
+            matrix = combination_matrix(self.load_cases, self.combinations)
+        names = [ALL_LOADS] + self.load_cases + list(self.combinations)
+        nonlinear = self.nonlinear_check.isChecked()
+        buckling = BUCKLING_MODES if self.buckling_check.isChecked() else 0
+        frequencies = VIBRATION_MODES if self.frequency_check.isChecked() else 0
+
+        self.submit('analysis', lambda: self.analyse(
+            model, case_loads, matrix, names, nonlinear, buckling, frequencies))
+
+    def analyse(self, model, case_loads, matrix, names, nonlinear=False, buckling=0,
+                frequencies=0):
+        """worker thread, K is factorized once and reused until geometry, properties or supports change"""
+        if self.solver is None:
+            self.solver = TrussSolver(model)
         else:
-            try:
-                self.x_axis = np.array([1, 0])
-                self.y_axis = np.array([0, 1])
-
-                self.K = np.zeros([self.ndofs, self.ndofs])
-
-                self.details = np.array([['Member', 'From\nNode', 'To\nNode', 'From\nPoint\n(x)', 'From\nPoint\n(y)',
-                                          'To\nPoint\n(x)', 'To\nPoint\n(y)', 'Sine', 'Cosine', 'Length', 'E (ksi)', 'Area']])
-                self.report_k = {}
-                for key, v in self.member_values.items():
-                    fromPoint = np.array(v[0])
-                    toPoint = np.array(v[1])
-                    elementVector = toPoint-fromPoint
-
-                    fromNode = self.elements[key][0]
-                    toNode = self.elements[key][1]
-
-                    dof = []
-                    dof.extend(self.degrees_of_freedom[fromNode])
-                    dof.extend(self.degrees_of_freedom[toNode])
-                    dofs = np.array(dof)
-
-                    cosine = np.dot(elementVector, self.x_axis) / \
-                        norm(elementVector)
-                    sine = np.dot(elementVector, self.y_axis) / \
-                        norm(elementVector)
-                    length = norm(elementVector)
-
-                    self.details_initial = np.array([[key, fromNode, toNode, f'{v[0][0]:.2f}', f'{v[0][1]:.2f}', f'{v[1][0]:.2f}',
-                                                      f'{v[1][1]:.2f}', f'{sine:.2f}', f'{cosine:.2f}', f'{length:.2f}', self.properties[key][0][0], self.properties[key][0][1]]], dtype=object)
-                    self.details = np.append(
-                        self.details, self.details_initial, axis=0)
-
-                    E = self.properties[key][0][0]
-                    A = self.properties[key][0][1]
-                    Ck = (E*A)/length
-
-                    tau = np.array(
-                        [[cosine, sine, 0, 0], [0, 0, cosine, sine]], dtype=float)
-                    k = np.array([[1, -1], [-1, 1]])
-                    k_r = tau.T.dot(k).dot(tau)
-
-                    serial = [dofs.tolist()]
-                    for i, j in enumerate(np.around(k_r*Ck, 3).tolist()):
-                        j.append(serial[0][i])
-                        serial.append(j)
-
-                    self.report_k[key] = serial
-
-                    B = np.zeros((4, self.ndofs))
-                    index = dofs-1
-                    for i in range(4):
-                        B[i, index[i]] = 1.0
-
-                    K_rG = B.T.dot(k_r).dot(B)
-
-                    self.K = self.K + (Ck * K_rG)
-
-                self.F = []
-                for f in self.forces.values():
-                    self.F.extend(f)
-                self.F = np.array(self.F)
-                # Final purpose
-                self.remove_indices = np.array(self.restrained_dofs)-1
-
-                self.K_final = np.delete(self.K, self.remove_indices, axis=0)
-                self.K_final = np.delete(
-                    self.K_final, self.remove_indices, axis=1)
-                self.logger.debug('Global stiffness matrix : %s', self.K_final)
-
-                self.F_final = np.delete(self.F, self.remove_indices)
-                self.logger.debug("Force calculated : %s", self.F_final)
-
-                # Deflectiion global
-                self.D_global = np.linalg.inv(self.K_final).dot(self.F_final)
-                self.logger.debug('Global deflection : %s', self.D_global)
-
-                self.ui.label_stabality.setText('Stable')
-                self.ui.label_stabality.setStyleSheet(
-                    "color: rgb(255, 85, 0);")
-            except:
-                self.logger.debug("Unstable structure")
-                self.ui.label_stabality.setText('Unstable')
-                self.ui.label_stabality.setStyleSheet("color: rgb(255,0,0);")
-                pass
+            self.solver.set_model(model)
+        result = self.solver.solve()
+        modes, mode_names = [], []
+        if buckling:
+            # linear buckling of the forces under all loads, shown like displacements
+            factors, shapes = self.solver.buckling(result.bar_forces, buckling)
+            zeros = np.zeros(len(model))
+            for i, factor in enumerate(factors):
+                mode_names.append(f'Buckling mode {i+1} (x{factor:.4g})')
+                modes.append(TrussResult(shapes[:, i], zeros, zeros,
+                                         np.zeros(len(model.restrained_dofs))))
+        if frequencies:
+            # vibration modes with consistent mass, members without a density have none
+            hertz, shapes = self.solver.natural_frequencies(frequencies)
+            zeros = np.zeros(len(model))
+            for i, frequency in enumerate(hertz):
+                mode_names.append(f'Vibration mode {i+1} ({frequency:.4g} Hz)')
+                modes.append(TrussResult(shapes[:, i], zeros, zeros,
+                                         np.zeros(len(model.restrained_dofs))))
+        if nonlinear:
+            # nothing superposes, every load column is followed on its own
+            large = NonlinearSolver(model)
+            result = large.newton().result
+            cases = large.solve_columns(case_loads)
+        else:
+            # every load case in one solve, combinations are sums of them
+            cases = self.solver.solve_cases(case_loads)
+        results = [result] + [column(cases, i) for i in range(cases.bar_forces.shape[1])]
+        if len(matrix):
+            if nonlinear:
+                combinations = large.solve_columns(case_loads.dot(matrix.T))
+            else:
+                combinations = combine(cases, matrix)
+            results += [column(combinations, i) for i in range(len(matrix))]
+            envelope = Envelope(combinations.bar_forces)
+            governing = names[-len(matrix):]
+        else:
+            envelope = Envelope(cases.bar_forces)
+            governing = names[1:]
+        return (model, results + modes, names + mode_names, envelope, governing, self.solver.K, self.solver.K_final,
+                self.solver.F, self.solver.F_final, self.solver.free_dofs)
+
+    def analysis_finished(self, output):
+        (self.model, self.results, names, envelope, governing, self.K, self.K_final,
+         self.F, self.F_final, self.reaction_indices) = output
+
+        selected = self.result_selectors[0].currentText()
+        index = names.index(selected) if selected in names else 0
+        for selector in self.result_selectors:
+            selector.blockSignals(True)
+            selector.clear()
+            selector.addItems(names)
+            selector.setCurrentIndex(index)
+            selector.blockSignals(False)
+        self.result = self.results[index]
+
+        scale = self.displacement_unit*self.bar_force_unit
+        self.logger.debug('Bar force envelope max : %s', [
+            (round(value*scale, 4), governing[at]) for value, at in zip(envelope.max, envelope.max_at)])
+        self.logger.debug('Bar force envelope min : %s', [
+            (round(value*scale, 4), governing[at]) for value, at in zip(envelope.min, envelope.min_at)])
+        self.logger.debug('Global stiffness matrix : %s', self.K_final)
+        self.logger.debug("Force calculated : %s", self.F_final)
+        self.logger.debug('Global deflection : %s',
+                          self.result.displacements)
+
+        self.ui.label_stabality.setText('Stable')
+        self.ui.label_stabality.setToolTip('')
+        self.ui.label_stabality.setStyleSheet(
+            "color: rgb(255, 85, 0);")
+
+    def show_result(self, index):
+        'all loads, a load case or a combination picked on the displacement or force page'
+        for selector in self.result_selectors:
+            selector.blockSignals(True)
+            selector.setCurrentIndex(index)
+            selector.blockSignals(False)
+        if not 0 <= index < len(self.results):
+            return
+        self.result = self.results[index]
+        self.displacement()
+        self.force_or_stress()
+
+    def analysis_failed(self, error):
+        if isinstance(error, UnstableStructureError):
+            self.logger.debug("Unstable structure : [%s]", error)
+            self.ui.label_stabality.setText('Unstable')
+            # the nodes of a mechanism
+            self.ui.label_stabality.setToolTip(str(error))
+        else:
+            # anything else is not the truss, it is the analysis that failed
+            self.logger.error('Analysis failed', exc_info=(type(error), error, error.__traceback__))
+            self.ui.label_stabality.setText('Analysis error')
+            self.ui.label_stabality.setToolTip(f'{type(error).__name__}: {error}')
+        self.ui.label_stabality.setStyleSheet("color: rgb(255,0,0);")
+
+    """
+    Background jobs
+    """
+
+    def submit(self, kind, fn):
+        """queue fn on the worker thread, an older job of the same kind becomes stale"""
+        self.job_counter += 1
+        self.jobs[kind] = self.job_counter
+        self.pool.start(AnalysisJob(self.analysis_signals,
+                        kind, self.job_counter, self.jobs.get, fn))
+
+    def deferred(self, name):
+        """while an analysis is running, call method name once its result arrives"""
+        if 'analysis' in self.jobs:
+            if name not in self.requested:
+                self.requested.append(name)
+            return True
+        return False
+
+    def job_finished(self, kind, job_id, output):
+        if self.jobs.get(kind) != job_id:
+            return
+        del self.jobs[kind]
+        getattr(self, f'{kind}_finished')(output)
+        if kind == 'analysis':
+            self.run_requested()
+
+    def job_failed(self, kind, job_id, error):
+        if self.jobs.get(kind) != job_id:
+            return
+        del self.jobs[kind]
+        getattr(self, f'{kind}_failed')(error)
+        if kind == 'analysis':
+            self.run_requested()
+
+    def run_requested(self):
+        requested = self.requested
+        self.requested = []
+        for name in requested:
+            getattr(self, name)()
 
     def displacement(self):
+        if self.deferred('displacement'):
+            return
         if self.ui.label_stabality.text() == 'Stable':
             self.ui.label_15.setText("The horizontal (x) and vertical (y) displacements \n"
                                      "are shown below.")
@@ -1267,35 +1417,20 @@ class MainPage(QWizardPage):
             self.ui.checkBox_loads.setVisible(True)
             self.ui.checkBox_reactions.setVisible(True)
 
-            self.dofs_list = []
-            for i in self.degrees_of_freedom.values():
-                self.dofs_list.extend(i)
-
-            self.reaction_indices = []
-            for i in self.dofs_list:
-                if i not in self.restrained_dofs:
-                    # this is the correct one removing restrained dofs
-                    self.reaction_indices.append(i)
-            self.reaction_indices = np.array(
-                self.reaction_indices)-1     # -1 for indexing purposes
             self.logger.debug('Reaction indices : %s', self.reaction_indices)
 
-            self.D_big = np.zeros((self.ndofs))
-            for i, j in enumerate(self.reaction_indices):
-                self.D_big[j] = self.D_global[i]
-
-            self.D_big = np.around(self.D_big*self.displacement_unit, 4)
+            self.D_big = self.result.displacements*self.displacement_unit
             self.logger.debug('Deflection with zeros : %s', self.D_big)
 
-            self.ui.tableWidget_displacement.setRowCount(len(self.node_values))
+            self.ui.tableWidget_displacement.setRowCount(len(self.coordinates))
 
-            for i in range(1, len(self.node_values)+1):
+            for i in range(1, len(self.coordinates)+1):
                 self.ui.tableWidget_displacement.setItem(
                     i-1, 0, QTableWidgetItem(str(i)))
                 self.ui.tableWidget_displacement.setItem(
-                    i-1, 1, QTableWidgetItem(str(self.D_big[2*i-2])))
+                    i-1, 1, QTableWidgetItem(str(shown(self.D_big[2*i-2]))))
                 self.ui.tableWidget_displacement.setItem(
-                    i-1, 2, QTableWidgetItem(str(self.D_big[2*i-1])))
+                    i-1, 2, QTableWidgetItem(str(shown(self.D_big[2*i-1]))))
 
             abs_D = list(map(lambda x: abs(x), self.D_big))
             max_displacement = max(abs_D)
@@ -1358,96 +1493,40 @@ class MainPage(QWizardPage):
                 lambda: self.timer.stop())
 
     def reaction_calculation(self):
-        self.K_reaction = np.delete(self.K, self.reaction_indices, axis=0)
-        self.F_reaction = np.delete(self.F, self.reaction_indices)
-        self.D_reaction = np.zeros((self.ndofs))
-
-        for i, j in enumerate(self.reaction_indices):
-            self.D_reaction[j] = self.D_global[i]
-
-        self.R_global = np.dot(self.K_reaction, self.D_reaction)
-        self.R_global = np.around(self.R_global/self.force_unit, 2)
-
-        self.sort_support_force = []
-        if len(self.support_force) > 0:
-            for i in sorted(self.support_force):
-                if i in self.restrained_dofs:
-                    self.sort_support_force.append(self.support_force[i])
-            self.sort_support_force = np.array(
-                self.sort_support_force)/self.force_unit
-
-            self.R_global = np.around(self.R_global-self.sort_support_force, 2)
+        self.R_global = self.result.reactions/self.force_unit
 
         self.logger.debug('Reaction global : %s', self.R_global)
 
         self.R_graph = {}
         for i, j in enumerate(self.restrained_dofs):
             if j % 2 == 0:
-                self.R_graph[i] = self.node_values[j /
-                                                   2], 90, self.R_global[i], f'center'
+                self.R_graph[i] = tuple(self.coordinates[j//2-1].tolist()), 90, self.R_global[i], f'center'
             else:
-                self.R_graph[i] = self.node_values[(
-                    j+1)/2], 0, self.R_global[i], f'left'
+                self.R_graph[i] = tuple(self.coordinates[(
+                    j+1)//2-1].tolist()), 0, self.R_global[i], f'left'
 
         self.logger.debug('Reaction graph : %s', self.R_graph)
 
-        D_r = np.zeros(4)
-        self.bar_force = []
-        for k, v in self.member_values.items():
-            fromPoint = np.array(v[0])
-            toPoint = np.array(v[1])
-            elementVector = toPoint-fromPoint
-
-            fromNode = self.elements[k][0]
-            toNode = self.elements[k][1]
-
-            dof = []
-            dof.extend(self.degrees_of_freedom[fromNode])
-            dof.extend(self.degrees_of_freedom[toNode])
-            self.dofs = np.array(dof)
-
-            cosine = np.dot(elementVector, self.x_axis)/norm(elementVector)
-            sine = np.dot(elementVector, self.y_axis)/norm(elementVector)
-            length = norm(elementVector)
-
-            E = self.properties[k][0][0]
-            A = self.properties[k][0][1]
-            Ck = (E*A)/length
-
-            tau = np.array([-cosine, -sine, cosine, sine], dtype=float)
-
-            D_r[0] = self.D_big[fromNode*2-2]
-            D_r[1] = self.D_big[fromNode*2-1]
-            D_r[2] = self.D_big[toNode*2-2]
-            D_r[3] = self.D_big[toNode*2-1]
-
-            sigma = np.round((Ck*np.dot(tau, D_r))*self.bar_force_unit, 4)
-            self.bar_force.append(sigma)
+        # forces and stresses of every member come whole from the solver, only scaled here
+        force_scale = self.displacement_unit*self.bar_force_unit
+        bar_force = self.result.bar_forces*force_scale
+        self.bar_force = bar_force.tolist()
 
         self.logger.debug('bar_force : %s', self.bar_force)
 
-        self.bar_stress = []
-        for key, value in self.properties.items():
-            force = self.bar_force[key-1]
-            area = value[0][1]
-            stress = round(((force/area) * self.stress_unit), 4)
-            self.bar_stress.append(stress)
+        self.bar_stress = (self.result.stresses*force_scale*self.stress_unit).tolist()
 
         self.logger.debug('Stress : %s', self.bar_stress)
 
-        self.stress_table = []
-        for i, j in enumerate(self.bar_force):
-            if j > 0:
-                self.stress_table.append(
-                    (i+1, f"{self.elements[i+1][0]}-{self.elements[i+1][1]}", abs(j), 'tension'))
-            elif j < 0:
-                self.stress_table.append(
-                    (i+1, f"{self.elements[i+1][0]}-{self.elements[i+1][1]}", abs(j), 'compression'))
-            else:
-                self.stress_table.append(
-                    (i+1, f"{self.elements[i+1][0]}-{self.elements[i+1][1]}", 0, 'zero'))
+        # a member is zero, tension or compression as displayed, round-off is not a force
+        displayed = np.round(bar_force, DISPLAY_DIGITS)
+        kinds = np.array(['compression', 'zero', 'tension'])[np.sign(displayed).astype(int)+1]
+        self.stress_table = [
+            (i, f"{fromNode}-{toNode}", force, kind) for i, (fromNode, toNode), force, kind in zip(
+                range(1, len(bar_force)+1), self.elements.tolist(), np.abs(displayed).tolist(),
+                kinds.tolist())]
 
-        self.ui.tableWidget_result.setRowCount(len(self.member_values))
+        self.ui.tableWidget_result.setRowCount(len(self.elements))
 
         for i, v in enumerate(self.stress_table):
             self.ui.tableWidget_result.setItem(
@@ -1465,7 +1544,7 @@ class MainPage(QWizardPage):
             self.ui.tableWidget_result.setItem(i, 2, item1)
             self.ui.tableWidget_result.setItem(i, 3, item2)
 
-        factoring = sorted([abs(i) for i in self.bar_force])
+        factoring = np.sort(np.abs(displayed)).tolist()
         self.logger.debug('Factoring : %s', factoring)
 
         alpha = []
@@ -1482,6 +1561,8 @@ class MainPage(QWizardPage):
         self.stress_graph()
 
     def force_or_stress(self):
+        if self.deferred('force_or_stress'):
+            return
         try:
             if self.ui.radioButton_stress.isChecked():
                 self.ui.tableWidget_result.setHorizontalHeaderLabels(
@@ -1503,6 +1584,7 @@ class MainPage(QWizardPage):
                 showme = self.bar_force
 
             for i, j in enumerate(showme):
+                j = shown(j)
                 value = QTableWidgetItem(str(abs(j)))
                 if j > 0:
                     value.setTextColor(QColor(10, 54, 157))
@@ -1547,10 +1629,10 @@ class MainPage(QWizardPage):
 
             # member plot
             if self.ui.radioButtonDefault.isChecked():
-                for v in self.plot_final.values():
+                for v in self.plot_final:
                     ax.plot(v[0], v[1], linewidth=2)
             else:
-                for v in self.plot_final.values():
+                for v in self.plot_final:
                     ax.plot(v[0], v[1], linewidth=2, c='k')
             self.graph_widget.canvas1.draw()
 
@@ -1596,7 +1678,7 @@ class MainPage(QWizardPage):
             i/2)]+j*self.scale for i, j in enumerate(self.factored_D) if i % 2 != 0]
 
         self.node_displacement = {}
-        for i, j in self.elements.items():
+        for i, j in enumerate(self.elements.tolist(), start=1):
             self.node_displacement[i] = (self.X_displacement[j[0]-1], self.X_displacement[j[1]-1]
                                          ), (self.Y_displacement[j[0]-1], self.Y_displacement[j[1]-1])
 
@@ -1633,7 +1715,7 @@ class MainPage(QWizardPage):
                     i+1, (self.X_displacement[i], self.Y_displacement[i]), zorder=30, ha='center', va='center', size='8')
 
             # member plot
-            for v in self.plot_displacement_final.values():
+            for v in self.plot_displacement_final:
                 ax2.plot(v[0], v[1], color='gray', alpha=0.5)
             for v in self.node_displacement.values():
                 ax2.plot(v[0], v[1], color='turquoise', zorder=15, linewidth=2)
@@ -1702,8 +1784,8 @@ class MainPage(QWizardPage):
 
             if self.ui.checkBox_members.isChecked():
                 # member plot
-                for k, v in self.plot_final.items():
-                    bar_force_value = self.bar_force[k-1]
+                for k, v in enumerate(self.plot_final, start=1):
+                    bar_force_value = shown(self.bar_force[k-1])
                     if bar_force_value < 0:
                         ax3.plot(v[0], v[1], color='crimson', alpha=self.factored_bar_force[abs(
                             bar_force_value)], linewidth=2)
@@ -1715,7 +1797,7 @@ class MainPage(QWizardPage):
 
                     if self.ui.checkBox_forces.isChecked():
                         if self.ui.radioButton_stress.isChecked():
-                            ax3.annotate(abs(self.bar_stress[k-1]), (np.mean(v[0]), np.mean(
+                            ax3.annotate(abs(shown(self.bar_stress[k-1])), (np.mean(v[0]), np.mean(
                                 v[1])), zorder=50, ha='center', va='center', size='10')
                         else:
                             ax3.annotate(abs(bar_force_value), (np.mean(v[0]), np.mean(
@@ -1767,7 +1849,7 @@ class MainPage(QWizardPage):
                     ax3.plot(v[0][0], v[0][1], marker=arrow,
                              color='green',  markersize=60, markeredgewidth=1.0)
 
-                    ax3.annotate(f'{v[2]} {self.force_unit_name}',
+                    ax3.annotate(f'{shown(v[2], 2)} {self.force_unit_name}',
                                  xy=(v[0][0], v[0][1]), xycoords='data',
                                  xytext=(
                                      32*np.cos(np.radians(v[1])), 35*np.sin(np.radians(v[1]))),
@@ -1807,7 +1889,7 @@ class MainPage(QWizardPage):
         ax_r.grid(False)
         ax_r.axis('off')
         # member plot
-        for k, v in self.plot_final.items():
+        for k, v in enumerate(self.plot_final, start=1):
             ax_r.plot(v[0], v[1], linewidth=2)
 
         fig.savefig(buf_element, format="png", bbox_inches='tight', dpi=300)
@@ -1848,6 +1930,27 @@ class MainPage(QWizardPage):
     def update_change(self):
         self.change += 1
 
+    def schedule(self, stage):
+        """
+        Remember the earliest stage that has to run and (re)start the timer,
+        a burst of cell edits ends up in a single recompute.
+        """
+        if self.pending_stage is None or RECOMPUTE_STAGES.index(stage) < RECOMPUTE_STAGES.index(self.pending_stage):
+            self.pending_stage = stage
+        self.recompute_timer.start()
+
+    def recompute(self):
+        stage = self.pending_stage
+        self.pending_stage = None
+        if stage:
+            getattr(self, stage)()
+
+    def block_table_signals(self, block):
+        """stop cellChanged while tables are filled in bulk"""
+        for table in (self.ui.tableWidget_nodes, self.ui.tableWidget_members, self.ui.tableWidget_supports,
+                      self.ui.tableWidget_loads, self.ui.tableWidget_property):
+            table.blockSignals(block)
+
     """
     Influence line
     """
@@ -1860,12 +1963,13 @@ class MainPage(QWizardPage):
             self.load_path = []
             self.moving_node = {}
             self.moving_position = []
+            self.path_distance = np.zeros(0)
 
             starting_node = int(self.ui.lineEdit_startingNode.text())
             ending_node = int(self.ui.lineEdit_endingNode.text())
 
-            self.starting_value = self.node_values[starting_node]
-            self.ending_value = self.node_values[ending_node]
+            self.starting_value = self.node_position(starting_node).tolist()
+            self.ending_value = self.node_position(ending_node).tolist()
             self.starting_X = self.starting_value[0]
             self.starting_Y = self.starting_value[1]
             self.ending_X = self.ending_value[0]
@@ -1876,127 +1980,69 @@ class MainPage(QWizardPage):
 
             self.movingload_graph()
 
-            slope_required = (self.ending_Y - self.starting_Y) / \
-                (self.ending_X - self.starting_X)
-
             self.logger.debug(
                 'Moving load starting node : %s', self.starting_value)
             self.logger.debug('Moving node ending node : %s',
                               self.ending_value)
-            self.logger.debug('Slope required : %s', slope_required)
-
-            if self.starting_X < self.ending_X:
-                sorted_node = dict(
-                    sorted(self.node_values.items(), key=lambda item: item[1][0]))
-                sorted_node_revised = {key: value for key, value in sorted_node.items(
-                ) if value[0] >= self.starting_X and value[0] <= self.ending_X}
-
-            else:
-                sorted_node = dict(
-                    sorted(self.node_values.items(), key=lambda item: item[1][0], reverse=True))
-                sorted_node_revised = {key: value for key, value in sorted_node.items(
-                ) if value[0] <= self.starting_X and value[0] >= self.ending_X}
 
-            self.logger.debug('Sorted node revised : %s', sorted_node_revised)
-
-            for key, value in sorted_node_revised.items():
-                if key == starting_node:
-                    self.moving_node[key] = value
-                else:
-                    try:
-                        if ((value[1] - self.starting_Y) / (value[0] - self.starting_X)) == slope_required:
-                            self.moving_node[key] = value
-                    except:
-                        continue
+            # nodes within a tolerance of the path, not an exact slope match
+            nodes, self.path_distance = path_nodes(
+                self.coordinates, starting_node, ending_node)
+            self.moving_node = {node: self.coordinates[node-1].tolist()
+                                for node in nodes.tolist()}
 
             self.logger.debug('Moving node : %s', self.moving_node)
 
             self.moving_position = [key for key in self.moving_node.keys()]
             self.logger.debug('Moving position : %s', self.moving_position)
 
-        except KeyError:
+        except IndexError:
             self.movingload_graph()
 
-        except:
+        except (AttributeError, ValueError):
             pass
 
     def influence_line(self):
         """
-        influence line for every member will be calculated and
-        will collect them in force_influence dictionary.
+        influence line for every member will be calculated on the worker
+        thread and collected in force_influence dictionary.
         """
+        if self.deferred('influence_line'):
+            return
         try:
             self.ui.tableWidget_influenceLine.setRowCount(0)
             self.influence_list = []
             self.force_influence = {i: []
-                                    for i in range(1, len(self.member_values)+1)}
-
-            for node in self.moving_node.keys():
-                self.F_unit = np.zeros(self.ndofs)
-                self.F_unit[2*node-1] = -1*self.force_unit
-                self.F_unit = np.delete(
-                    self.F_unit, self.remove_indices, axis=0)
-
-                # Deflection unit load
-                self.D_unit = np.linalg.inv(self.K_final).dot(self.F_unit)
-                self.D_big_unit = np.zeros((self.ndofs))
-
-                for i, j in enumerate(self.reaction_indices):
-                    self.D_big_unit[j] = self.D_unit[i]
-                self.D_big_unit = np.around(
-                    self.D_big_unit*self.displacement_unit, 4)
-
-                D_r = np.zeros(4)
-                self.influence = []
-                for k, v in self.member_values.items():
-                    fromPoint = np.array(v[0])
-                    toPoint = np.array(v[1])
-                    elementVector = toPoint-fromPoint
-
-                    fromNode = self.elements[k][0]
-                    toNode = self.elements[k][1]
+                                    for i in range(1, len(self.elements)+1)}
 
-                    dof = []
-                    dof.extend(self.degrees_of_freedom[fromNode])
-                    dof.extend(self.degrees_of_freedom[toNode])
-                    self.dofs = np.array(dof)
+            positions = list(self.moving_node.keys())
+            load = -1*self.force_unit
+            scale = self.displacement_unit*self.bar_force_unit
 
-                    cosine = np.dot(elementVector, self.x_axis) / \
-                        norm(elementVector)
-                    sine = np.dot(elementVector, self.y_axis) / \
-                        norm(elementVector)
-                    length = norm(elementVector)
+            # every load position solved at once, one column per position
+            self.submit('influence', lambda: self.solver.influence_lines(
+                positions, load=load)*scale)
 
-                    E = self.properties[k][0][0]
-                    A = self.properties[k][0][1]
-                    Ck = (E*A)/length
-
-                    tau = np.array([-cosine, -sine, cosine, sine], dtype=float)
-
-                    D_r[0] = self.D_big_unit[fromNode*2-2]
-                    D_r[1] = self.D_big_unit[fromNode*2-1]
-                    D_r[2] = self.D_big_unit[toNode*2-2]
-                    D_r[3] = self.D_big_unit[toNode*2-1]
-
-                    sigma = np.round((Ck*np.dot(tau, D_r)) *
-                                     self.bar_force_unit, 4)
-
-                    self.influence.append(sigma)
+        except:
+            pass
 
-                self.influence_list.append(self.influence)
+    def influence_finished(self, influence):
+        self.influence_matrix = influence
+        influence = np.round(influence, 4)
+        self.influence_list = influence.T.tolist()
+        self.force_influence = {
+            i: line for i, line in enumerate(influence.tolist(), start=1)}
 
-            for i in self.influence_list:
-                for j in range(len(self.member_values)):
-                    self.force_influence[j+1].append(i[j])
+        self.logger.debug('Force influence : %s', self.force_influence)
 
-            self.logger.debug('Force influence : %s', self.force_influence)
+        self.vehicle_sweep()
 
-            self.ui.comboBox_influence.clear()
-            item = [str(key) for key in self.member_values.keys()]
-            self.ui.comboBox_influence.addItems(item)
+        self.ui.comboBox_influence.clear()
+        item = [str(key) for key in range(1, len(self.elements)+1)]
+        self.ui.comboBox_influence.addItems(item)
 
-        except:
-            pass
+    def influence_failed(self, error):
+        self.logger.debug('Influence line : %s', error)
 
     def influence_table(self):
         """
@@ -2015,10 +2061,57 @@ class MainPage(QWizardPage):
                     index, 1, QTableWidgetItem(str(result)))
 
             self.influence_graph(member=currentIndex)
+            self.vehicle_summary(currentIndex)
         except:
             self.movingload_graph()
             pass
 
+    def vehicle_sweep(self):
+        """
+        max and min force of every member while the vehicle crosses the load
+        path, from the influence lines already solved, nothing is re-solved
+        """
+        self.vehicle_result = None
+        self.vehicle_label.clear()
+        text = self.vehicle_edit.text().strip()
+        if not text or len(self.moving_position) < 2:
+            return
+        try:
+            vehicle = Vehicle.parse(text)
+            if self.influence_matrix.shape[1] != len(self.moving_position):
+                return
+            # spacings are typed in the unit of length, the path is in model units
+            vehicle = Vehicle(vehicle.loads, np.diff(vehicle.offsets)*self.unit_node)
+            self.vehicle_result = sweep(
+                self.path_distance, self.influence_matrix, vehicle)
+        except (AttributeError, ValueError) as e:
+            self.logger.error('Vehicle : %s', e)
+            return
+
+        result = self.vehicle_result
+        for member in range(1, len(result.max)+1):
+            self.logger.debug('Vehicle member %s : max %.4f at %.4f, min %.4f at %.4f', member,
+                              result.max[member-1], result.max_at[member-1]/self.unit_node,
+                              result.min[member-1], result.min_at[member-1]/self.unit_node)
+        try:
+            self.vehicle_summary(int(self.ui.comboBox_influence.currentText()))
+        except ValueError:
+            pass
+
+    def vehicle_summary(self, member):
+        'governing vehicle forces of the member shown in the influence table'
+        result = self.vehicle_result
+        if result is None or member > len(result.max):
+            self.vehicle_label.clear()
+            return
+        i = member-1
+        direction = {False: '', True: ' (reversed)'}
+        self.vehicle_label.setText(
+            f'Member {member} : max {result.max[i]:.4f} with the front axle at '
+            f'{result.max_at[i]/self.unit_node:g}{direction[bool(result.max_reversed[i])]}, '
+            f'min {result.min[i]:.4f} at '
+            f'{result.min_at[i]/self.unit_node:g}{direction[bool(result.min_reversed[i])]}')
+
     def movingload_graph(self):
         """
         complete truss structures and load path shown in graph
@@ -2042,7 +2135,7 @@ class MainPage(QWizardPage):
             self.graph_widget4.canvas4.draw()
 
             # member plot
-            for k, v in self.plot_final.items():
+            for k, v in enumerate(self.plot_final, start=1):
                 self.ax4.plot(v[0], v[1], linewidth=1.2, c='k')
 
                 self.ax4.annotate(k, (np.mean(v[0]), np.mean(
@@ -2144,8 +2237,11 @@ class MainPage(QWizardPage):
         global member_page_start, support_page_start, stress_page_end, displacement_page_end
         global buf_bar_force, buf_reaction, buf_displacement
 
-        total_node = len(self.node_values)
-        total_member = len(self.member_values)
+        if self.deferred('generate_report') or 'report' in self.jobs:
+            return
+
+        total_node = len(self.coordinates)
+        total_member = len(self.elements)
 
         member_page_start = ceil((total_node-27)/37) + 2 + 1
 
@@ -2274,7 +2370,8 @@ class MainPage(QWizardPage):
             """<font size='20' color='steelblue'>Truss Members </font><br/><br/>
             Below is the diagram showing how members are connected.<br/><br/><br/>
             """))
-        t = Table(self.details[:, 0:3].tolist(), hAlign='LEFT', repeatRows=1)
+        t = Table(self.solver.details[:, 0:3].tolist(),
+                  hAlign='LEFT', repeatRows=1)
         t.setStyle(TableStyle([
             ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
             ('INNERGRID', (0, 0), (-1, -1), 0.25, colors.black),
@@ -2304,7 +2401,7 @@ class MainPage(QWizardPage):
         # Page 5 details
         story.append(Paragraph(
             """<font size='20' color='steelblue'>Before doing matrices </font><br/><br/><br/>"""))
-        t = Table(self.details.tolist(), repeatRows=1)
+        t = Table(self.solver.details.tolist(), repeatRows=1)
         t.setStyle(TableStyle([
             ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
             ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
@@ -2344,7 +2441,8 @@ class MainPage(QWizardPage):
         ]))
         story.append(t)
         story.append(Spacer(1, 30))
-        for k, v in self.report_k.items():
+        for k, v in self.solver.report_k.items():
+            v = [[round(x, 3) if isinstance(x, float) else x for x in row] for row in v]
             t = Table(v, 5*[1*inch], 5*[0.3*inch], hAlign='RIGHT')
             t.setStyle(TableStyle([
                 ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -2368,9 +2466,10 @@ class MainPage(QWizardPage):
         """))
         story.append(Spacer(1, 30))
         data = {}
+        K = todense(self.K)
         for i in range(1, self.ndofs, 8):
             d = [[j for j in range(i, i+8) if j < self.ndofs+1]]
-            for k, v in enumerate(np.around(self.K[:, [j for j in range(i-1, i+7) if j < self.ndofs]], 2).tolist()):
+            for k, v in enumerate(np.around(K[:, [j for j in range(i-1, i+7) if j < self.ndofs]], 2).tolist()):
                 v.append(k+1)
                 d.append(v)
             data[i] = d
@@ -2394,10 +2493,11 @@ class MainPage(QWizardPage):
         """))
         story.append(Spacer(1, 20))
         data = {}
+        K_final = todense(self.K_final)
         for i in range(1, len(self.reaction_indices), 8):
             d = [(self.reaction_indices[i-1:i+7]+1).tolist()]
 
-            constrained = np.around(self.K_final[:, [j for j in range(
+            constrained = np.around(K_final[:, [j for j in range(
                 i-1, i+7) if j < len(self.reaction_indices)]], 2).tolist()
 
             for k, v in enumerate(constrained):
@@ -2461,12 +2561,13 @@ class MainPage(QWizardPage):
 
         data = [('Member', 'Node', 'Force', 'Stress', 'Direction')]
         for i, j in enumerate(self.bar_force):
+            j = shown(j)
             if j > 0:
                 data.append(
-                    (i+1, f"{self.elements[i+1][0]}-{self.elements[i+1][1]}", j, self.bar_stress[i], 'tension'))
+                    (i+1, f"{self.elements[i][0]}-{self.elements[i][1]}", j, shown(self.bar_stress[i]), 'tension'))
             else:
                 data.append(
-                    (i+1, f"{self.elements[i+1][0]}-{self.elements[i+1][1]}", j, self.bar_stress[i], 'compression'))
+                    (i+1, f"{self.elements[i][0]}-{self.elements[i][1]}", j, shown(self.bar_stress[i]), 'compression'))
         t = Table(data, hAlign='LEFT', repeatRows=1)
         t.setStyle(TableStyle([
             ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -2581,8 +2682,11 @@ class MainPage(QWizardPage):
 
                 story.append(PageBreak())
 
-        doc.build(story, canvasmaker=NumberedCanvas)
+        # laying out a long pdf is slow, do it on the worker thread
+        self.submit('report', lambda: doc.build(
+            story, canvasmaker=NumberedCanvas))
 
+    def report_finished(self, output):
         if sys.platform == "win32":
             os.startfile(self.pdfname)
         elif sys.platform == "darwin":
@@ -2590,7 +2694,13 @@ class MainPage(QWizardPage):
         else:
             subprocess.call(["xdg-open", self.pdfname])
 
+    def report_failed(self, error):
+        self.logger.error('Report : %s', error)
+
     def closeEvent(self):
+        'drop queued jobs and let the running one finish before widgets go away'
+        self.pool.clear()
+        self.pool.waitForDone()
         try:
             if self.demo and self.report:
                 os.remove(self.filename[0])
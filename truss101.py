@@ -0,0 +1,612 @@
+"""
+GPL-3.0 License
+
+Copyright (C) 2020-2022 Monirul Shawon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Truss 101 from the command line, no Qt needed.
+
+    python truss101.py analyze Demo/*.trs -o results --format csv
+    python truss101.py analyze path/to/folder -o results --format parquet -j 8
+    python truss101.py sweep base.trs --grid E=190,200,210 --grid height=3:6:7
+    python truss101.py sweep base.trs --lhs A=1000:5000 --lhs span=20:40 --samples 500
+    python truss101.py size base.trs --tension 250 --displacement 20 -o sized.trs
+    python truss101.py dynamic bridge.trs --dt 0.001 --steps 100000 --history walk.csv
+    python truss101.py view tower.trs --deformed
+"""
+
+import argparse
+import csv
+import functools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import dynamics
+import loadcases
+import nonlinear
+import parametric
+import sizing
+import trsfile
+from solver import TrussSolver, UnstableStructureError
+
+# every output table and its columns, values are in the units shown by the GUI
+TABLES = {
+    # units of the coordinates, displacements, loads and reactions, member forces and stresses
+    'summary': ['file', 'status', 'message', 'node_count', 'member_count', 'length_unit',
+                'displacement_unit', 'force_unit', 'member_force_unit', 'stress_unit'],
+    # z and dz are 0 for a plane truss
+    'nodes': ['file', 'node', 'x', 'y', 'dx', 'dy', 'z', 'dz'],
+    'members': ['file', 'member', 'from_node', 'to_node', 'force', 'stress'],
+    'reactions': ['file', 'node', 'direction', 'reaction'],
+    # every load case and combination on its own
+    'cases': ['file', 'result', 'kind', 'member', 'force', 'stress'],
+    # over the combinations, or the cases if there are none
+    'envelopes': ['file', 'member', 'max_force', 'max_result', 'min_force', 'min_result'],
+    # with --buckling, critical multipliers of all loads
+    'buckling': ['file', 'mode', 'load_factor'],
+    # with --modes, natural frequencies in Hz
+    'modes': ['file', 'mode', 'frequency'],
+}
+# unit_factors names of the units in the summary, in its order
+UNITS = ['length', 'displacement', 'force', 'bar_force', 'stress']
+
+
+def analyze_file(path, large=False, buckling=0, modes=0, lumped=False, dtype=np.float64):
+    """
+    Solve one .trs file, runs in a worker process.
+    Returns the rows it adds to every table.
+    large follows every load case and combination on the deformed truss,
+    buckling is the number of buckling modes wanted, modes the number of
+    natural frequencies (lumped or consistent mass), dtype the precision
+    of the linear solve.
+    Whatever goes wrong ends up in the summary row of the file, one bad file
+    never stops a batch.
+    """
+    try:
+        return solve_file(path, large, buckling, modes, lumped, dtype)
+    except Exception as e:
+        rows = {table: [] for table in TABLES}
+        rows['summary'].append(
+            [path, 'error', f'{type(e).__name__}: {e}', 0, 0] + ['']*len(UNITS))
+        return rows
+
+
+def solve_file(path, large, buckling, modes, lumped, dtype):
+    """rows of analyze_file, errors it does not expect are raised"""
+    rows = {table: [] for table in TABLES}
+    try:
+        project = trsfile.read_project(path)
+        model = project.to_model()
+        factors = project.factors()
+    except Exception as e:
+        rows['summary'].append(
+            [path, 'error', f'{type(e).__name__}: {e}', 0, 0] + ['']*len(UNITS))
+        return rows
+
+    units = [factors[f'{name}_unit_name'] for name in UNITS]
+    try:
+        solver = TrussSolver(model, dtype=dtype)
+        result = solver.solve()
+        critical = solver.buckling(result.bar_forces, buckling)[0] if buckling else []
+        frequencies = solver.natural_frequencies(modes, lumped)[0] if modes else []
+        matrix = loadcases.combination_matrix(
+            project.cases, project.combinations)
+        if large:
+            solver = nonlinear.NonlinearSolver(model)
+            result = solver.newton().result
+            cases = solver.solve_columns(project.case_loads())
+            combinations = solver.solve_columns(
+                project.case_loads().dot(matrix.T))
+        else:
+            cases = solver.solve_cases(project.case_loads())
+            combinations = loadcases.combine(cases, matrix)
+    except UnstableStructureError as e:
+        rows['summary'].append([path, 'unstable', str(e), len(model.nodes), len(model)] + units)
+        return rows
+    except (ValueError, nonlinear.ConvergenceError) as e:
+        rows['summary'].append([path, 'error', str(e), len(model.nodes), len(model)] + units)
+        return rows
+
+    rows['summary'].append([path, 'stable', '', len(model.nodes), len(model)] + units)
+
+    D = np.asarray(result.displacements, dtype=float)*factors['displacement_unit']
+    d = model.dimensions
+    xyz = np.zeros((len(model.nodes), 3))
+    xyz[:, :d] = model.nodes/factors['unit_node']
+    D_xyz = np.zeros((len(model.nodes), 3))
+    D_xyz[:, :d] = D.reshape(-1, d)
+    for i in range(len(model.nodes)):
+        rows['nodes'].append(
+            [path, i+1, xyz[i, 0], xyz[i, 1], D_xyz[i, 0], D_xyz[i, 1], xyz[i, 2], D_xyz[i, 2]])
+
+    bar_force = np.asarray(result.bar_forces, dtype=float) * \
+        factors['displacement_unit']*factors['bar_force_unit']
+    stress = bar_force/model.properties[:, 1]*factors['stress_unit']
+    for i, (fromNode, toNode) in enumerate(model.elements.tolist()):
+        rows['members'].append(
+            [path, i+1, fromNode, toNode, bar_force[i], stress[i]])
+
+    names = project.cases + list(project.combinations)
+    kinds = ['case']*len(project.cases) + \
+        ['combination']*len(project.combinations)
+    bar_forces = np.hstack((cases.bar_forces, combinations.bar_forces)).astype(float) * \
+        factors['displacement_unit']*factors['bar_force_unit']
+    stresses = bar_forces/model.properties[:, 1:]*factors['stress_unit']
+    for column, (name, kind) in enumerate(zip(names, kinds)):
+        for i in range(len(model)):
+            rows['cases'].append(
+                [path, name, kind, i+1, bar_forces[i, column], stresses[i, column]])
+
+    governing = names[len(project.cases):] if project.combinations else names
+    envelope = loadcases.Envelope(
+        bar_forces[:, len(names)-len(governing):])
+    for i in range(len(model)):
+        rows['envelopes'].append([path, i+1, envelope.max[i], governing[envelope.max_at[i]],
+                                  envelope.min[i], governing[envelope.min_at[i]]])
+
+    for mode, factor in enumerate(critical, start=1):
+        rows['buckling'].append([path, mode, factor])
+    for mode, frequency in enumerate(frequencies, start=1):
+        rows['modes'].append([path, mode, frequency])
+
+    reactions = result.reactions/factors['force_unit']
+    for dof, reaction in zip(model.restrained_dofs, reactions):
+        rows['reactions'].append(
+            [path, (dof-1)//d + 1, 'xyz'[(dof-1) % d], reaction])
+
+    return rows
+
+
+def find_files(paths):
+    """.trs files given directly or found inside folders"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name)
+                             for name in sorted(names) if name.endswith('.trs'))
+        else:
+            files.append(path)
+    return files
+
+
+class CsvWriter:
+    def __init__(self, output, tables=TABLES):
+        self.files = {}
+        self.writers = {}
+        for table, columns in tables.items():
+            self.files[table] = open(os.path.join(
+                output, f'{table}.csv'), 'w', newline='')
+            self.writers[table] = csv.writer(self.files[table])
+            self.writers[table].writerow(columns)
+
+    def write(self, rows):
+        for table, table_rows in rows.items():
+            self.writers[table].writerows(table_rows)
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+
+class JsonWriter:
+    """one JSON object per line and per file, every other table is a list in it"""
+
+    def __init__(self, output, tables=TABLES):
+        self.file = open(os.path.join(output, 'results.jsonl'), 'w')
+        self.tables = tables
+
+    def write(self, rows):
+        record = dict(zip(self.tables['summary'], rows['summary'][0]))
+        for table, table_rows in rows.items():
+            if table != 'summary':
+                # the file column is already in the summary
+                record[table] = [dict(zip(self.tables[table][1:], row[1:]))
+                                 for row in table_rows]
+        self.file.write(json.dumps(record) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """rows are buffered and flushed as row groups, needs pyarrow"""
+
+    def __init__(self, output, tables=TABLES, batch=100000):
+        import pyarrow
+        import pyarrow.parquet
+        self.pyarrow = pyarrow
+        self.output = output
+        self.tables = tables
+        self.batch = batch
+        self.buffers = {table: [] for table in tables}
+        self.writers = {}
+
+    def write(self, rows):
+        for table, table_rows in rows.items():
+            self.buffers[table].extend(table_rows)
+            if len(self.buffers[table]) >= self.batch:
+                self.flush(table)
+
+    def flush(self, table):
+        rows = self.buffers[table]
+        if not rows:
+            return
+        columns = list(zip(*rows))
+        arrow_table = self.pyarrow.table(
+            {name: list(column) for name, column in zip(self.tables[table], columns)})
+        if table not in self.writers:
+            self.writers[table] = self.pyarrow.parquet.ParquetWriter(
+                os.path.join(self.output, f'{table}.parquet'), arrow_table.schema)
+        self.writers[table].write_table(arrow_table)
+        self.buffers[table] = []
+
+    def close(self):
+        for table in self.tables:
+            self.flush(table)
+        for writer in self.writers.values():
+            writer.close()
+
+
+WRITERS = {'csv': CsvWriter, 'json': JsonWriter, 'parquet': ParquetWriter}
+
+
+def analyze(args):
+    files = find_files(args.files)
+    if not files:
+        print('No .trs files found', file=sys.stderr)
+        return 1
+
+    os.makedirs(args.output, exist_ok=True)
+    try:
+        writer = WRITERS[args.format](args.output)
+    except ImportError:
+        print('Parquet output needs pyarrow (pip install pyarrow)', file=sys.stderr)
+        return 1
+
+    status = {'stable': 0, 'unstable': 0, 'error': 0}
+    jobs = args.jobs or os.cpu_count() or 1
+    executor = None
+    analyze_one = functools.partial(
+        analyze_file, large=args.large, buckling=args.buckling, modes=args.modes,
+        lumped=args.lumped, dtype=np.float32 if args.float32 else np.float64)
+    try:
+        if jobs == 1:
+            results = map(analyze_one, files)
+        else:
+            executor = ProcessPoolExecutor(max_workers=jobs)
+            chunksize = max(1, len(files)//(jobs*16))
+            results = executor.map(analyze_one, files, chunksize=chunksize)
+
+        for rows in results:
+            writer.write(rows)
+            status[rows['summary'][0][1]] += 1
+    finally:
+        writer.close()
+        if executor:
+            executor.shutdown()
+
+    print(f"{len(files)} files : {status['stable']} stable, {status['unstable']} unstable, "
+          f"{status['error']} errors -> {args.output}")
+    return 1 if status['error'] else 0
+
+
+def parse_parameter(text, bounds=False):
+    """
+    'E=190,200,210' or 'height=3:6:7' (7 values from 3 to 6) for a grid,
+    'A=1000:5000' for the range of a Latin hypercube
+    """
+    name, _, values = text.partition('=')
+    try:
+        if bounds:
+            low, high = (float(v) for v in values.split(':'))
+            return name.strip(), (low, high)
+        if ':' in values:
+            start, stop, count = values.split(':')
+            return name.strip(), np.linspace(float(start), float(stop), int(count))
+        return name.strip(), [float(v) for v in values.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Cannot read parameter {text!r}')
+
+
+def sweep(args):
+    if bool(args.grid) == bool(args.lhs):
+        print('Give either --grid or --lhs parameters', file=sys.stderr)
+        return 1
+    try:
+        project = trsfile.read_project(args.file)
+        if args.grid:
+            names, samples = parametric.grid(dict(args.grid))
+        else:
+            names, samples = parametric.latin_hypercube(
+                dict(args.lhs), args.samples, args.seed)
+        # a bad parameter or combination shows up here, not in every worker
+        parametric.Variants(project, names)
+    except (OSError, trsfile.ProjectFileError, ValueError) as e:
+        print(f'{args.file} : {e}', file=sys.stderr)
+        return 1
+
+    tables = {'sweep': ['variant'] + names + parametric.SUMMARY,
+              'sweep_members': ['variant', 'member', 'max_force', 'min_force']}
+    os.makedirs(args.output, exist_ok=True)
+    try:
+        writer = WRITERS[args.format](args.output, tables)
+    except ImportError:
+        print('Parquet output needs pyarrow (pip install pyarrow)', file=sys.stderr)
+        return 1
+
+    status = {'stable': 0, 'unstable': 0, 'error': 0}
+    try:
+        for indices, values, columns, max_force, min_force in parametric.run(
+                project, names, samples, jobs=args.jobs):
+            summary = [columns[name].tolist() for name in parametric.SUMMARY]
+            rows = {'sweep': [[int(i)] + v + list(s) for i, v, s in
+                              zip(indices, values.tolist(), zip(*summary))],
+                    'sweep_members': []}
+            for i, high, low in zip(indices.tolist(), max_force.tolist(), min_force.tolist()):
+                rows['sweep_members'].extend(
+                    [i, member, h, l] for member, (h, l) in enumerate(zip(high, low), start=1))
+            writer.write(rows)
+            for s in columns['status']:
+                status[s] += 1
+    finally:
+        writer.close()
+
+    print(f"{len(samples)} variants : {status['stable']} stable, {status['unstable']} unstable, "
+          f"{status['error']} errors -> {args.output}")
+    return 1 if status['error'] else 0
+
+
+def size(args):
+    try:
+        project = trsfile.read_project(args.file)
+        model = project.to_model()
+        factors = project.factors()
+        matrix = loadcases.combination_matrix(project.cases, project.combinations)
+        loads = project.case_loads()
+        if len(matrix):
+            loads = loads.dot(matrix.T)
+
+        # limits are given in the units shown by the GUI
+        stress_scale = factors['displacement_unit'] * \
+            factors['bar_force_unit']*factors['stress_unit']
+        sizer = sizing.Sizing(
+            model, args.tension/stress_scale,
+            None if args.compression is None else args.compression/stress_scale,
+            loads, args.min_area, args.max_area)
+        if args.displacement is None:
+            sized = sizer.fully_stressed(iterations=args.iterations)
+        else:
+            sized = sizer.minimum_weight(
+                args.displacement/factors['displacement_unit'], iterations=args.iterations)
+    except (OSError, trsfile.ProjectFileError, UnstableStructureError, ValueError) as e:
+        print(f'{args.file} : {e}', file=sys.stderr)
+        return 1
+
+    # one property row per member
+    properties = np.column_stack((model.properties[:, 0], sized.areas))
+    densities = project.densities[project.member_property-1] if len(project.properties) > 1 \
+        else np.repeat(project.densities, len(model))
+    trsfile.save_project(args.output, trsfile.Project(
+        project.unit_type, project.unit_index, project.cases, project.combinations,
+        project.dimensions, nodes=project.nodes, members=project.members,
+        member_property=np.arange(1, len(model)+1), properties=properties,
+        densities=densities, support_nodes=project.support_nodes, support_types=project.support_types,
+        load_nodes=project.load_nodes, loads=project.loads, load_case=project.load_case))
+
+    state = 'converged' if sized.converged else 'stopped at the iteration limit'
+    print(f'{len(model)} members {state} after {sized.iterations} analyses, '
+          f'volume {sized.weight:g} -> {args.output}')
+    return 0 if sized.converged else 1
+
+
+def read_history(path, cases):
+    """
+    LoadHistory from a csv file with a time column and a column of
+    multipliers for any of the load cases, cases without a column are 0
+    """
+    with open(path, newline='') as infile:
+        reader = csv.reader(infile)
+        header = [name.strip() for name in next(reader)]
+        table = np.array([[float(v) for v in row] for row in reader if row], dtype=float)
+    if not header or header[0].lower() != 'time':
+        raise ValueError(f'{path} : the first column must be time')
+    unknown = set(header[1:]) - set(cases)
+    if unknown:
+        raise ValueError(f"{path} : no load case {', '.join(sorted(unknown))}")
+    table = table.reshape(-1, len(header))
+    values = np.zeros((len(table), len(cases)))
+    for column, name in enumerate(header[1:], start=1):
+        values[:, cases.index(name)] = table[:, column]
+    return dynamics.LoadHistory(table[:, 0], values)
+
+
+def dynamic(args):
+    try:
+        project = trsfile.read_project(args.file)
+        model = project.to_model()
+        factors = project.factors()
+        if args.history:
+            history = read_history(args.history, project.cases)
+        else:
+            history = dynamics.LoadHistory.constant(len(project.cases))
+
+        mass_damping = stiffness_damping = 0.0
+        if args.damping:
+            frequencies = TrussSolver(model).natural_frequencies(2, args.lumped)[0]
+            if len(frequencies) < 2:
+                raise ValueError('Damping needs two vibration modes, give the members a density')
+            mass_damping, stiffness_damping = dynamics.rayleigh(args.damping, *frequencies)
+
+        dofs = None
+        if args.nodes:
+            nodes = np.array([int(v) for v in args.nodes.split(',')])
+            if ((nodes < 1) | (nodes > len(model.nodes))).any():
+                raise ValueError(f'Nodes must be between 1 and {len(model.nodes)}')
+            d = model.dimensions
+            dofs = (d*(nodes-1)[:, None] + np.arange(d)).ravel()
+
+        integrator = dynamics.TimeHistory(
+            model, args.dt, args.alpha, args.lumped, mass_damping, stiffness_damping)
+        peak_displacement, peak_force = integrator.save(
+            args.output, project.case_loads(), history, args.steps, dofs=dofs,
+            displacement_scale=factors['displacement_unit'],
+            force_scale=factors['displacement_unit']*factors['bar_force_unit'])
+    except (OSError, StopIteration, trsfile.ProjectFileError, UnstableStructureError,
+            ValueError) as e:
+        print(f'{args.file} : {e}', file=sys.stderr)
+        return 1
+
+    print(f'{args.steps} steps of {args.dt:g} s, '
+          f"peak displacement {peak_displacement:g} {factors['displacement_unit_name']}, "
+          f"peak member force {peak_force:g} {factors['bar_force_unit_name']} -> {args.output}")
+    return 0
+
+
+def view(args):
+    try:
+        project = trsfile.read_project(args.file)
+        model = project.to_model()
+        result = TrussSolver(model).solve() if args.deformed else None
+    except (OSError, trsfile.ProjectFileError, UnstableStructureError, ValueError) as e:
+        print(f'{args.file} : {e}', file=sys.stderr)
+        return 1
+
+    # matplotlib only when something is drawn, analyze never needs it
+    import matplotlib
+    if args.save:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import spaceview
+
+    figure = plt.figure()
+    ax = figure.add_subplot(projection='3d')
+    scale = spaceview.draw(ax, model, result, args.scale)
+    title = os.path.basename(args.file)
+    if result is not None:
+        title += f'  (displacements x{scale:.3g})'
+    ax.set_title(title)
+    if args.save:
+        figure.savefig(args.save, dpi=150)
+    else:
+        plt.show()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='truss101', description='Truss 101 without the GUI')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    parser_analyze = commands.add_parser(
+        'analyze', help='solve .trs files and write displacements, member forces, stresses and reactions')
+    parser_analyze.add_argument(
+        'files', nargs='+', help='.trs files or folders containing them')
+    parser_analyze.add_argument(
+        '-o', '--output', default='results', help='output folder (default: results)')
+    parser_analyze.add_argument(
+        '-f', '--format', choices=sorted(WRITERS), default='csv')
+    parser_analyze.add_argument('-j', '--jobs', type=int, default=0,
+                                help='worker processes (default: all cores)')
+    parser_analyze.add_argument('--large', action='store_true',
+                                help='large displacements, geometric nonlinear analysis')
+    parser_analyze.add_argument('--buckling', type=int, default=0, metavar='MODES',
+                                help='lowest critical load factors of all loads')
+    parser_analyze.add_argument('--modes', type=int, default=0, metavar='MODES',
+                                help='lowest natural frequencies, members need a density')
+    parser_analyze.add_argument('--lumped', action='store_true',
+                                help='lumped instead of consistent mass for --modes')
+    parser_analyze.add_argument('--float32', action='store_true',
+                                help='single precision factor refined to double precision, half the memory')
+
+    parser_sweep = commands.add_parser(
+        'sweep', help='solve variants of one .trs file with E, A, span or height changed')
+    parser_sweep.add_argument('file', help='base .trs file')
+    parser_sweep.add_argument('--grid', action='append', default=[], metavar='NAME=VALUES',
+                              type=parse_parameter,
+                              help='every combination of the values, E=190,200,210 or height=3:6:7')
+    parser_sweep.add_argument('--lhs', action='append', default=[], metavar='NAME=LOW:HIGH',
+                              type=lambda text: parse_parameter(text, bounds=True),
+                              help='Latin hypercube sample of the range')
+    parser_sweep.add_argument('-n', '--samples', type=int, default=100,
+                              help='variants of a Latin hypercube (default: 100)')
+    parser_sweep.add_argument('--seed', type=int, default=None)
+    parser_sweep.add_argument(
+        '-o', '--output', default='results', help='output folder (default: results)')
+    parser_sweep.add_argument(
+        '-f', '--format', choices=['csv', 'parquet'], default='csv')
+    parser_sweep.add_argument('-j', '--jobs', type=int, default=0,
+                              help='worker processes (default: all cores)')
+
+    parser_size = commands.add_parser(
+        'size', help='areas of every member for allowable stresses and a displacement limit')
+    parser_size.add_argument('file', help='.trs file to size')
+    parser_size.add_argument('-o', '--output', required=True,
+                             help='.trs file written with one property row per member')
+    parser_size.add_argument('--tension', type=float, required=True,
+                             help='allowable tension stress')
+    parser_size.add_argument('--compression', type=float,
+                             help='allowable compression stress (default: same as tension)')
+    parser_size.add_argument('--displacement', type=float,
+                             help='largest displacement allowed, minimum weight instead of fully stressed')
+    parser_size.add_argument('--min-area', type=float, default=1e-6)
+    parser_size.add_argument('--max-area', type=float, default=np.inf)
+    parser_size.add_argument('--iterations', type=int, default=200)
+
+    parser_dynamic = commands.add_parser(
+        'dynamic', help='time-history response to loads that change in time (Newmark / HHT)')
+    parser_dynamic.add_argument('file', help='.trs file, members need a density')
+    parser_dynamic.add_argument('-o', '--output', default='results',
+                                help='output folder for time.npy, displacements.npy and bar_forces.npy')
+    parser_dynamic.add_argument('--dt', type=float, required=True, help='time step in seconds')
+    parser_dynamic.add_argument('--steps', type=int, required=True)
+    parser_dynamic.add_argument('--history', metavar='CSV',
+                                help='time and a multiplier column per load case '
+                                     '(default: every case applied in full at t = 0)')
+    parser_dynamic.add_argument('--alpha', type=float, default=0.0,
+                                help='HHT alpha between -1/3 and 0, 0 is Newmark average acceleration')
+    parser_dynamic.add_argument('--damping', type=float, default=0.0,
+                                help='Rayleigh damping ratio of the lowest two modes')
+    parser_dynamic.add_argument('--lumped', action='store_true', help='lumped instead of consistent mass')
+    parser_dynamic.add_argument('--nodes', help='only record these nodes, e.g. 3,5')
+
+    parser_view = commands.add_parser('view', help='3D view of a plane or space truss')
+    parser_view.add_argument('file', help='.trs file')
+    parser_view.add_argument('--deformed', action='store_true',
+                             help='solve it and draw the deformed truss coloured by member force')
+    parser_view.add_argument('--scale', type=float, help='displacement magnifier')
+    parser_view.add_argument('--save', metavar='IMAGE', help='write an image instead of a window')
+
+    args = parser.parse_args(argv)
+    if args.command == 'analyze':
+        return analyze(args)
+    if args.command == 'sweep':
+        return sweep(args)
+    if args.command == 'size':
+        return size(args)
+    if args.command == 'dynamic':
+        return dynamic(args)
+    if args.command == 'view':
+        return view(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
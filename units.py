@@ -0,0 +1,99 @@
+"""
+GPL-3.0 License
+
+Copyright (C) 2020-2022 Monirul Shawon
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Unit factors used by the GUI and the command line.
+
+index is [length, load, force] as chosen in the unit window
+    metric   length : m, mm       load : kN, N, kg   force : kN, N, kg
+    imperial length : ft, in      load : k, lb       force : k, lb
+
+unit_node           : table x, y     -> model length
+displacement_unit   : model length   -> shown displacement (mm or in)
+reverse_unit        : model length   -> table x, y
+displacement_factor : deflection magnifier step
+volume_unit         : A*(model length) -> volume in mm^3 or in^3, A is in mm^2 or in^2
+length_unit_name, displacement_unit_name : table x, y and shown displacement
+force_unit          : table load     -> model load
+bar_force_unit      : Ck*tau.D (shown displacement) -> shown member force
+stress_unit         : shown force/A  -> shown stress (MPa or psi)
+force_unit_name, bar_force_unit_name, stress_unit_name : load and reaction,
+                      member force and stress as shown
+mass_unit           : density*A      -> model mass per model length, the mass
+                      that goes with K (t with kN/m, kip.s^2/ft with kip/ft)
+"""
+
+METRIC_LENGTH = {
+    0: dict(unit_node=1, displacement_unit=1000, reverse_unit=1, displacement_factor=0.01,
+            volume_unit=1000, length_unit_name='m', displacement_unit_name='mm'),
+    1: dict(unit_node=0.001, displacement_unit=1, reverse_unit=1000, displacement_factor=0.01,
+            volume_unit=1000, length_unit_name='mm', displacement_unit_name='mm'),
+}
+METRIC_LOAD = {
+    0: {0: (1, 'kN'), 1: (0.001, 'N'), 2: (0.00980665, 'kg')},
+    1: {0: (1000, 'kN'), 1: (1, 'N'), 2: (9.80665, 'kg')},
+}
+METRIC_FORCE = {
+    0: dict(bar_force_unit=1/1000, stress_unit=1000, bar_force_unit_name='kN', stress_unit_name='MPa'),
+    1: dict(bar_force_unit=1, stress_unit=1, bar_force_unit_name='N', stress_unit_name='MPa'),
+    2: dict(bar_force_unit=(1/1000)/0.00980665, stress_unit=9.80665, bar_force_unit_name='kg',
+            stress_unit_name='MPa'),
+}
+
+IMPERIAL_LENGTH = {
+    0: dict(unit_node=1, displacement_unit=12, reverse_unit=1, displacement_factor=0.1,
+            volume_unit=12, length_unit_name='ft', displacement_unit_name='in'),
+    1: dict(unit_node=1/12, displacement_unit=1, reverse_unit=12, displacement_factor=0.1,
+            volume_unit=12, length_unit_name='in', displacement_unit_name='in'),
+}
+IMPERIAL_LOAD = {
+    0: {0: (1, 'k'), 1: (0.001, 'lb')},
+    1: {0: (12, 'k'), 1: (0.012, 'lb')},
+}
+IMPERIAL_FORCE = {
+    0: dict(bar_force_unit=1/12, stress_unit=1000, bar_force_unit_name='k', stress_unit_name='psi'),
+    1: dict(bar_force_unit=(1/12)*1000, stress_unit=1, bar_force_unit_name='lb', stress_unit_name='psi'),
+}
+
+# density is typed in kg/m^3 or lb/ft^3, A in mm^2 or in^2
+DENSITY = {
+    'metric': (1e-9, 'kg/m³'),
+    'imperial': (1/(144*1000*32.174049), 'lb/ft³'),
+}
+
+
+def unit_factors(type, index):
+    """
+    type is 'metric' or 'imperial', index the [length, load, force] list
+    (or the [[length, load, force]] stored in a .trs file)
+    """
+    if len(index) and not isinstance(index[0], int):
+        index = index[0]
+    length, load, force = index
+
+    if type == 'metric':
+        tables = METRIC_LENGTH, METRIC_LOAD, METRIC_FORCE
+    else:
+        tables = IMPERIAL_LENGTH, IMPERIAL_LOAD, IMPERIAL_FORCE
+
+    factors = dict(tables[0][length])
+    factors['force_unit'], factors['force_unit_name'] = tables[1][length][load]
+    factors.update(tables[2][force])
+    factors['mass_unit'], factors['density_unit_name'] = DENSITY[type]
+    return factors